@@ -24,6 +24,7 @@ class TrendingContentSchema(Schema):
     content_type = fields.Str(load_default="skill", validate=validate.OneOf(["skill", "user", "task"]))
     days = fields.Int(load_default=7, validate=validate.Range(min=1, max=30))
     limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
+    approximate = fields.Bool(load_default=False)
 
 # Error handlers
 @analytics_bp.errorhandler(ValidationError)
@@ -156,7 +157,8 @@ def get_trending_content():
         query_params = {
             'content_type': request.args.get('content_type', 'skill'),
             'days': request.args.get('days', 7, type=int),
-            'limit': request.args.get('limit', 20, type=int)
+            'limit': request.args.get('limit', 20, type=int),
+            'approximate': request.args.get('approximate', 'false').lower() == 'true'
         }
         
         validated_data = cast(dict, TrendingContentSchema().load(query_params))
@@ -164,7 +166,8 @@ def get_trending_content():
         trending_data = AnalyticsService.get_trending_content(
             content_type=validated_data['content_type'],
             days=validated_data['days'],
-            limit=validated_data['limit']
+            limit=validated_data['limit'],
+            approximate=validated_data['approximate']
         )
         
         return jsonify({
@@ -186,8 +189,9 @@ def get_dashboard_metrics():
         days = request.args.get('days', 30, type=int)
         if days < 1 or days > 365:
             days = 30
+        approximate = request.args.get('approximate', 'false').lower() == 'true'
         
-        dashboard_data = AnalyticsService.get_platform_dashboard_metrics(days)
+        dashboard_data = AnalyticsService.get_platform_dashboard_metrics(days, approximate)
         
         return jsonify({
             "message": "Dashboard metrics retrieved successfully",
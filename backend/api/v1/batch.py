@@ -4,14 +4,18 @@ from typing import cast
 from datetime import datetime
 from backend.auth.routes import require_auth
 from backend.services.batch_processor import batch_processor
+from backend.services.scheduler_service import job_scheduler
 
 # Create blueprint
 batch_bp = Blueprint('batch', __name__)
 
+OVERDUE_THRESHOLD_SECONDS = 300
+
 # Validation Schemas
 class ProcessBatchSchema(Schema):
     batch_type = fields.Str(required=True, validate=validate.OneOf([
-        "engagement", "trending", "notifications", "cache_maintenance", "analytics"
+        "engagement", "trending", "notifications", "cache_maintenance", "analytics",
+        "leaderboards", "counter_reconcile", "follow_suggestions", "analytics_rollups"
     ]))
 
 class CleanupDataSchema(Schema):
@@ -34,11 +38,13 @@ def handle_generic_error(err):
 @batch_bp.route('/status', methods=['GET'])
 @require_auth
 def get_batch_status():
-    """Get status of batch processing system (admin only)"""
+    """Get status of scheduled batch jobs (admin only)"""
     try:
         # TODO: Add proper admin role check
         
-        status = batch_processor.get_batch_status()
+        status = job_scheduler.get_status()
+        status["skill_engagement_checkpoint"] = batch_processor.get_engagement_checkpoint()
+        status["analytics_rollup_checkpoint"] = batch_processor.get_rollup_checkpoint()
         
         return jsonify({
             "message": "Batch processing status retrieved successfully",
@@ -51,39 +57,47 @@ def get_batch_status():
 @batch_bp.route('/start', methods=['POST'])
 @require_auth
 def start_batch_processing():
-    """Start batch processing system (admin only)"""
+    """Resume scheduled batch jobs on every worker (admin only)"""
     try:
         # TODO: Add proper admin role check
         
-        batch_processor.start_batch_processing()
+        data = request.get_json(silent=True) or {}
+        resumed = job_scheduler.set_paused(False, data.get('batch_type'))
         
         return jsonify({
-            "message": "Batch processing started successfully"
+            "message": "Batch processing started successfully",
+            "jobs_resumed": resumed
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to start batch processing: {str(e)}"}), 500
 
 @batch_bp.route('/stop', methods=['POST'])
 @require_auth
 def stop_batch_processing():
-    """Stop batch processing system (admin only)"""
+    """Pause scheduled batch jobs on every worker (admin only)"""
     try:
         # TODO: Add proper admin role check
         
-        batch_processor.stop_batch_processing()
+        data = request.get_json(silent=True) or {}
+        paused = job_scheduler.set_paused(True, data.get('batch_type'))
         
         return jsonify({
-            "message": "Batch processing stopped successfully"
+            "message": "Batch processing stopped successfully",
+            "jobs_paused": paused
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to stop batch processing: {str(e)}"}), 500
 
 @batch_bp.route('/process', methods=['POST'])
 @require_auth
 def process_immediate_batch():
-    """Process a specific batch type immediately (admin only)"""
+    """Queue a specific batch type to run now on the next free scheduler (admin only)"""
     try:
         # TODO: Add proper admin role check
         
@@ -92,20 +106,40 @@ def process_immediate_batch():
             return jsonify({"error": "No JSON data provided"}), 400
         
         validated_data = cast(dict, ProcessBatchSchema().load(data))
+        batch_type = validated_data['batch_type']
         
-        result = batch_processor.process_immediate_batch(validated_data['batch_type'])
+        if not job_scheduler.trigger(batch_type, requested_by=str(g.current_user['_id'])):
+            return jsonify({"error": f"Job not registered: {batch_type}"}), 500
         
-        if result['success']:
-            return jsonify({
-                "message": result['message'],
-                "processed_items": result['processed_items']
-            }), 200
-        else:
-            return jsonify({"error": result['message']}), 500
+        return jsonify({
+            "message": f"Batch '{batch_type}' queued",
+            "batch_type": batch_type,
+            "runs_url": f"/api/v1/batch/runs?batch_type={batch_type}"
+        }), 202
             
     except ValidationError as e:
         return jsonify({"error": "Invalid input", "details": e.messages}), 400
 
+@batch_bp.route('/runs', methods=['GET'])
+@require_auth
+def get_batch_runs():
+    """Get recent batch job runs with duration, items processed and errors (admin only)"""
+    try:
+        # TODO: Add proper admin role check
+        
+        batch_type = request.args.get('batch_type')
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        
+        runs = job_scheduler.get_run_history(batch_type, limit)
+        
+        return jsonify({
+            "message": "Batch runs retrieved successfully",
+            "runs": runs
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get batch runs: {str(e)}"}), 500
+
 @batch_bp.route('/cleanup', methods=['POST'])
 @require_auth
 def cleanup_old_data():
@@ -131,28 +165,32 @@ def cleanup_old_data():
 def batch_health():
     """Health check for batch processing system"""
     try:
-        status = batch_processor.get_batch_status()
-        
-        if status['running']:
-            # Check if any threads have died
-            dead_threads = [name for name, alive in status['active_threads'].items() if not alive]
+        status = job_scheduler.get_status()
+        active_jobs = [job for job in status['jobs'] if not job['paused']]
+        
+        if active_jobs:
+            # A job is overdue when no scheduler has picked it up well past its run time
+            overdue_jobs = [
+                job['name'] for job in active_jobs
+                if not job['running'] and (job['overdue_seconds'] or 0) > OVERDUE_THRESHOLD_SECONDS
+            ]
             
-            if dead_threads:
+            if overdue_jobs:
                 return jsonify({
                     "status": "degraded",
-                    "message": f"Some batch processes are not running: {', '.join(dead_threads)}",
+                    "message": f"Some batch jobs are overdue: {', '.join(overdue_jobs)}",
                     "timestamp": datetime.utcnow().isoformat()
                 }), 503
             else:
                 return jsonify({
                     "status": "healthy",
-                    "message": "All batch processes running normally",
+                    "message": "All batch jobs running on schedule",
                     "timestamp": datetime.utcnow().isoformat()
                 }), 200
         else:
             return jsonify({
                 "status": "stopped",
-                "message": "Batch processing is not running",
+                "message": "Batch processing is paused",
                 "timestamp": datetime.utcnow().isoformat()
             }), 200
             
@@ -161,4 +199,4 @@ def batch_health():
             "status": "unhealthy",
             "message": f"Batch processing system error: {str(e)}",
             "timestamp": datetime.utcnow().isoformat()
-        }), 503
\ No newline at end of file
+        }), 503
@@ -3,6 +3,7 @@ from marshmallow import Schema, fields, ValidationError, validate
 from typing import cast
 from backend.auth.routes import require_auth
 from backend.services.cache_service import CacheService
+from backend.services.ai_service import AIService
 from backend.middleware.cache_middleware import cache_health_check, CacheManager
 
 # Create blueprint
@@ -52,6 +53,7 @@ def get_cache_stats():
         # TODO: Add proper admin role check
         
         stats = CacheService.get_cache_stats()
+        stats["ai_plan_cache"] = AIService._plan_cache.get_stats()
         
         return jsonify({
             "message": "Cache statistics retrieved successfully",
@@ -124,10 +126,11 @@ def invalidate_user_cache(user_id: str):
             # TODO: Add proper admin role check
             return jsonify({"error": "Unauthorized to invalidate other users' cache"}), 403
         
-        CacheManager.invalidate_user_related_cache(user_id)
+        keys_invalidated = CacheManager.invalidate_user_related_cache(user_id)
         
         return jsonify({
-            "message": f"Cache invalidated for user {user_id}"
+            "message": f"Cache invalidated for user {user_id}",
+            "keys_invalidated": keys_invalidated
         }), 200
         
     except Exception as e:
@@ -140,10 +143,11 @@ def invalidate_skill_cache(skill_id: str):
     try:
         # TODO: Check if user owns the skill or is admin
         
-        CacheManager.invalidate_skill_related_cache(skill_id)
+        keys_invalidated = CacheManager.invalidate_skill_related_cache(skill_id)
         
         return jsonify({
-            "message": f"Cache invalidated for skill {skill_id}"
+            "message": f"Cache invalidated for skill {skill_id}",
+            "keys_invalidated": keys_invalidated
         }), 200
         
     except Exception as e:
@@ -156,10 +160,11 @@ def invalidate_trending_cache():
     try:
         # TODO: Add proper admin/moderator role check
         
-        CacheManager.invalidate_trending_cache()
+        keys_invalidated = CacheManager.invalidate_trending_cache()
         
         return jsonify({
-            "message": "Trending cache invalidated successfully"
+            "message": "Trending cache invalidated successfully",
+            "keys_invalidated": keys_invalidated
         }), 200
         
     except Exception as e:
@@ -379,7 +384,8 @@ def get_cache_hit_rate():
             "hits": stats.get("hits", 0),
             "misses": stats.get("misses", 0),
             "total_keys": stats.get("keys", 0),
-            "memory_usage": stats.get("used_memory_human", "0B")
+            "memory_usage": stats.get("used_memory_human", "0B"),
+            "tiers": stats.get("tiers", CacheService.get_tier_stats())
         }), 200
         
     except Exception as e:
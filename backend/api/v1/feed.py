@@ -5,7 +5,6 @@ from datetime import datetime
 from bson import ObjectId
 from backend.auth.routes import require_auth
 from backend.services.activity_feed_service import ActivityFeedService
-from backend.middleware.cache_middleware import cache_user_specific
 
 # Create blueprint
 feed_bp = Blueprint('feed', __name__)
@@ -14,6 +13,7 @@ feed_bp = Blueprint('feed', __name__)
 class FeedQuerySchema(Schema):
     limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=100))
     include_own = fields.Bool(load_default=False)
+    cursor = fields.Str(load_default=None, allow_none=True)
 
 class GlobalFeedQuerySchema(Schema):
     limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=100))
@@ -34,14 +34,14 @@ def handle_generic_error(err):
 # Feed endpoints
 @feed_bp.route('/', methods=['GET'])
 @require_auth
-@cache_user_specific(ttl=300)  # Cache for 5 minutes
 def get_user_feed():
-    """Get personalized activity feed for current user"""
+    """Get personalized activity feed for current user (pass next_cursor back as cursor for older items)"""
     try:
         # Parse query parameters
         query_params = {
             'limit': request.args.get('limit', 20, type=int),
-            'include_own': request.args.get('include_own', 'false').lower() == 'true'
+            'include_own': request.args.get('include_own', 'false').lower() == 'true',
+            'cursor': request.args.get('cursor')
         }
         
         validated_data = cast(dict, FeedQuerySchema().load(query_params))
@@ -50,7 +50,8 @@ def get_user_feed():
         feed_data = ActivityFeedService.generate_user_feed(
             current_user_id,
             limit=validated_data['limit'],
-            include_own=validated_data['include_own']
+            include_own=validated_data['include_own'],
+            cursor=validated_data['cursor']
         )
         
         return jsonify({
@@ -91,7 +92,7 @@ def refresh_user_feed():
     try:
         current_user_id = str(g.current_user['_id'])
         
-        # Invalidate cached feed
+        # Rebuild the timeline from stored activities
         ActivityFeedService.invalidate_user_feed(current_user_id)
         
         # Generate fresh feed
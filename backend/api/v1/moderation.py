@@ -44,6 +44,16 @@ class AutoModerationRuleSchema(Schema):
         "low", "medium", "high", "critical"
     ]))
     priority_score = fields.Int(load_default=50, validate=validate.Range(min=1, max=100))
+    # rate_limit rules: at most max_posts per user within the window
+    max_posts = fields.Int(load_default=5, validate=validate.Range(min=1, max=1000))
+    time_window_minutes = fields.Int(load_default=60, validate=validate.Range(min=1, max=10080))
+    content_types = fields.List(fields.Str(validate=validate.OneOf(["skill", "comment", "custom_task"])))
+
+class BatchScanSchema(Schema):
+    content_type = fields.Str(required=True, validate=validate.OneOf([
+        "skill", "comment", "user", "custom_task"
+    ]))
+    documents = fields.List(fields.Dict(), required=True, validate=validate.Length(min=1, max=500))
 
 # Error handlers
 @moderation_bp.errorhandler(ValidationError)
@@ -271,6 +281,44 @@ def scan_content():
     except Exception as e:
         return jsonify({"error": f"Failed to scan content: {str(e)}"}), 500
 
+@moderation_bp.route('/scan-content/batch', methods=['POST'])
+@require_auth
+def scan_content_batch():
+    """Scan many documents in one pass over the compiled rules (system/admin use)"""
+    try:
+        # TODO: Add proper admin/system role check
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        validated_data = cast(dict, BatchScanSchema().load(data))
+        violations = ModerationService.scan_contents_for_violations(
+            content_type=validated_data['content_type'],
+            documents=validated_data['documents']
+        )
+        
+        results = [
+            {
+                "index": index,
+                "violation": {
+                    "report_id": str(violation["_id"]),
+                    "reason": violation["reason"],
+                    "priority_score": violation.get("priority_score", 50)
+                } if violation else None
+            }
+            for index, violation in enumerate(violations)
+        ]
+        
+        return jsonify({
+            "message": "Batch scan completed",
+            "violations_found": sum(1 for violation in violations if violation),
+            "results": results
+        }), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Invalid scan data", "details": e.messages}), 400
+
 # Content-specific reporting endpoints
 @moderation_bp.route('/report/skill/<skill_id>', methods=['POST'])
 @require_auth
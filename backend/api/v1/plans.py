@@ -45,7 +45,22 @@ def create_skill():
     user_id = str(g.current_user['_id'])
     
     skill_plan = SkillService.create_skill(user_id=user_id, title=validated_data['skill_name'])
-    return jsonify({"message": "Skill plan created successfully", "skill": skill_plan}), 201
+    return jsonify({
+        "message": "Skill plan created successfully",
+        "skill": skill_plan,
+        "plan_status": skill_plan.get('curriculum', {}).get('status'),
+        "job_id": skill_plan.get('curriculum', {}).get('job_id')
+    }), 201
+
+@v1_plans_blueprint.route('/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_plan_job_status(job_id: str):
+    from backend.services.plan_generation_service import plan_generation_service
+    user_id = str(g.current_user['_id'])
+    job = plan_generation_service.get_job_status(job_id, user_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job": job}), 200
 
 @v1_plans_blueprint.route('/skills/<skill_id>', methods=['GET'])
 @require_auth
@@ -5,6 +5,9 @@ from datetime import datetime
 from bson import ObjectId
 from backend.auth.routes import require_auth
 from backend.services.social_service import SocialService
+from backend.services.activity_feed_service import ActivityFeedService
+from backend.services.leaderboard_service import LeaderboardService
+from backend.services.moderation_service import ModerationService, PostingRateLimitError
 
 # Create blueprint
 skill_sharing_bp = Blueprint('skill_sharing', __name__)
@@ -84,6 +87,8 @@ def share_skill():
             "updated_at": datetime.utcnow()
         }
         
+        ModerationService.check_posting_rate(current_user_id, ModerationService.SKILL)
+        
         # Insert into shared_skills collection
         result = g.db.shared_skills.insert_one(shared_skill_data)
         shared_skill_id = str(result.inserted_id)
@@ -97,6 +102,12 @@ def share_skill():
             }
         )
         
+        # Keep the materialized counter and leaderboards current, and fan the
+        # share out to followers' feeds, as SocialService.share_skill does
+        LeaderboardService.record_skill_shared(current_user_id, 1)
+        if shared_skill_data["visibility"] == "public":
+            ActivityFeedService.record_activity(current_user_id, ActivityFeedService.SKILL_SHARED, skill=shared_skill_data)
+        
         return jsonify({
             "message": "Skill shared successfully",
             "shared_skill_id": shared_skill_id,
@@ -107,6 +118,8 @@ def share_skill():
         
     except ValidationError as e:
         return jsonify({"error": "Invalid input data", "details": e.messages}), 400
+    except PostingRateLimitError as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429
     except Exception as e:
         return jsonify({"error": f"Failed to share skill: {str(e)}"}), 500
 
@@ -190,6 +203,8 @@ def add_custom_task(skill_id, day):
             "updated_at": datetime.utcnow()
         }
         
+        ModerationService.check_posting_rate(current_user_id, ModerationService.CUSTOM_TASK)
+        
         # Insert custom task
         result = g.db.custom_tasks.insert_one(custom_task_data)
         task_id = str(result.inserted_id)
@@ -224,6 +239,8 @@ def add_custom_task(skill_id, day):
         
     except ValidationError as e:
         return jsonify({"error": "Invalid task data", "details": e.messages}), 400
+    except PostingRateLimitError as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429
     except Exception as e:
         return jsonify({"error": f"Failed to add custom task: {str(e)}"}), 500
 
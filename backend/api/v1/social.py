@@ -6,6 +6,7 @@ from backend.auth.routes import require_auth
 from backend.services.social_service import SocialService
 from backend.services.custom_task_service import CustomTaskService
 from backend.services.interaction_service import InteractionService
+from backend.services.moderation_service import PostingRateLimitError
 
 # Create blueprint
 social_bp = Blueprint('social', __name__)
@@ -42,6 +43,10 @@ class CommentSchema(Schema):
 def handle_marshmallow_validation(err):
     return jsonify({"error": "Validation failed", "details": err.messages}), 422
 
+@social_bp.errorhandler(PostingRateLimitError)
+def handle_posting_rate_limit(err):
+    return jsonify({"error": str(err), "retry_after": err.retry_after}), 429
+
 @social_bp.errorhandler(ValueError)
 def handle_value_error(err):
     return jsonify({"error": str(err)}), 400
@@ -307,10 +312,10 @@ def add_skill_comment(skill_id: str):
 
 @social_bp.route('/skills/<skill_id>/comments', methods=['GET'])
 def get_skill_comments(skill_id: str):
-    """Get comments for a shared skill"""
+    """Get comments for a shared skill (pass next_cursor back as cursor for the next page)"""
     limit = min(request.args.get('limit', 100, type=int), 200)  # Cap at 200
     
-    result = InteractionService.get_comments(skill_id, limit)
+    result = InteractionService.get_comments(skill_id, limit, request.args.get('cursor'))
     
     return jsonify({
         "message": "Comments retrieved successfully",
@@ -345,13 +350,25 @@ def get_comments(plan_id: str):
     """Get comments for a shared skill (legacy endpoint)"""
     limit = min(request.args.get('limit', 100, type=int), 200)  # Cap at 200
     
-    result = InteractionService.get_comments(plan_id, limit)
+    result = InteractionService.get_comments(plan_id, limit, request.args.get('cursor'))
     
     return jsonify({
         "message": "Comments retrieved successfully",
         **result
     }), 200
 
+@social_bp.route('/comments/<comment_id>/replies', methods=['GET'])
+def get_comment_replies(comment_id: str):
+    """Get direct replies to a comment (pass next_cursor back as cursor for the next page)"""
+    limit = min(request.args.get('limit', 50, type=int), 200)  # Cap at 200
+    
+    result = InteractionService.get_comment_replies(comment_id, limit, request.args.get('cursor'))
+    
+    return jsonify({
+        "message": "Replies retrieved successfully",
+        **result
+    }), 200
+
 @social_bp.route('/comments/<comment_id>/like', methods=['POST'])
 @require_auth
 def toggle_comment_like(comment_id: str):
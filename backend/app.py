@@ -1,13 +1,15 @@
 import os
 import json
+import atexit
 from datetime import datetime
 from bson import ObjectId
 from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from flask_socketio import SocketIO
-from pymongo import MongoClient
 from backend.auth.routes import auth_bp
-from backend.services.ai_service import AIService
+from backend.services.database_service import DatabaseService
+from backend.services.http_client_service import http_client_service
+from backend.services.analytics_ingest_service import analytics_ingest_service
 import logging
 from dotenv import load_dotenv
 
@@ -39,31 +41,46 @@ def create_app():
     
     CORS(app, origins=allowed_origins)
     
-    # Initialize SocketIO with CORS
-    socketio = SocketIO(app, cors_allowed_origins=allowed_origins, 
+    # Initialize SocketIO with CORS. With WEBSOCKET_MESSAGE_QUEUE (a Redis URL)
+    # every worker relays emits through the queue, so a notification reaches
+    # the user whichever worker holds their connection.
+    message_queue = os.getenv('WEBSOCKET_MESSAGE_QUEUE') or None
+    socketio = SocketIO(app, cors_allowed_origins=allowed_origins, message_queue=message_queue,
                        logger=True, engineio_logger=True)
     
     # Initialize WebSocket service
     from backend.services.websocket_service import WebSocketService
-    websocket_service = WebSocketService(socketio)
+    websocket_service = WebSocketService(socketio, clustered=message_queue is not None)
+    atexit.register(websocket_service.close)
     
     # Make WebSocket service available globally
     app.websocket_service = websocket_service
     app.socketio = socketio
     
+    # Initialize background plan generation pipeline
+    from backend.services.plan_generation_service import plan_generation_service
+    plan_generation_service.init_app(app)
+    app.plan_generation_service = plan_generation_service
+    
     # Initialize email service
     from backend.services.email_service import email_service
     app.email_service = email_service
     
-    # Initialize and start batch processor
+    # Register batch jobs with the scheduler; jobs hold per-job leases in Mongo so
+    # each run happens once across all workers. SCHEDULER_MODE=worker leaves them
+    # to the dedicated backend.scheduler_worker process.
     from backend.services.batch_processor import batch_processor
-    if os.getenv('ENABLE_BATCH_PROCESSING', 'true').lower() == 'true':
+    from backend.services.scheduler_service import job_scheduler
+    job_scheduler.init_app(app)
+    batch_processor.register_jobs(job_scheduler)
+    app.batch_processor = batch_processor
+    app.job_scheduler = job_scheduler
+    if job_scheduler.mode == job_scheduler.MODE_EMBEDDED:
         try:
-            batch_processor.start_batch_processing(app)
-            app.batch_processor = batch_processor
-            print("✅ Batch processing started")
+            job_scheduler.start()
+            print("✅ Job scheduler started")
         except Exception as e:
-            print(f"⚠️ Failed to start batch processing: {e}")
+            print(f"⚠️ Failed to start job scheduler: {e}")
     
     # Initialize cache warming
     from backend.middleware.cache_middleware import warm_cache_on_startup
@@ -73,22 +90,12 @@ def create_app():
     @app.before_request
     def before_request():
         try:
-            if 'db_client' not in g:
-                mongo_uri = os.getenv("MONGO_URI")
-                if not mongo_uri:
-                    raise ValueError("MONGO_URI environment variable not set.")
-                g.db_client = MongoClient(mongo_uri)
-                g.db = g.db_client.get_default_database()
+            if 'db' not in g:
+                g.db = DatabaseService.get_database()
         except Exception as e:
             app.logger.critical(f"Could not connect to MongoDB: {e}")
             g.db = None 
 
-    @app.teardown_request
-    def teardown_request(exception):
-        db_client = g.pop('db_client', None)
-        if db_client is not None:
-            db_client.close()
-
     logging.basicConfig(level=logging.INFO)
     app.logger.setLevel(logging.INFO)
 
@@ -149,6 +156,22 @@ def create_app():
     def health_check():
         return jsonify({'status': 'healthy', 'message': 'YiZ Planner API is running'}), 200
 
+    @app.route('/health/database', methods=['GET'])
+    def database_health_check():
+        return jsonify({'status': 'healthy', 'pool': DatabaseService.get_pool_stats()}), 200
+
+    @app.route('/health/upstreams', methods=['GET'])
+    def upstreams_health_check():
+        return jsonify({'status': 'healthy', 'http': http_client_service.get_stats()}), 200
+
+    @app.route('/health/analytics', methods=['GET'])
+    def analytics_health_check():
+        return jsonify({'status': 'healthy', 'ingest': analytics_ingest_service.get_stats()}), 200
+
+    @app.route('/health/websocket', methods=['GET'])
+    def websocket_health_check():
+        return jsonify({'status': 'healthy', 'websocket': websocket_service.get_connection_stats()}), 200
+
    
     @app.route('/generate-plan', methods=['POST'])
     def generate_plan():
@@ -161,23 +184,27 @@ def create_app():
             if not skill:
                 return jsonify({"error": "skill_name is required"}), 400
 
-            import asyncio
-            plan_tasks = asyncio.run(AIService.generate_structured_plan(skill))
+            job = plan_generation_service.submit_preview_plan(skill)
+            job_id = str(job['_id'])
 
             return jsonify({
                 "skill": skill,
-                "plan": {"daily_tasks": plan_tasks}
-            }), 200
-
-        except ValueError as e:
-            return jsonify({"error": str(e)}), 400
-        except ConnectionError as e:
-            app.logger.error(f"AI Service connection error: {e}")
-            return jsonify({"error": "Could not connect to AI service"}), 503
+                "job_id": job_id,
+                "status": job['status'],
+                "status_url": f"/generate-plan/{job_id}"
+            }), 202
+
         except Exception as e:
             app.logger.error(f"Unexpected error in generate_plan: {str(e)}")
             return jsonify({"error": "Internal server error"}), 500
 
+    @app.route('/generate-plan/<job_id>', methods=['GET'])
+    def get_generated_plan(job_id):
+        job = plan_generation_service.get_job_status(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+
     return app, socketio
 
 
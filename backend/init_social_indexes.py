@@ -16,9 +16,17 @@ Make sure your MONGO_URI environment variable is set properly.
 
 import os
 import sys
+from datetime import datetime, timedelta
 from pymongo import MongoClient, TEXT, ASCENDING, DESCENDING
 from dotenv import load_dotenv
 
+# Allow `python backend/init_social_indexes.py` to import backend modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.repositories.comment_repository import CommentRepository
+from backend.repositories.feed_activity_repository import FeedActivityRepository
+from backend.services.cache_service import CacheService
+from backend.services.leaderboard_service import LeaderboardService
+
 # Load environment variables
 load_dotenv()
 
@@ -148,11 +156,26 @@ def create_social_indexes():
                                  name="user_comments_idx")
         print("  ✅ User comments index created")
         
-        # Parent comment index for threading
-        plan_comments.create_index([("parent_comment_id", ASCENDING)], 
-                                 name="comment_threading_idx")
+        # Parent comment index for threading (direct reply pages)
+        plan_comments.create_index([("parent_comment_id", ASCENDING), ("_id", ASCENDING)], 
+                                 name="comment_replies_idx")
         print("  ✅ Comment threading index created")
         
+        # Root comment pages per plan
+        plan_comments.create_index([("plan_id", ASCENDING), ("parent_comment_id", ASCENDING), ("_id", ASCENDING)], 
+                                 name="plan_root_comments_idx")
+        
+        # Whole threads and subtrees in one query
+        plan_comments.create_index([("root_id", ASCENDING), ("_id", ASCENDING)], 
+                                 name="comment_thread_root_idx")
+        plan_comments.create_index([("ancestors", ASCENDING), ("depth", ASCENDING)], 
+                                 name="comment_ancestors_idx")
+        print("  ✅ Comment thread path indexes created")
+        
+        # Comments created before thread paths existed
+        backfilled = CommentRepository(plan_comments).backfill_thread_paths()
+        print(f"  ✅ Thread paths backfilled for {backfilled} comments")
+        
         # Popular comments index
         plan_comments.create_index([("likes_count", DESCENDING), ("created_at", DESCENDING)], 
                                  name="popular_comments_idx")
@@ -321,23 +344,178 @@ def create_social_indexes():
     except Exception as e:
         print(f"  ❌ Error creating moderation_rules indexes: {e}")
     
+    # Create indexes for stats dashboard collections
+    print("\n📈 Creating indexes for stats dashboard collections...")
+    
+    try:
+        # Bulk window query over a user's habits
+        db.habit_checkins.create_index([("habit_id", ASCENDING), ("date", ASCENDING)], 
+                                       name="habit_date_idx")
+        print("  ✅ Habit checkin window index created")
+        
+        # Bulk window query over a user's skill completions
+        db.skill_completions.create_index([("user_id", ASCENDING), ("completed_at", ASCENDING)], 
+                                          name="user_completed_at_idx")
+        print("  ✅ Skill completion window index created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating stats dashboard indexes: {e}")
+    
+    # Create indexes for plan_generation_jobs collection
+    print("\n🧠 Creating indexes for plan_generation_jobs collection...")
+    
+    try:
+        # Finished and abandoned jobs expire after a day
+        db.plan_generation_jobs.create_index([("created_at", ASCENDING)], 
+                                             expireAfterSeconds=86400, name="job_cleanup_idx")
+        print("  ✅ Job cleanup TTL index created")
+        
+        # Stale job sweep finds unfinished jobs by last update
+        db.plan_generation_jobs.create_index([("status", ASCENDING), ("updated_at", ASCENDING)], 
+                                             name="job_stale_idx")
+        print("  ✅ Stale job index created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating plan_generation_jobs indexes: {e}")
+    
+    # Create indexes for feed_activities collection
+    print("\n📰 Creating indexes for feed_activities collection...")
+    
+    try:
+        # Pull path reads and timeline rebuilds (newest activities of a set of users)
+        db.feed_activities.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)], 
+                                        name="actor_timeline_idx")
+        print("  ✅ Actor timeline index created")
+        
+        # Undoing an activity (unlike)
+        db.feed_activities.create_index([("user_id", ASCENDING), ("activity_type", ASCENDING), ("skill_id", ASCENDING)], 
+                                        name="activity_undo_idx")
+        print("  ✅ Activity undo index created")
+        
+        # Activities older than the longest timeline are no longer read
+        db.feed_activities.create_index([("timestamp", ASCENDING)], 
+                                        expireAfterSeconds=90 * 86400, name="activity_cleanup_idx")
+        print("  ✅ Activity cleanup TTL index created")
+        
+        # Accounts delivered through the pull path
+        db.users.create_index([("feed_pull", ASCENDING)], sparse=True, name="feed_pull_idx")
+        print("  ✅ Pull-delivery accounts index created")
+        
+        # Shares, likes, downloads and follows made before activities were recorded,
+        # over the activity retention window
+        backfilled = FeedActivityRepository(db.feed_activities).backfill_from_sources(
+            datetime.utcnow() - timedelta(days=90)
+        )
+        print(f"  ✅ Feed activities backfilled: {backfilled}")
+        if backfilled:
+            # Timelines built before the backfill are rebuilt with it on their next read
+            dropped = CacheService.delete_pattern(f"{CacheService.FEED_PREFIX}timeline:*")
+            print(f"  ✅ {dropped} cached timelines dropped")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating feed_activities indexes: {e}")
+    
+    # Create indexes for skill_engagers collection
+    print("\n🔥 Creating indexes for skill_engagers collection...")
+    
+    try:
+        # One row per (skill, user) lets the engagement aggregator count first-time engagers
+        db.skill_engagers.create_index([("skill_id", ASCENDING), ("user_id", ASCENDING)], 
+                                       unique=True, name="skill_engager_unique_idx")
+        print("  ✅ Skill engager uniqueness index created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating skill_engagers indexes: {e}")
+    
+    # Create indexes for scheduler_runs collection
+    print("\n⏱️ Creating indexes for scheduler_runs collection...")
+    
+    try:
+        # Run history per job, newest first
+        db.scheduler_runs.create_index([("job", ASCENDING), ("started_at", DESCENDING)], 
+                                       name="job_runs_idx")
+        
+        # Run history is kept for 30 days
+        db.scheduler_runs.create_index([("started_at", ASCENDING)], 
+                                       expireAfterSeconds=30 * 24 * 3600, name="run_ttl_idx")
+        print("  ✅ Scheduler run history indexes created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating scheduler_runs indexes: {e}")
+    
+    # Create leaderboard indexes on the materialized user counters
+    print("\n🏆 Creating leaderboard indexes for users collection...")
+    
+    try:
+        for field in ("followers_count", "shared_skills_count", "overall_score"):
+            db.users.create_index([(field, DESCENDING)], name=f"leaderboard_{field}_idx")
+        print("  ✅ Leaderboard counter indexes created")
+        
+        # Incremental updates only adjust existing counters; recount them all
+        # once so users from before the counters existed are on the boards
+        updated = LeaderboardService.reconcile_counters(db)
+        print(f"  ✅ Social counters backfilled for {updated} users")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating leaderboard indexes: {e}")
+    
+    # Create indexes for follow_suggestions collection
+    print("\n🤝 Creating indexes for follow_suggestions collection...")
+    
+    try:
+        # Refresh job picks dirty entries, oldest change first
+        db.follow_suggestions.create_index([("dirty", ASCENDING), ("dirty_at", ASCENDING)], 
+                                           name="suggestion_refresh_idx")
+        print("  ✅ Follow suggestion refresh index created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating follow_suggestions indexes: {e}")
+    
+    # Create indexes for analytics_rollups collection
+    print("\n🧮 Creating indexes for analytics_rollups collection...")
+    
+    try:
+        # Window queries for dashboards, optionally by event type
+        db.analytics_rollups.create_index([("bucket", ASCENDING), ("event_type", ASCENDING)], 
+                                          name="rollup_window_idx")
+        # Rollups are no longer keyed by user; per-user queries read the raw events
+        if "rollup_user_idx" in db.analytics_rollups.index_information():
+            db.analytics_rollups.drop_index("rollup_user_idx")
+        # Compaction finds the oldest hourly buckets
+        db.analytics_rollups.create_index([("granularity", ASCENDING), ("bucket", ASCENDING)], 
+                                          name="rollup_compaction_idx")
+        print("  ✅ Analytics rollup indexes created")
+        
+    except Exception as e:
+        print(f"  ❌ Error creating analytics_rollups indexes: {e}")
+    
     print("\n🎉 Social features indexes creation completed!")
     print("\n📋 Summary of created collections and indexes:")
     print("  📚 shared_skills: 6 indexes (text search, category, difficulty, trending, visibility, user)")
     print("  📝 custom_tasks: 4 indexes (skill-day, user, popularity, uniqueness)")
     print("  👍 plan_interactions: 4 indexes (uniqueness, plan, user, trending)")
-    print("  💬 plan_comments: 4 indexes (plan-chrono, user, threading, popularity)")
+    print("  💬 plan_comments: 7 indexes (plan-chrono, user, replies, root pages, thread root, ancestors, popularity)")
     print("  🔔 notifications: 4 indexes (user, deduplication, cleanup, batch processing)")
     print("  👥 user_relationships: 4 indexes (uniqueness, followers, following, recent)")
     print("  📊 analytics_events: 6 indexes (user activity, event type, skill analytics, user interactions, trending, session)")
     print("  🛡️ moderation_reports: 6 indexes (queue, content, reporter, reported user, moderator, auto-moderation)")
     print("  ⚙️ moderation_rules: 2 indexes (active rules, performance)")
+    print("  📈 habit_checkins / skill_completions: 1 index each (stats window queries)")
+    print("  🧠 plan_generation_jobs: 2 indexes (TTL cleanup, stale sweep)")
+    print("  📰 feed_activities: 3 indexes (actor timeline, undo, TTL cleanup) + users.feed_pull")
+    print("  🔥 skill_engagers: 1 index (uniqueness)")
+    print("  ⏱️ scheduler_runs: 2 indexes (job history, TTL cleanup)")
+    print("  🏆 users: 3 leaderboard indexes (followers, skills shared, overall)")
+    print("  🤝 follow_suggestions: 1 index (dirty refresh queue)")
+    print("  🧮 analytics_rollups: 2 indexes (window, compaction)")
     
     # Verify indexes were created
     print("\n🔍 Verifying indexes...")
     collections_to_check = ['shared_skills', 'custom_tasks', 'plan_interactions', 'plan_comments', 
                           'notifications', 'user_relationships', 'analytics_events', 
-                          'moderation_reports', 'moderation_rules']
+                          'moderation_reports', 'moderation_rules', 'habit_checkins', 'skill_completions',
+                          'plan_generation_jobs', 'feed_activities', 'skill_engagers', 'scheduler_runs', 'users',
+                          'follow_suggestions', 'analytics_rollups']
     
     for collection_name in collections_to_check:
         collection = db[collection_name]
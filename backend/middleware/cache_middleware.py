@@ -23,28 +23,20 @@ def cache_response(ttl: int = None, key_prefix: str = None,
                 return f(*args, **kwargs)
             
             # Generate cache key
+            user_id = getattr(g, 'current_user', {}).get('_id', 'anonymous')
             cache_key = _generate_cache_key(
                 request.endpoint, 
                 request.args.to_dict(),
                 key_prefix,
-                getattr(g, 'current_user', {}).get('_id', 'anonymous')
+                user_id
             )
             
-            # Try to get from cache
-            cached_response = CacheService.get(cache_key)
-            if cached_response is not None:
-                return jsonify(cached_response)
+            # Tag the entry with the user and any skill in the URL
+            tags = [CacheService.skill_tag(kwargs[name]) for name in ('skill_id', 'plan_id') if name in kwargs]
+            if user_id != 'anonymous':
+                tags.append(CacheService.user_tag(user_id))
             
-            # Execute the function
-            response = f(*args, **kwargs)
-            
-            # Cache successful responses
-            if hasattr(response, 'status_code') and response.status_code == 200:
-                response_data = response.get_json()
-                if response_data:
-                    CacheService.set(cache_key, response_data, ttl or CacheService.DEFAULT_TTL)
-            
-            return response
+            return _cached_view_response(cache_key, ttl or CacheService.DEFAULT_TTL, f, args, kwargs, tags)
         
         return wrapper
     return decorator
@@ -62,21 +54,8 @@ def cache_user_specific(ttl: int = None, cache_key_suffix: str = ""):
             user_id = str(g.current_user['_id'])
             cache_key = f"{CacheService.USER_PREFIX}{user_id}:{f.__name__}:{cache_key_suffix}"
             
-            # Try cache first
-            cached_data = CacheService.get(cache_key)
-            if cached_data is not None:
-                return jsonify(cached_data)
-            
-            # Execute function
-            response = f(*args, **kwargs)
-            
-            # Cache successful responses
-            if hasattr(response, 'status_code') and response.status_code == 200:
-                response_data = response.get_json()
-                if response_data:
-                    CacheService.set(cache_key, response_data, ttl or CacheService.MEDIUM_TTL)
-            
-            return response
+            return _cached_view_response(cache_key, ttl or CacheService.MEDIUM_TTL, f, args, kwargs,
+                                         [CacheService.user_tag(user_id)])
         
         return wrapper
     return decorator
@@ -199,6 +178,30 @@ def warm_cache_on_startup():
     except Exception as e:
         print(f"❌ Cache warming failed: {e}")
 
+def _cached_view_response(cache_key: str, ttl: int, f: Callable, args: tuple, kwargs: dict,
+                          tags: Optional[list] = None):
+    """
+    Serve a view through CacheService.get_or_set so concurrent misses share one
+    execution and expired entries are served stale while one request refreshes
+    """
+    executed = {}
+    
+    def render():
+        response = f(*args, **kwargs)
+        executed['response'] = response
+        
+        # Only successful responses are cached
+        if hasattr(response, 'status_code') and response.status_code == 200:
+            return response.get_json() or None
+        return None
+    
+    response_data = CacheService.get_or_set(cache_key, render, ttl, tags=tags)
+    
+    if 'response' in executed:
+        return executed['response']
+    
+    return jsonify(response_data)
+
 def _generate_cache_key(endpoint: str, params: dict, prefix: str = None, user_id: str = None) -> str:
     """
     Generate a cache key based on endpoint and parameters
@@ -227,40 +230,25 @@ class CacheManager:
     """
     
     @staticmethod
-    def invalidate_user_related_cache(user_id: str):
+    def invalidate_user_related_cache(user_id: str) -> int:
         """
-        Invalidate all cache related to a specific user
+        Invalidate all cache related to a specific user (every entry tagged with the user)
         """
-        patterns = [
-            f"{CacheService.USER_PREFIX}*{user_id}*",
-            f"{CacheService.FEED_PREFIX}*{user_id}*",
-            f"{CacheService.NOTIFICATION_PREFIX}user:{user_id}",
-            f"{CacheService.ANALYTICS_PREFIX}user:{user_id}*"
-        ]
-        
-        for pattern in patterns:
-            CacheService.delete_pattern(pattern)
+        return CacheService.invalidate_tags([CacheService.user_tag(user_id)])
     
     @staticmethod
-    def invalidate_skill_related_cache(skill_id: str):
+    def invalidate_skill_related_cache(skill_id: str) -> int:
         """
-        Invalidate all cache related to a specific skill
+        Invalidate all cache related to a specific skill, and trending lists that may include it
         """
-        patterns = [
-            f"{CacheService.SKILL_PREFIX}*{skill_id}*",
-            f"{CacheService.ANALYTICS_PREFIX}skill:{skill_id}*",
-            f"{CacheService.TRENDING_PREFIX}*"
-        ]
-        
-        for pattern in patterns:
-            CacheService.delete_pattern(pattern)
+        return CacheService.invalidate_tags([CacheService.skill_tag(skill_id), CacheService.TRENDING_TAG])
     
     @staticmethod
-    def invalidate_trending_cache():
+    def invalidate_trending_cache() -> int:
         """
         Invalidate all trending-related cache
         """
-        CacheService.delete_pattern(f"{CacheService.TRENDING_PREFIX}*")
+        return CacheService.invalidate_tags([CacheService.TRENDING_TAG])
     
     @staticmethod
     def bulk_cache_users(user_ids: list, fetch_function: Callable):
@@ -284,11 +272,13 @@ class CacheManager:
             
             # Cache the fresh data
             cache_pairs = {}
+            cache_tags = {}
             for user_id, user_data in fresh_data.items():
                 cache_key = f"{CacheService.USER_PREFIX}profile:{user_id}"
                 cache_pairs[cache_key] = user_data
+                cache_tags[cache_key] = [CacheService.user_tag(user_id)]
             
-            CacheService.mset(cache_pairs, CacheService.MEDIUM_TTL)
+            CacheService.mset(cache_pairs, CacheService.MEDIUM_TTL, cache_tags)
     
     @staticmethod
     def preload_user_feed_cache(user_id: str, feed_data: list):
@@ -1,13 +1,28 @@
 from bson import ObjectId
+from collections import defaultdict
 from pymongo.results import InsertOneResult, UpdateResult
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
+from backend.repositories.analytics_rollup_repository import AnalyticsRollupRepository
 
 class AnalyticsRepository:
     """Repository for managing user engagement analytics and metrics"""
 
+    # Checkpoint of the rollup job (AnalyticsRollupAggregator)
+    ROLLUP_CHECKPOINT = "analytics_rollup"
+
+    # Event types counted as engagement with each kind of trending item
+    TRENDING_EVENTS = {
+        "skill": ["skill_view", "skill_like", "skill_download", "skill_comment", "skill_share"],
+        "user": ["user_follow", "profile_view"],
+        "task": ["custom_task_add", "task_vote"]
+    }
+    # Event fields naming the item an event is about; the first one set wins
+    ENTITY_FIELDS = ("skill_id", "target_user_id", "task_id")
+
     def __init__(self, db_collection):
         self.collection = db_collection
+        self.rollups = db_collection.database.analytics_rollups
 
     def record_event(self, event_data: Dict) -> Dict:
         """Record an analytics event"""
@@ -16,15 +31,79 @@ class AnalyticsRepository:
         result: InsertOneResult = self.collection.insert_one(event_data)
         return self.collection.find_one({"_id": result.inserted_id})
 
+    def record_events(self, events: List[Dict]) -> int:
+        """Insert a batch of events (timestamped by the caller) without ordering; returns the number inserted"""
+        if not events:
+            return 0
+
+        result = self.collection.insert_many(events, ordered=False)
+        return len(result.inserted_ids)
+
+    def find_existing_ids(self, event_ids: List[ObjectId]) -> Set[ObjectId]:
+        """The subset of event_ids already stored"""
+        return {doc["_id"] for doc in self.collection.find({"_id": {"$in": event_ids}}, {"_id": 1})}
+
+    def _window_rows(self, cutoff_date: datetime, match: Dict = None) -> List[Dict]:
+        """Pipeline stages yielding one row per event count in the window.
+
+        Rows come from the rollups for events up to the rollup job's applied
+        position and from the raw events after it, in the rollup shape
+        (bucket, event_type, entity_id, count, first_at, last_at). The window
+        start is rounded down to the bucket: hourly rollups and raw events
+        from the start of the cutoff's hour, daily rollups (hours older than
+        the hourly retention) from the start of its day, so a window that
+        reaches compacted days includes up to a day before the cutoff.
+        ``match`` may filter on event_type. Rollups do not record users;
+        distinct users come from get_distinct_users and get_item_users. Run
+        the result on ``self.rollups``.
+        """
+        window_start = cutoff_date.replace(minute=0, second=0, microsecond=0)
+        day_start = window_start.replace(hour=0)
+        match = match or {}
+
+        checkpoint = self.collection.database.batch_checkpoints.find_one(
+            {"_id": self.ROLLUP_CHECKPOINT}, {"applied_event_id": 1}
+        )
+        tail_match = {"timestamp": {"$gte": window_start}, **match}
+        if checkpoint and checkpoint.get("applied_event_id"):
+            tail_match["_id"] = {"$gt": checkpoint["applied_event_id"]}
+
+        return [
+            {"$match": {
+                "bucket": {"$gte": day_start},
+                "$or": [{"granularity": AnalyticsRollupRepository.DAY}, {"bucket": {"$gte": window_start}}],
+                **match
+            }},
+            {"$project": {"_id": 0, "bucket": 1, "event_type": 1, "entity_id": 1,
+                          "count": 1, "first_at": 1, "last_at": 1}},
+            {"$unionWith": {"coll": self.collection.name, "pipeline": [
+                {"$match": tail_match},
+                {"$project": {
+                    "_id": 0,
+                    "bucket": "$timestamp",
+                    "event_type": 1,
+                    "entity_id": self._entity_id_expr(),
+                    "count": {"$literal": 1},
+                    "first_at": "$timestamp",
+                    "last_at": "$timestamp"
+                }}
+            ]}}
+        ]
+
+    @classmethod
+    def _entity_id_expr(cls) -> Dict:
+        """Expression for an event's item: the first of ENTITY_FIELDS that is set"""
+        expression = f"${cls.ENTITY_FIELDS[-1]}"
+        for field in reversed(cls.ENTITY_FIELDS[:-1]):
+            expression = {"$ifNull": [f"${field}", expression]}
+        return expression
+
     def get_user_engagement_metrics(self, user_id: str, days: int = 30) -> Dict:
-        """Get engagement metrics for a specific user"""
+        """Get engagement metrics for a specific user (one user's raw events, by user_activity_idx)"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
         pipeline = [
-            {"$match": {
-                "user_id": ObjectId(user_id),
-                "timestamp": {"$gte": cutoff_date}
-            }},
+            {"$match": {"user_id": ObjectId(user_id), "timestamp": {"$gte": cutoff_date}}},
             {"$group": {
                 "_id": "$event_type",
                 "count": {"$sum": 1},
@@ -121,64 +200,104 @@ class AnalyticsRepository:
         return metrics
 
     def get_trending_content(self, content_type: str = "skill", days: int = 7, limit: int = 20) -> List[Dict]:
-        """Get trending content based on engagement metrics"""
+        """Get trending content based on engagement metrics.
+
+        Interaction totals come from the rollups; distinct users are counted
+        from the raw events of the candidate items only.
+        """
+        items = self.get_trending_candidates(content_type, days, limit)
+        users = self.get_item_users(content_type, [item["_id"] for item in items], days)
+        return self.rank_trending(content_type, items, users, limit)
+
+    def get_trending_candidates(self, content_type: str = "skill", days: int = 7, limit: int = 20,
+                                max_candidates: int = 5000) -> List[Dict]:
+        """Items that can still reach the top ``limit`` once distinct users are added, most interactions first.
+
+        score = interactions + 2 * users with users <= interactions, so an item
+        needs 3x its interactions to beat the limit-th item's minimum score;
+        reading stops at the first item that cannot.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
+        event_types = self.TRENDING_EVENTS.get(content_type, ["skill_view"])
         
-        # Define event types for trending calculation
-        trending_events = {
-            "skill": ["skill_view", "skill_like", "skill_download", "skill_comment", "skill_share"],
-            "user": ["user_follow", "profile_view"],
-            "task": ["custom_task_add", "task_vote"]
-        }
+        pipeline = self._window_rows(cutoff_date, {"event_type": {"$in": event_types}}) + [
+            {"$match": {"entity_id": {"$ne": None}}},
+            {"$group": {
+                "_id": "$entity_id",
+                "total_interactions": {"$sum": "$count"},
+                "latest_activity": {"$max": "$last_at"}
+            }},
+            {"$sort": {"total_interactions": -1, "latest_activity": -1}},
+            {"$limit": max_candidates}
+        ]
         
-        event_types = trending_events.get(content_type, ["skill_view"])
+        items = []
+        floor = None
+        for item in self.rollups.aggregate(pipeline, allowDiskUse=True):
+            if floor is not None and item["total_interactions"] * 3 < floor:
+                break
+            items.append(item)
+            if len(items) == limit:
+                floor = item["total_interactions"]
+        return items
+
+    def get_item_users(self, content_type: str, item_ids: List, days: int = 7) -> Dict[str, int]:
+        """Distinct users per item (keyed by str id) from the raw trending events of those items"""
+        if not item_ids:
+            return {}
         
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
         pipeline = [
             {"$match": {
-                "event_type": {"$in": event_types},
-                "timestamp": {"$gte": cutoff_date}
-            }},
-            {"$group": {
-                "_id": f"${content_type}_id",
-                "total_interactions": {"$sum": 1},
-                "unique_users": {"$addToSet": "$user_id"},
-                "latest_activity": {"$max": "$timestamp"}
+                "event_type": {"$in": self.TRENDING_EVENTS.get(content_type, ["skill_view"])},
+                "timestamp": {"$gte": cutoff_date.replace(minute=0, second=0, microsecond=0)},
+                "user_id": {"$ne": None},
+                "$or": [{field: {"$in": item_ids}} for field in self.ENTITY_FIELDS]
             }},
-            {"$addFields": {
-                "unique_user_count": {"$size": "$unique_users"},
-                "trending_score": {
-                    "$add": [
-                        "$total_interactions",
-                        {"$multiply": ["$unique_user_count", 2]}  # Weight unique users more
-                    ]
-                }
-            }},
-            {"$sort": {"trending_score": -1, "latest_activity": -1}},
-            {"$limit": limit},
-            {"$project": {
-                f"{content_type}_id": "$_id",
-                "total_interactions": 1,
-                "unique_user_count": 1,
-                "trending_score": 1,
-                "latest_activity": 1
-            }}
+            {"$group": {"_id": {"entity_id": self._entity_id_expr(), "user_id": "$user_id"}}},
+            {"$match": {"_id.entity_id": {"$in": item_ids}}},
+            {"$group": {"_id": "$_id.entity_id", "users": {"$sum": 1}}}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        users = {str(item_id): 0 for item_id in item_ids}
+        for row in self.collection.aggregate(pipeline, allowDiskUse=True):
+            users[str(row["_id"])] = row["users"]
+        return users
 
-    def get_platform_overview_metrics(self, days: int = 30) -> Dict:
-        """Get overall platform engagement metrics"""
+    @staticmethod
+    def rank_trending(content_type: str, items: List[Dict], users: Dict[str, int], limit: int) -> List[Dict]:
+        """Score candidates by interactions plus twice their distinct users (keyed by str id)"""
+        ranked = []
+        for item in items:
+            unique_user_count = users.get(str(item["_id"]), 0)
+            ranked.append({
+                "_id": item["_id"],
+                f"{content_type}_id": item["_id"],
+                "total_interactions": item["total_interactions"],
+                "unique_user_count": unique_user_count,
+                "trending_score": item["total_interactions"] + unique_user_count * 2,  # Weight unique users more
+                "latest_activity": item["latest_activity"]
+            })
+        
+        ranked.sort(key=lambda item: (item["trending_score"], item["latest_activity"]), reverse=True)
+        return ranked[:limit]
+
+    def get_platform_overview_metrics(self, days: int = 30, count_users: bool = True) -> Dict:
+        """Get overall platform engagement metrics.
+
+        Event counts come from the rollups. Distinct user counts come from
+        get_distinct_users; with count_users=False they are left as None for
+        the caller to fill in with with_overview_users.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_date}}},
+        pipeline = self._window_rows(cutoff_date) + [
             {"$group": {
                 "_id": {
                     "event_type": "$event_type",
-                    "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                    "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$bucket"}}
                 },
-                "count": {"$sum": 1},
-                "unique_users": {"$addToSet": "$user_id"}
+                "count": {"$sum": "$count"}
             }},
             {"$group": {
                 "_id": "$_id.event_type",
@@ -187,197 +306,283 @@ class AnalyticsRepository:
                     "$push": {
                         "date": "$_id.date",
                         "count": "$count",
-                        "unique_users": {"$size": "$unique_users"}
+                        "unique_users": None
                     }
                 }
             }},
             {"$sort": {"total_events": -1}}
         ]
         
-        results = list(self.collection.aggregate(pipeline))
+        results = list(self.rollups.aggregate(pipeline, allowDiskUse=True))
         
         # Calculate additional metrics
         total_events = sum(result["total_events"] for result in results)
         
-        # Get unique active users
-        unique_users_pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_date}}},
-            {"$group": {"_id": None, "unique_users": {"$addToSet": "$user_id"}}},
-            {"$project": {"unique_user_count": {"$size": "$unique_users"}}}
-        ]
-        
-        unique_users_result = list(self.collection.aggregate(unique_users_pipeline))
-        unique_users_count = unique_users_result[0]["unique_user_count"] if unique_users_result else 0
-        
-        return {
+        overview = {
             "period_days": days,
             "total_events": total_events,
-            "unique_active_users": unique_users_count,
+            "unique_active_users": None,
             "events_by_type": results,
-            "average_events_per_user": total_events / unique_users_count if unique_users_count > 0 else 0
+            "average_events_per_user": 0
+        }
+        if count_users:
+            self.with_overview_users(overview, self.get_distinct_users(days))
+        return overview
+
+    @staticmethod
+    def with_overview_users(overview: Dict, distinct_users: Dict) -> Dict:
+        """Set the overview's active users and daily distinct users per event type (see get_distinct_users)"""
+        active_users = distinct_users["active_users"]
+        overview["unique_active_users"] = active_users
+        overview["average_events_per_user"] = overview["total_events"] / active_users if active_users else 0
+        for result in overview["events_by_type"]:
+            for day in result["daily_breakdown"]:
+                day["unique_users"] = distinct_users["daily_by_event_type"].get((result["_id"], day["date"]), 0)
+        return overview
+
+    def get_distinct_users(self, days: int = 30) -> Dict:
+        """Exact distinct users in the window from the raw events, in one pass.
+
+        Returns ``active_users``, ``by_event_type`` ({event_type: users}) and
+        ``daily_by_event_type`` ({(event_type, YYYY-MM-DD): users}), the same
+        shape DistinctUserCounter estimates. Anonymous events are not counted.
+        """
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": cutoff_date}, "user_id": {"$ne": None}}},
+            # One row per (user, event type, day) before fanning out
+            {"$group": {"_id": {
+                "user_id": "$user_id",
+                "event_type": "$event_type",
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+            }}},
+            {"$facet": {
+                "active": [
+                    {"$group": {"_id": "$_id.user_id"}},
+                    {"$count": "users"}
+                ],
+                "by_event_type": [
+                    {"$group": {"_id": {"event_type": "$_id.event_type", "user_id": "$_id.user_id"}}},
+                    {"$group": {"_id": "$_id.event_type", "users": {"$sum": 1}}}
+                ],
+                "daily": [
+                    {"$group": {"_id": {"event_type": "$_id.event_type", "date": "$_id.date"}, "users": {"$sum": 1}}}
+                ]
+            }}
+        ]
+        
+        result = next(self.collection.aggregate(pipeline, allowDiskUse=True))
+        return {
+            "active_users": result["active"][0]["users"] if result["active"] else 0,
+            "by_event_type": {row["_id"]: row["users"] for row in result["by_event_type"]},
+            "daily_by_event_type": {
+                (row["_id"]["event_type"], row["_id"]["date"]): row["users"] for row in result["daily"]
+            }
         }
 
     def get_user_retention_metrics(self, cohort_start_date: datetime, days_to_track: int = 30) -> Dict:
         """Calculate user retention metrics for a cohort"""
-        cohort_end_date = cohort_start_date + timedelta(days=1)
-        
-        # Get users who joined in the cohort period
-        user_collection = self.collection.database.users
-        cohort_users = list(user_collection.find({
+        return self.get_retention_cohorts([cohort_start_date], days_to_track)[0]
+
+    def get_retention_cohorts(self, cohort_dates: List[datetime], days_to_track: int = 30) -> List[Dict]:
+        """Day-N retention for several daily cohorts in one pass, in the order given.
+
+        A cohort is the users created on one UTC day; a user is retained on
+        day N if they had any event on the Nth UTC day after it (distinct
+        users, not events). Activity comes from one aggregation of the
+        cohort users' raw events into (user, day) pairs over all cohorts.
+        """
+        cohort_days = sorted({date.replace(hour=0, minute=0, second=0, microsecond=0) for date in cohort_dates})
+        
+        # Get users who joined in the cohort periods
+        cohort_users = self.collection.database.users.find({
             "created_at": {
-                "$gte": cohort_start_date,
-                "$lt": cohort_end_date
+                "$gte": cohort_days[0],
+                "$lt": cohort_days[-1] + timedelta(days=1)
             }
-        }, {"_id": 1}))
-        
-        cohort_user_ids = [user["_id"] for user in cohort_users]
-        cohort_size = len(cohort_user_ids)
-        
-        if cohort_size == 0:
-            return {"cohort_size": 0, "retention_data": []}
-        
-        # Track retention over time
-        retention_data = []
-        
-        for day in range(days_to_track + 1):
-            check_date = cohort_start_date + timedelta(days=day)
-            next_day = check_date + timedelta(days=1)
-            
-            # Count active users on this day
-            active_users = self.collection.count_documents({
-                "user_id": {"$in": cohort_user_ids},
-                "timestamp": {
-                    "$gte": check_date,
-                    "$lt": next_day
-                }
-            })
+        }, {"created_at": 1})
+        
+        user_cohorts = {}
+        for user in cohort_users:
+            cohort_day = user["created_at"].replace(hour=0, minute=0, second=0, microsecond=0)
+            if cohort_day in cohort_days:
+                user_cohorts[user["_id"]] = cohort_day
+        
+        cohort_sizes = defaultdict(int)
+        for cohort_day in user_cohorts.values():
+            cohort_sizes[cohort_day] += 1
+        active_users = {cohort_day: [0] * (days_to_track + 1) for cohort_day in cohort_days}
+        
+        if user_cohorts:
+            tracking_end = cohort_days[-1] + timedelta(days=days_to_track + 1)
+            pipeline = [
+                {"$match": {
+                    "user_id": {"$in": list(user_cohorts)},
+                    "timestamp": {"$gte": cohort_days[0], "$lt": tracking_end}
+                }},
+                {"$group": {"_id": {
+                    "user_id": "$user_id",
+                    "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                }}}
+            ]
             
-            retention_rate = (active_users / cohort_size) * 100
+            for activity in self.collection.aggregate(pipeline, allowDiskUse=True):
+                cohort_day = user_cohorts[activity["_id"]["user_id"]]
+                day = (datetime.strptime(activity["_id"]["date"], "%Y-%m-%d") - cohort_day).days
+                if 0 <= day <= days_to_track:
+                    active_users[cohort_day][day] += 1
+        
+        cohorts = {}
+        for cohort_day in cohort_days:
+            cohort_size = cohort_sizes[cohort_day]
+            if cohort_size == 0:
+                cohorts[cohort_day] = {"cohort_size": 0, "retention_data": []}
+                continue
             
-            retention_data.append({
-                "day": day,
-                "date": check_date.strftime("%Y-%m-%d"),
-                "active_users": active_users,
-                "retention_rate": retention_rate
-            })
+            cohorts[cohort_day] = {
+                "cohort_start_date": cohort_day.strftime("%Y-%m-%d"),
+                "cohort_size": cohort_size,
+                "retention_data": [{
+                    "day": day,
+                    "date": (cohort_day + timedelta(days=day)).strftime("%Y-%m-%d"),
+                    "active_users": active,
+                    "retention_rate": (active / cohort_size) * 100
+                } for day, active in enumerate(active_users[cohort_day])]
+            }
         
-        return {
-            "cohort_start_date": cohort_start_date.strftime("%Y-%m-%d"),
-            "cohort_size": cohort_size,
-            "retention_data": retention_data
-        }
+        return [cohorts[date.replace(hour=0, minute=0, second=0, microsecond=0)] for date in cohort_dates]
 
-    def get_feature_usage_analytics(self, days: int = 30) -> Dict:
-        """Get analytics on feature usage across the platform"""
+    def get_feature_usage_analytics(self, days: int = 30, count_users: bool = True) -> Dict:
+        """Get analytics on feature usage across the platform.
+
+        Uses come from the rollups and distinct users from get_distinct_users;
+        with count_users=False the user-based fields are left as None for the
+        caller to fill in with with_feature_users.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_date}}},
+        pipeline = self._window_rows(cutoff_date) + [
             {"$group": {
                 "_id": "$event_type",
-                "total_uses": {"$sum": 1},
-                "unique_users": {"$addToSet": "$user_id"},
-                "first_use": {"$min": "$timestamp"},
-                "last_use": {"$max": "$timestamp"}
-            }},
-            {"$addFields": {
-                "unique_user_count": {"$size": "$unique_users"}
+                "total_uses": {"$sum": "$count"},
+                "first_use": {"$min": "$first_at"},
+                "last_use": {"$max": "$last_at"}
             }},
             {"$sort": {"total_uses": -1}}
         ]
+        results = list(self.rollups.aggregate(pipeline, allowDiskUse=True))
         
-        results = list(self.collection.aggregate(pipeline))
-        
-        # Calculate adoption rates and engagement
         feature_analytics = []
-        total_platform_users = self._get_active_users_count(days)
-        
         for result in results:
-            adoption_rate = (result["unique_user_count"] / total_platform_users) * 100 if total_platform_users > 0 else 0
-            avg_uses_per_user = result["total_uses"] / result["unique_user_count"]
-            
-            feature_analytics.append({
+            feature_analytics.append(self.with_adoption({
                 "feature": result["_id"],
                 "total_uses": result["total_uses"],
-                "unique_users": result["unique_user_count"],
-                "adoption_rate": adoption_rate,
-                "average_uses_per_user": avg_uses_per_user,
                 "first_use": result["first_use"].isoformat(),
                 "last_use": result["last_use"].isoformat()
-            })
+            }, None, None))
         
-        return {
+        feature_usage = {
             "period_days": days,
-            "total_active_users": total_platform_users,
+            "total_active_users": None,
             "feature_analytics": feature_analytics
         }
+        if count_users:
+            self.with_feature_users(feature_usage, self.get_distinct_users(days))
+        return feature_usage
 
-    def _get_active_users_count(self, days: int) -> int:
-        """Get count of active users in the specified period"""
+    @classmethod
+    def with_feature_users(cls, feature_usage: Dict, distinct_users: Dict) -> Dict:
+        """Set active users and each feature's adoption (see get_distinct_users)"""
+        active_users = distinct_users["active_users"]
+        feature_usage["total_active_users"] = active_users
+        for feature in feature_usage["feature_analytics"]:
+            cls.with_adoption(feature, distinct_users["by_event_type"].get(feature["feature"], 0), active_users)
+        return feature_usage
+
+    @staticmethod
+    def with_adoption(feature: Dict, unique_users: Optional[int], total_users: Optional[int]) -> Dict:
+        """Set a feature's distinct users and the rates derived from them (None if not counted)"""
+        feature["unique_users"] = unique_users
+        feature["adoption_rate"] = None
+        feature["average_uses_per_user"] = None
+        if unique_users is not None:
+            feature["adoption_rate"] = (unique_users / total_users) * 100 if total_users else 0
+            feature["average_uses_per_user"] = feature["total_uses"] / unique_users if unique_users else 0
+        return feature
+
+    def get_conversion_funnel(self, funnel_events: List[str], days: int = 30,
+                              step_window_hours: Optional[float] = None) -> Dict:
+        """Ordered conversion funnel in one aggregation.
+
+        A user reaches step k if they performed funnel_events[0..k] in that
+        order within the period, each step at most step_window_hours after the
+        previous one (unlimited if None). Each user's events are folded in
+        time order keeping, per step, the latest time it was reached, which
+        is the best starting point for the next step's window.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
+        steps = len(funnel_events)
+        
+        def reached(index):
+            return {"$arrayElemAt": ["$$value", index]}
+        
+        previous_step_cond = {"$ne": [reached({"$subtract": ["$$k", 1]}), None]}
+        if step_window_hours is not None:
+            previous_step_cond = {"$and": [
+                previous_step_cond,
+                {"$lte": [
+                    {"$subtract": ["$$this.t", reached({"$subtract": ["$$k", 1]})]},
+                    int(step_window_hours * 3600 * 1000)
+                ]}
+            ]}
         
         pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_date}}},
-            {"$group": {"_id": None, "unique_users": {"$addToSet": "$user_id"}}},
-            {"$project": {"count": {"$size": "$unique_users"}}}
+            {"$match": {
+                "event_type": {"$in": funnel_events},
+                "timestamp": {"$gte": cutoff_date},
+                "user_id": {"$ne": None}
+            }},
+            {"$sort": {"user_id": 1, "timestamp": 1}},
+            {"$group": {
+                "_id": "$user_id",
+                "events": {"$push": {"e": "$event_type", "t": "$timestamp"}}
+            }},
+            # Latest time each step was reached; every step is updated from the
+            # state before this event, so one event never completes two steps
+            {"$project": {"reached": {"$reduce": {
+                "input": "$events",
+                "initialValue": [None] * steps,
+                "in": {"$map": {
+                    "input": {"$range": [0, steps]},
+                    "as": "k",
+                    "in": {"$cond": [
+                        {"$and": [
+                            {"$eq": ["$$this.e", {"$arrayElemAt": [{"$literal": funnel_events}, "$$k"]}]},
+                            {"$or": [{"$eq": ["$$k", 0]}, previous_step_cond]}
+                        ]},
+                        "$$this.t",
+                        reached("$$k")
+                    ]}
+                }}
+            }}}},
+            {"$group": {
+                "_id": {"$size": {"$filter": {"input": "$reached", "cond": {"$ne": ["$$this", None]}}}},
+                "users": {"$sum": 1}
+            }}
         ]
         
-        result = list(self.collection.aggregate(pipeline))
-        return result[0]["count"] if result else 0
-
-    def get_conversion_funnel(self, funnel_events: List[str], days: int = 30) -> Dict:
-        """Analyze conversion funnel for a sequence of events"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        users_by_depth = {result["_id"]: result["users"] for result in self.collection.aggregate(pipeline, allowDiskUse=True)}
         
         funnel_data = []
-        
+        previous_count = None
         for i, event_type in enumerate(funnel_events):
-            if i == 0:
-                # First step - count all users who performed this event
-                users_pipeline = [
-                    {"$match": {
-                        "event_type": event_type,
-                        "timestamp": {"$gte": cutoff_date}
-                    }},
-                    {"$group": {"_id": None, "users": {"$addToSet": "$user_id"}}},
-                    {"$project": {"count": {"$size": "$users"}}}
-                ]
-                
-                result = list(self.collection.aggregate(users_pipeline))
-                user_count = result[0]["count"] if result else 0
+            user_count = sum(users for depth, users in users_by_depth.items() if depth > i)
+            if previous_count is None:
                 conversion_rate = 100.0
-                
             else:
-                # Subsequent steps - count users who performed both previous and current event
-                previous_users_pipeline = [
-                    {"$match": {
-                        "event_type": {"$in": funnel_events[:i]},
-                        "timestamp": {"$gte": cutoff_date}
-                    }},
-                    {"$group": {"_id": None, "users": {"$addToSet": "$user_id"}}}
-                ]
-                
-                current_users_pipeline = [
-                    {"$match": {
-                        "event_type": event_type,
-                        "timestamp": {"$gte": cutoff_date}
-                    }},
-                    {"$group": {"_id": None, "users": {"$addToSet": "$user_id"}}}
-                ]
-                
-                prev_result = list(self.collection.aggregate(previous_users_pipeline))
-                curr_result = list(self.collection.aggregate(current_users_pipeline))
-                
-                if prev_result and curr_result:
-                    prev_users = set(str(uid) for uid in prev_result[0]["users"])
-                    curr_users = set(str(uid) for uid in curr_result[0]["users"])
-                    
-                    converted_users = prev_users.intersection(curr_users)
-                    user_count = len(converted_users)
-                    conversion_rate = (user_count / len(prev_users)) * 100 if prev_users else 0
-                else:
-                    user_count = 0
-                    conversion_rate = 0
+                conversion_rate = (user_count / previous_count) * 100 if previous_count else 0
+            previous_count = user_count
             
             funnel_data.append({
                 "step": i + 1,
@@ -390,5 +595,6 @@ class AnalyticsRepository:
         return {
             "funnel_events": funnel_events,
             "period_days": days,
+            "step_window_hours": step_window_hours,
             "funnel_data": funnel_data
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,142 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+class AnalyticsRollupRepository:
+    """Repository for pre-aggregated analytics event counts.
+
+    One document per (granularity, bucket, event_type, entity_id) holding
+    the event count and the first/last event time. ``entity_id`` is the
+    event's skill, target user or task. Users are not part of the key, which
+    keeps the document count independent of how many users touch an item;
+    distinct users come from the raw events or the HyperLogLog sketches. The
+    ``_id`` is derived from the key so increments are plain upserts by ``_id``.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    @staticmethod
+    def rollup_id(granularity: str, bucket: datetime, event_type: str, entity_id) -> str:
+        """Key of a rollup document; matches the _id built during compaction"""
+        return f"{granularity}:{bucket:%Y%m%d%H}:{event_type}:{entity_id if entity_id is not None else '-'}"
+
+    @staticmethod
+    def increment_update(granularity: str, bucket: datetime, event_type: str, entity_id,
+                         count: int, first_at: datetime, last_at: datetime, range_id: ObjectId) -> List[Dict]:
+        """Upsert pipeline adding a batch of events from the range ending at range_id to one rollup key.
+
+        Documents record the last range added to them in ``applied_to``; one
+        that already has this range is left as it is, so a range can be
+        applied again after a failed run without counting it twice.
+        """
+        applied = {"$gte": ["$applied_to", {"$literal": range_id}]}
+
+        def unless_applied(field: str, value) -> Dict:
+            return {"$cond": [applied, f"${field}", value]}
+
+        return [{"$set": {
+            "count": unless_applied("count", {"$add": [{"$ifNull": ["$count", 0]}, {"$literal": count}]}),
+            "first_at": unless_applied("first_at", {"$min": ["$first_at", {"$literal": first_at}]}),
+            "last_at": unless_applied("last_at", {"$max": ["$last_at", {"$literal": last_at}]}),
+            "applied_to": unless_applied("applied_to", {"$literal": range_id}),
+            "granularity": {"$literal": granularity},
+            "bucket": {"$literal": bucket},
+            "event_type": {"$literal": event_type},
+            "entity_id": {"$literal": entity_id}
+        }}]
+
+    def find_oldest_hour_bucket(self, before: datetime) -> Optional[datetime]:
+        """Oldest hourly bucket that starts before the given time"""
+        oldest = self.collection.find_one(
+            {"granularity": self.HOUR, "bucket": {"$lt": before}},
+            {"bucket": 1},
+            sort=[("bucket", 1)]
+        )
+        return oldest["bucket"] if oldest else None
+
+    def compact_day(self, day: datetime) -> int:
+        """Fold a day's hourly documents into daily documents and remove them.
+
+        Each compaction is a run with its own id, kept in a marker document
+        (``compaction:<day>``) until the run finishes:
+
+        1. the day's hourly documents are tagged with the run id, so only
+           those are merged and deleted; hourly documents written later wait
+           for the next compaction instead of being deleted unmerged;
+        2. the tagged documents are merged into the daily documents, which
+           record the runs merged into them in ``compactions``; merging the
+           same run again leaves them unchanged;
+        3. the tagged documents and the marker are deleted.
+
+        A run interrupted at any step resumes from its marker on the next
+        call without counting anything twice. Daily documents that already
+        exist are added to, so hours written for the day after an earlier
+        compaction are folded in as well. Hourly documents from before users
+        were dropped from the key fold into the same daily documents.
+        Compaction only reaches hours the aggregator no longer writes to.
+        Returns the number of hourly documents removed.
+        """
+        marker_id = f"compaction:{day:%Y%m%d}"
+        marker = self.collection.find_one_and_update(
+            {"_id": marker_id},
+            {"$setOnInsert": {"run_id": ObjectId(), "day": day, "tagged": False, "started_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        run_id = marker["run_id"]
+        run_match = {"granularity": self.HOUR, "compaction": run_id}
+
+        # Nothing is merged before tagging completes, so an interrupted
+        # tagging step can simply be run again
+        if not marker["tagged"]:
+            self.collection.update_many(
+                {"granularity": self.HOUR, "bucket": {"$gte": day, "$lt": day + timedelta(days=1)},
+                 "compaction": {"$exists": False}},
+                {"$set": {"compaction": run_id}}
+            )
+            self.collection.update_one({"_id": marker_id}, {"$set": {"tagged": True}})
+
+        merged = {"$in": [run_id, {"$ifNull": ["$compactions", []]}]}
+        self.collection.aggregate([
+            {"$match": run_match},
+            {"$group": {
+                "_id": {"event_type": "$event_type", "entity_id": "$entity_id"},
+                "count": {"$sum": "$count"},
+                "first_at": {"$min": "$first_at"},
+                "last_at": {"$max": "$last_at"}
+            }},
+            {"$project": {
+                "_id": {"$concat": [
+                    f"{self.DAY}:{day:%Y%m%d%H}:", "$_id.event_type", ":",
+                    {"$ifNull": [{"$toString": "$_id.entity_id"}, "-"]}
+                ]},
+                "granularity": {"$literal": self.DAY},
+                "bucket": {"$literal": day},
+                "event_type": "$_id.event_type",
+                "entity_id": "$_id.entity_id",
+                "count": 1,
+                "first_at": 1,
+                "last_at": 1,
+                "compactions": {"$literal": [run_id]}
+            }},
+            {"$merge": {
+                "into": self.collection.name,
+                "on": "_id",
+                "whenMatched": [{"$set": {
+                    "count": {"$cond": [merged, "$count", {"$add": ["$count", "$$new.count"]}]},
+                    "first_at": {"$min": ["$first_at", "$$new.first_at"]},
+                    "last_at": {"$max": ["$last_at", "$$new.last_at"]},
+                    "compactions": {"$setUnion": [{"$ifNull": ["$compactions", []]}, [run_id]]}
+                }}],
+                "whenNotMatched": "insert"
+            }}
+        ], allowDiskUse=True)
+
+        removed = self.collection.delete_many(run_match).deleted_count
+        self.collection.delete_one({"_id": marker_id})
+        return removed
@@ -76,4 +76,13 @@ class CheckinRepository:
         return list(self.collection.find({
             "habit_id": habit_id,
             "date": {"$gte": cutoff_date}
-        }).sort("date", -1)) 
\ No newline at end of file
+        }).sort("date", -1))
+
+    def find_for_habits_since(self, habit_ids: list, since) -> list:
+        """Get every checkin for the given habits on or after a cutoff in one query"""
+        if not habit_ids:
+            return []
+        return list(self.collection.find({
+            "habit_id": {"$in": habit_ids},
+            "date": {"$gte": since}
+        }).sort("date", 1))
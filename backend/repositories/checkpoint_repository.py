@@ -0,0 +1,79 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.results import UpdateResult
+from datetime import datetime
+from typing import Dict, Optional
+
+class CheckpointRepository:
+    """Repository for the high-water marks of incremental batch jobs.
+
+    ``last_event_id`` is how far events have been claimed and
+    ``applied_event_id`` how far their writes are known to have completed.
+    A range is claimed only when the two are equal, so at most one claimed
+    range is ever pending; if it is not applied in time (the run failed), it
+    is handed to the next run to apply again.
+    """
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def get_or_create(self, name: str, initial_event_id: ObjectId) -> Dict:
+        """Get a job's checkpoint, starting it at initial_event_id on first use"""
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": name},
+            {"$setOnInsert": {
+                "last_event_id": initial_event_id,
+                "applied_event_id": initial_event_id,
+                "events_processed": 0,
+                "created_at": now,
+                "updated_at": now
+            }},
+            upsert=True
+        )
+        # Checkpoints written before applied positions were tracked start fully applied
+        self.collection.update_one(
+            {"_id": name, "applied_event_id": {"$exists": False}},
+            [{"$set": {"applied_event_id": "$last_event_id"}}]
+        )
+        return self.collection.find_one({"_id": name})
+
+    def advance(self, name: str, from_event_id: ObjectId, to_event_id: ObjectId,
+                events_processed: int = 0) -> bool:
+        """Claim the next range: only if nobody else has moved the checkpoint and nothing is pending"""
+        now = datetime.utcnow()
+        result: UpdateResult = self.collection.update_one(
+            {"_id": name, "last_event_id": from_event_id, "applied_event_id": from_event_id},
+            {
+                "$set": {"last_event_id": to_event_id, "claimed_at": now, "updated_at": now},
+                "$inc": {"events_processed": events_processed}
+            }
+        )
+        return result.modified_count == 1
+
+    def reclaim_pending(self, name: str, claimed_before: datetime) -> Optional[Dict]:
+        """Take over a claimed range that was not applied by claimed_before.
+
+        Returns the checkpoint, whose (applied_event_id, last_event_id] range
+        the caller must apply again, or None if nothing is overdue.
+        """
+        return self.collection.find_one_and_update(
+            {
+                "_id": name,
+                "claimed_at": {"$lt": claimed_before},
+                "$expr": {"$lt": ["$applied_event_id", "$last_event_id"]}
+            },
+            {"$set": {"claimed_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def find(self, name: str) -> Optional[Dict]:
+        return self.collection.find_one({"_id": name})
+
+    def mark_applied(self, name: str, event_id: ObjectId) -> None:
+        """Record that the events up to event_id are reflected in the job's output.
+
+        Readers that combine a job's output with the raw events after it split
+        at this position rather than at the claimed one.
+        """
+        self.collection.update_one({"_id": name}, {"$max": {"applied_event_id": event_id}})
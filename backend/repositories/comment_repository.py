@@ -1,4 +1,5 @@
 from bson import ObjectId
+from pymongo import UpdateOne
 from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -9,13 +10,31 @@ class CommentRepository:
     def __init__(self, db_collection):
         self.collection = db_collection
 
-    def create(self, comment_data: Dict) -> Dict:
-        """Create a new comment"""
+    def create(self, comment_data: Dict, parent: Optional[Dict] = None) -> Dict:
+        """Create a new comment, recording its thread path from the parent"""
+        comment_data['_id'] = ObjectId()
         comment_data['created_at'] = datetime.utcnow()
         comment_data['updated_at'] = datetime.utcnow()
         comment_data['likes_count'] = 0
+        comment_data['replies_count'] = 0
+        
+        if parent:
+            comment_data['ancestors'] = self._path_of(parent) + [parent["_id"]]
+            comment_data['root_id'] = comment_data['ancestors'][0]
+        else:
+            comment_data['ancestors'] = []
+            comment_data['root_id'] = comment_data['_id']
+        comment_data['depth'] = len(comment_data['ancestors'])
         
         result: InsertOneResult = self.collection.insert_one(comment_data)
+        
+        # replies_count on every ancestor counts all of its descendants
+        if comment_data['ancestors']:
+            self.collection.update_many(
+                {"_id": {"$in": comment_data['ancestors']}},
+                {"$inc": {"replies_count": 1}}
+            )
+        
         return self.collection.find_one({"_id": result.inserted_id})
 
     def find_by_id(self, comment_id: str) -> Optional[Dict]:
@@ -25,31 +44,33 @@ class CommentRepository:
         except:
             return None
 
-    def find_by_plan(self, plan_id: str, limit: int = 100) -> List[Dict]:
-        """Find comments for a specific plan, organized for threading"""
-        # First get all comments for the plan
-        all_comments = list(self.collection.find({
-            "plan_id": ObjectId(plan_id)
-        }).sort("created_at", 1))
+    def find_by_plan(self, plan_id: str, limit: int = 100, after: Optional[str] = None,
+                     preview_size: int = 20) -> List[Dict]:
+        """Find a page of root comments for a plan with their reply threads.
+
+        Roots are paged by ``_id`` (creation order); pass the last root's ID as
+        ``after`` for the next page. Threads with at most ``preview_size``
+        replies are loaded in one ``root_id`` query; larger threads are left
+        for ``find_replies`` so one busy thread cannot blow up the page.
+        """
+        query = {"plan_id": ObjectId(plan_id), "parent_comment_id": None}
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
         
-        # Organize into nested structure
-        comments_dict = {}
-        root_comments = []
+        root_comments = list(self.collection.find(query).sort("_id", 1).limit(limit))
         
-        for comment in all_comments:
-            comment_id = str(comment["_id"])
-            comments_dict[comment_id] = comment
+        preview_root_ids = []
+        for comment in root_comments:
             comment["replies"] = []
-            
-            parent_id = comment.get("parent_comment_id")
-            if parent_id:
-                parent_id = str(parent_id)
-                if parent_id in comments_dict:
-                    comments_dict[parent_id]["replies"].append(comment)
-            else:
-                root_comments.append(comment)
+            if 0 < comment.get("replies_count", 0) <= preview_size:
+                preview_root_ids.append(comment["_id"])
+            comment["has_more_replies"] = comment.get("replies_count", 0) > preview_size
+        
+        if preview_root_ids:
+            replies = self.collection.find({"root_id": {"$in": preview_root_ids}}).sort("_id", 1)
+            self._nest(root_comments, replies)
         
-        return root_comments[:limit]
+        return root_comments
 
     def find_by_user(self, user_id: str, limit: int = 50) -> List[Dict]:
         """Find comments made by a specific user"""
@@ -57,33 +78,28 @@ class CommentRepository:
             "user_id": ObjectId(user_id)
         }).sort("created_at", -1).limit(limit))
 
-    def find_replies(self, parent_comment_id: str) -> List[Dict]:
-        """Find direct replies to a comment"""
-        return list(self.collection.find({
-            "parent_comment_id": ObjectId(parent_comment_id)
-        }).sort("created_at", 1))
+    def find_replies(self, parent_comment_id: str, limit: int = 50, after: Optional[str] = None) -> List[Dict]:
+        """Find a page of direct replies to a comment (lazy thread expansion)"""
+        query = {"parent_comment_id": ObjectId(parent_comment_id)}
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
+        
+        return list(self.collection.find(query).sort("_id", 1).limit(limit))
 
     def get_comment_thread(self, comment_id: str, max_depth: int = 3) -> Dict:
-        """Get a comment and all its nested replies up to max_depth"""
-        def get_replies_recursive(comment_obj: Dict, current_depth: int) -> Dict:
-            if current_depth >= max_depth:
-                return comment_obj
-            
-            comment_obj["replies"] = list(self.collection.find({
-                "parent_comment_id": comment_obj["_id"]
-            }).sort("created_at", 1))
-            
-            # Recursively get replies for each reply
-            for reply in comment_obj["replies"]:
-                reply = get_replies_recursive(reply, current_depth + 1)
-                
-            return comment_obj
-        
+        """Get a comment and all its nested replies up to max_depth with one indexed query"""
         root_comment = self.find_by_id(comment_id)
         if not root_comment:
             return None
-            
-        return get_replies_recursive(root_comment, 0)
+        
+        root_comment["replies"] = []
+        replies = self.collection.find({
+            "ancestors": root_comment["_id"],
+            "depth": {"$lte": root_comment.get("depth", 0) + max_depth}
+        }).sort("_id", 1)
+        self._nest([root_comment], replies)
+        
+        return root_comment
 
     def increment_likes(self, comment_id: str) -> UpdateResult:
         """Increment likes count for a comment"""
@@ -135,29 +151,80 @@ class CommentRepository:
         if not root_comment:
             return 0
         
-        # Get all reply IDs recursively
-        def get_all_reply_ids(parent_id: str) -> List[ObjectId]:
-            reply_ids = []
-            replies = list(self.collection.find(
-                {"parent_comment_id": ObjectId(parent_id)},
-                {"_id": 1}
-            ))
-            
-            for reply in replies:
-                reply_id = str(reply["_id"])
-                reply_ids.append(reply["_id"])
-                reply_ids.extend(get_all_reply_ids(reply_id))
-                
-            return reply_ids
+        # The comment and every descendant in one indexed delete
+        result = self.collection.delete_many({
+            "$or": [{"_id": root_comment["_id"]}, {"ancestors": root_comment["_id"]}]
+        })
         
-        # Get all IDs to delete (root + all replies)
-        all_ids_to_delete = [ObjectId(comment_id)]
-        all_ids_to_delete.extend(get_all_reply_ids(comment_id))
+        ancestors = self._path_of(root_comment)
+        if ancestors and result.deleted_count:
+            self.collection.update_many(
+                {"_id": {"$in": ancestors}},
+                {"$inc": {"replies_count": -result.deleted_count}}
+            )
         
-        # Delete all comments
-        result = self.collection.delete_many({"_id": {"$in": all_ids_to_delete}})
         return result.deleted_count
 
+    def backfill_thread_paths(self) -> int:
+        """Set root_id, ancestors, depth and replies_count on comments created before they existed"""
+        updated = 0
+        for plan_id in self.collection.distinct("plan_id", {"ancestors": {"$exists": False}}):
+            comments = {
+                comment["_id"]: comment
+                for comment in self.collection.find({"plan_id": plan_id}, {"parent_comment_id": 1})
+            }
+            
+            paths: Dict[ObjectId, List[ObjectId]] = {}
+            for comment_id in comments:
+                # Walk up to the root; orphaned replies become roots of their own thread
+                path = []
+                parent_id = comments[comment_id].get("parent_comment_id")
+                while parent_id in comments and parent_id not in path:
+                    path.insert(0, parent_id)
+                    parent_id = comments[parent_id].get("parent_comment_id")
+                paths[comment_id] = path
+            
+            replies_count = {comment_id: 0 for comment_id in comments}
+            for path in paths.values():
+                for ancestor_id in path:
+                    replies_count[ancestor_id] += 1
+            
+            operations = [
+                UpdateOne({"_id": comment_id}, {"$set": {
+                    "ancestors": path,
+                    "root_id": path[0] if path else comment_id,
+                    "depth": len(path),
+                    "replies_count": replies_count[comment_id]
+                }})
+                for comment_id, path in paths.items()
+            ]
+            if operations:
+                updated += self.collection.bulk_write(operations, ordered=False).modified_count
+        
+        return updated
+
+    @staticmethod
+    def _path_of(comment: Dict) -> List[ObjectId]:
+        return list(comment.get("ancestors") or [])
+
+    @staticmethod
+    def _nest(top_comments: List[Dict], replies) -> None:
+        """Attach replies under their parents, keeping the order given among siblings.
+
+        Every reply is indexed before any is attached, so a reply whose _id
+        sorts before its parent's (ObjectIds from different processes in the
+        same second) is not dropped.
+        """
+        by_id = {comment["_id"]: comment for comment in top_comments}
+        replies = list(replies)
+        for reply in replies:
+            reply["replies"] = []
+            by_id[reply["_id"]] = reply
+        for reply in replies:
+            parent = by_id.get(reply.get("parent_comment_id"))
+            if parent is not None:
+                parent["replies"].append(reply)
+
     def get_plan_comment_stats(self, plan_id: str) -> Dict:
         """Get comment statistics for a plan"""
         pipeline = [
@@ -0,0 +1,180 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.results import InsertOneResult, DeleteResult
+from datetime import datetime
+from typing import List, Dict, Optional
+
+class FeedActivityRepository:
+    """Repository for activity feed entries written once and fanned out to follower timelines"""
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def create(self, activity_data: Dict) -> Dict:
+        """Store a new activity"""
+        activity_data.setdefault('timestamp', datetime.utcnow())
+
+        result: InsertOneResult = self.collection.insert_one(activity_data)
+        activity_data['_id'] = result.inserted_id
+        return activity_data
+
+    def find_by_ids(self, activity_ids: List[str]) -> List[Dict]:
+        """Get activities by ID, skipping IDs that no longer exist"""
+        object_ids = [ObjectId(activity_id) for activity_id in activity_ids if ObjectId.is_valid(activity_id)]
+        if not object_ids:
+            return []
+        return list(self.collection.find({"_id": {"$in": object_ids}}))
+
+    def find_by_actors(self, actor_ids: List[str], before: Optional[datetime] = None,
+                       limit: int = 50, before_id: Optional[ObjectId] = None) -> List[Dict]:
+        """Get the newest activities of a set of users, optionally after a (timestamp, _id) cursor"""
+        if not actor_ids:
+            return []
+
+        query = {"user_id": {"$in": [ObjectId(actor_id) for actor_id in actor_ids]}}
+        if before is not None and before_id is not None:
+            query["$or"] = [
+                {"timestamp": {"$lt": before}},
+                {"timestamp": before, "_id": {"$lt": before_id}}
+            ]
+        elif before is not None:
+            query["timestamp"] = {"$lt": before}
+
+        return list(self.collection.find(query).sort([("timestamp", -1), ("_id", -1)]).limit(limit))
+
+    def find_ids_by_actor(self, actor_id: str, limit: int = 500) -> List[Dict]:
+        """Get the IDs and timestamps of a user's newest activities"""
+        return list(
+            self.collection.find({"user_id": ObjectId(actor_id)}, {"_id": 1, "timestamp": 1})
+            .sort("timestamp", -1)
+            .limit(limit)
+        )
+
+    def backfill_from_sources(self, since: datetime, chunk_size: int = 1000) -> int:
+        """Derive activities for shares, likes, downloads, comments and follows made before the feed existed.
+
+        Only source records older than the first recorded activity are used, so
+        nothing already recorded live is duplicated, and each derived activity
+        is upserted on its natural key so the backfill can be run again.
+        Returns the number of activities inserted.
+        """
+        first_live = self.collection.find_one({"backfilled": {"$ne": True}}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        window = {"$gte": since, "$lt": first_live["timestamp"] if first_live else datetime.utcnow()}
+        db = self.collection.database
+
+        inserted = 0
+        for source, pipeline in (
+            (db.shared_skills, self._shared_skills_pipeline(window)),
+            (db.plan_interactions, self._interactions_pipeline(window)),
+            (db.plan_comments, self._comments_pipeline(window)),
+            (db.user_relationships, self._follows_pipeline(window))
+        ):
+            operations = []
+            for activity in source.aggregate(pipeline, allowDiskUse=True):
+                key = {
+                    field: activity.pop(field)
+                    for field in ("user_id", "activity_type", "skill_id", "target_user_id", "timestamp")
+                    if activity.get(field) is not None
+                }
+                activity.pop("_id", None)
+                operations.append(UpdateOne(key, {"$setOnInsert": {**activity, "backfilled": True}}, upsert=True))
+                if len(operations) >= chunk_size:
+                    inserted += self.collection.bulk_write(operations, ordered=False).upserted_count
+                    operations = []
+            if operations:
+                inserted += self.collection.bulk_write(operations, ordered=False).upserted_count
+
+        return inserted
+
+    # Activity documents as ActivityFeedService.record_activity writes them
+
+    @staticmethod
+    def _actor_stages(actor_field: str) -> List[Dict]:
+        return [
+            {"$lookup": {"from": "users", "localField": actor_field, "foreignField": "_id", "as": "actor"}},
+            {"$unwind": "$actor"}
+        ]
+
+    def _shared_skills_pipeline(self, window: Dict) -> List[Dict]:
+        return [
+            {"$match": {"created_at": window, "visibility": "public"}},
+            *self._actor_stages("shared_by"),
+            {"$project": {
+                "activity_type": {"$literal": "skill_shared"},
+                "timestamp": "$created_at",
+                "user_id": "$shared_by",
+                "username": "$actor.username",
+                "user_avatar": "$actor.profile_picture",
+                "skill_id": "$_id",
+                "skill_title": "$title",
+                "skill_description": "$description",
+                "skill_category": "$category",
+                "skill_difficulty": "$difficulty"
+            }}
+        ]
+
+    def _interactions_pipeline(self, window: Dict) -> List[Dict]:
+        return [
+            {"$match": {"created_at": window, "interaction_type": {"$in": ["like", "download"]}}},
+            {"$lookup": {"from": "shared_skills", "localField": "plan_id", "foreignField": "_id", "as": "skill"}},
+            {"$unwind": "$skill"},
+            *self._actor_stages("user_id"),
+            {"$project": {
+                "activity_type": {"$cond": [{"$eq": ["$interaction_type", "like"]}, "skill_liked", "skill_downloaded"]},
+                "timestamp": "$created_at",
+                "user_id": "$user_id",
+                "username": "$actor.username",
+                "user_avatar": "$actor.profile_picture",
+                "skill_id": "$plan_id",
+                "skill_title": "$skill.title",
+                "skill_description": "$skill.description",
+                "skill_category": "$skill.category",
+                "skill_difficulty": "$skill.difficulty"
+            }}
+        ]
+
+    def _comments_pipeline(self, window: Dict) -> List[Dict]:
+        return [
+            {"$match": {"created_at": window}},
+            {"$lookup": {"from": "shared_skills", "localField": "plan_id", "foreignField": "_id", "as": "skill"}},
+            {"$unwind": "$skill"},
+            *self._actor_stages("user_id"),
+            {"$project": {
+                "activity_type": {"$literal": "skill_commented"},
+                "timestamp": "$created_at",
+                "user_id": "$user_id",
+                "username": "$actor.username",
+                "user_avatar": "$actor.profile_picture",
+                "skill_id": "$plan_id",
+                "skill_title": "$skill.title",
+                "skill_description": "$skill.description",
+                "skill_category": "$skill.category",
+                "skill_difficulty": "$skill.difficulty"
+            }}
+        ]
+
+    def _follows_pipeline(self, window: Dict) -> List[Dict]:
+        return [
+            {"$match": {"created_at": window, "relationship_type": "follow"}},
+            *self._actor_stages("follower_id"),
+            {"$lookup": {"from": "users", "localField": "following_id", "foreignField": "_id", "as": "target"}},
+            {"$unwind": "$target"},
+            {"$project": {
+                "activity_type": {"$literal": "user_followed"},
+                "timestamp": "$created_at",
+                "user_id": "$follower_id",
+                "username": "$actor.username",
+                "user_avatar": "$actor.profile_picture",
+                "target_user_id": "$following_id",
+                "target_username": "$target.username",
+                "target_avatar": "$target.profile_picture"
+            }}
+        ]
+
+    def delete_activity(self, actor_id: str, activity_type: str, skill_id: str) -> DeleteResult:
+        """Remove an activity that was undone (e.g. an unlike)"""
+        return self.collection.delete_many({
+            "user_id": ObjectId(actor_id),
+            "activity_type": activity_type,
+            "skill_id": ObjectId(skill_id)
+        })
@@ -0,0 +1,52 @@
+from bson import ObjectId
+from datetime import datetime
+from typing import List, Dict, Optional
+
+class FollowSuggestionRepository:
+    """Repository for the precomputed friends-of-friends candidates kept per user"""
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def find(self, user_id: str) -> Optional[Dict]:
+        """Get a user's stored candidates"""
+        return self.collection.find_one({"_id": ObjectId(user_id)})
+
+    def replace(self, user_id: str, candidates: List[Dict], started_at: datetime) -> None:
+        """Store freshly computed candidates.
+
+        The entry stays dirty if a follow edge changed after the computation
+        started, so the next refresh picks it up again.
+        """
+        self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            [{"$set": {
+                "candidates": {"$literal": candidates},
+                "computed_at": started_at,
+                "dirty": {"$gt": [{"$ifNull": ["$dirty_at", started_at]}, started_at]}
+            }}],
+            upsert=True
+        )
+
+    def mark_dirty(self, user_ids: List[str]) -> int:
+        """Flag existing entries for recomputation; users without an entry are computed on first read"""
+        if not user_ids:
+            return 0
+
+        result = self.collection.update_many(
+            {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}},
+            {"$set": {"dirty": True, "dirty_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    def remove_candidate(self, user_id: str, candidate_id: str) -> None:
+        """Drop a single candidate immediately (e.g. after the user follows or blocks them)"""
+        self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$pull": {"candidates": {"user_id": ObjectId(candidate_id)}}}
+        )
+
+    def find_dirty(self, limit: int = 500) -> List[str]:
+        """IDs of entries waiting for recomputation, oldest change first"""
+        cursor = self.collection.find({"dirty": True}, {"_id": 1}).sort("dirty_at", 1).limit(limit)
+        return [str(entry["_id"]) for entry in cursor]
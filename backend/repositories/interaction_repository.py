@@ -1,4 +1,6 @@
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
@@ -41,6 +43,46 @@ class InteractionRepository:
             "interaction_type": interaction_type
         })
 
+    def add_if_absent(self, user_id: str, plan_id: str, interaction_type: str) -> bool:
+        """Insert an interaction unless it already exists; True only for the request that created it"""
+        try:
+            result = self.collection.update_one(
+                {
+                    "user_id": ObjectId(user_id),
+                    "plan_id": ObjectId(plan_id),
+                    "interaction_type": interaction_type
+                },
+                {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # A concurrent request inserted it first
+            return False
+        
+        return result.upserted_id is not None
+
+    def set_rating(self, user_id: str, plan_id: str, rating: int, review: Optional[str] = None) -> Optional[Dict]:
+        """Create or change a user's rating; returns the previous rating document (None if new)"""
+        query = {
+            "user_id": ObjectId(user_id),
+            "plan_id": ObjectId(plan_id),
+            "interaction_type": "rate"
+        }
+        update = {
+            "$set": {"rating": rating, "review": review, "updated_at": datetime.utcnow()},
+            "$setOnInsert": {"created_at": datetime.utcnow()}
+        }
+        
+        try:
+            return self.collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Lost an insert race; the document exists now, so this update matches it
+            return self.collection.find_one_and_update(
+                query, update, return_document=ReturnDocument.BEFORE
+            )
+
     def remove_interaction(self, user_id: str, plan_id: str, interaction_type: str) -> DeleteResult:
         """Remove a specific interaction"""
         return self.collection.delete_one({
@@ -0,0 +1,19 @@
+from pymongo.results import InsertOneResult
+from typing import List, Dict, Optional
+
+class JobRunRepository:
+    """Repository for scheduler run history"""
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def create(self, run_data: Dict) -> Dict:
+        """Record a finished run"""
+        result: InsertOneResult = self.collection.insert_one(run_data)
+        run_data['_id'] = result.inserted_id
+        return run_data
+
+    def find_recent(self, job_name: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Get the latest runs, optionally for a single job"""
+        query = {"job": job_name} if job_name else {}
+        return list(self.collection.find(query).sort("started_at", -1).limit(limit))
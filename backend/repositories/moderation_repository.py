@@ -1,11 +1,14 @@
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Tuple
 
 class ModerationRepository:
     """Repository for managing content moderation and reporting"""
 
+    RULES_VERSION_ID = "active_rules"
+
     def __init__(self, db_collection):
         self.collection = db_collection
 
@@ -244,6 +247,7 @@ class ModerationRepository:
         # Store in a separate rules collection
         rules_collection = self.collection.database.moderation_rules
         result = rules_collection.insert_one(rule_data)
+        self.bump_rules_version()
         return rules_collection.find_one({"_id": result.inserted_id})
 
     def get_auto_moderation_rules(self, active_only: bool = True) -> List[Dict]:
@@ -253,79 +257,56 @@ class ModerationRepository:
         
         return list(rules_collection.find(query).sort("created_at", -1))
 
-    def apply_auto_moderation(self, content_type: str, content_data: Dict) -> Optional[Dict]:
-        """Apply automated moderation rules to content"""
-        rules = self.get_auto_moderation_rules(active_only=True)
-        
-        for rule in rules:
-            if self._matches_rule(content_data, rule):
-                # Create automatic report
-                auto_report = {
-                    "content_type": content_type,
-                    "content_id": content_data.get("_id"),
-                    "reported_user_id": content_data.get("user_id"),
-                    "reason": rule.get("reason", "automated_detection"),
-                    "description": f"Automatically detected: {rule.get('description', 'content violation')}",
-                    "reporter_id": None,  # System generated
-                    "is_automated": True,
-                    "rule_id": rule["_id"],
-                    "priority_score": rule.get("priority_score", 70),
-                    "severity": rule.get("severity", "medium")
-                }
-                
-                report = self.create_report(auto_report)
-                
-                # Update rule trigger count
-                rules_collection = self.collection.database.moderation_rules
-                rules_collection.update_one(
-                    {"_id": rule["_id"]},
-                    {"$inc": {"trigger_count": 1}}
-                )
-                
-                return report
-        
-        return None
+    def get_rules_version(self) -> int:
+        """Current version of the rule set; moves on every rule change"""
+        state = self.collection.database.moderation_rule_versions.find_one({"_id": self.RULES_VERSION_ID})
+        return state["version"] if state else 0
 
-    def _matches_rule(self, content_data: Dict, rule: Dict) -> bool:
-        """Check if content matches a moderation rule"""
-        rule_type = rule.get("type")
-        
-        if rule_type == "keyword_filter":
-            content_text = " ".join([
-                str(content_data.get("title", "")),
-                str(content_data.get("description", "")),
-                str(content_data.get("content", ""))
-            ]).lower()
-            
-            keywords = rule.get("keywords", [])
-            return any(keyword.lower() in content_text for keyword in keywords)
-        
-        elif rule_type == "spam_detection":
-            # Simple spam detection based on repetition and length
-            title = content_data.get("title", "")
-            description = content_data.get("description", "")
-            
-            # Check for excessive repetition
-            if len(set(title.split())) < len(title.split()) * 0.5:
-                return True
-            
-            # Check for excessive capitalization
-            if len(title) > 10 and sum(c.isupper() for c in title) > len(title) * 0.7:
-                return True
-        
-        elif rule_type == "rate_limit":
-            # Check if user has posted too frequently
-            user_id = content_data.get("user_id")
-            time_window = rule.get("time_window_minutes", 60)
-            max_posts = rule.get("max_posts", 5)
-            
-            cutoff_time = datetime.utcnow() - timedelta(minutes=time_window)
-            
-            # This would need to be implemented based on the specific content collection
-            # For now, we'll return False
-            pass
-        
-        return False
+    def bump_rules_version(self) -> int:
+        """Mark the rule set as changed so compiled matchers are rebuilt in every process"""
+        state = self.collection.database.moderation_rule_versions.find_one_and_update(
+            {"_id": self.RULES_VERSION_ID},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return state["version"]
+
+    def create_auto_reports(self, content_type: str, matches: List[Tuple[Dict, Dict]]) -> List[Dict]:
+        """Create automatic reports for (content, matched rule) pairs with one insert"""
+        if not matches:
+            return []
+        
+        auto_reports = []
+        trigger_counts: Dict[ObjectId, int] = {}
+        for content_data, rule in matches:
+            auto_reports.append({
+                "content_type": content_type,
+                "content_id": content_data.get("_id"),
+                "reported_user_id": content_data.get("user_id"),
+                "reason": rule.get("reason", "automated_detection"),
+                "description": f"Automatically detected: {rule.get('description', 'content violation')}",
+                "reporter_id": None,  # System generated
+                "is_automated": True,
+                "rule_id": rule["_id"],
+                "priority_score": rule.get("priority_score", 70),
+                "severity": rule.get("severity", "medium"),
+                "priority": "medium",
+                "status": "pending",
+                "created_at": datetime.utcnow()
+            })
+            trigger_counts[rule["_id"]] = trigger_counts.get(rule["_id"], 0) + 1
+        
+        # insert_many sets _id on each report in place
+        self.collection.insert_many(auto_reports)
+        
+        # Update rule trigger counts
+        self.collection.database.moderation_rules.bulk_write([
+            UpdateOne({"_id": rule_id}, {"$inc": {"trigger_count": count}})
+            for rule_id, count in trigger_counts.items()
+        ], ordered=False)
+        
+        return auto_reports
 
     def get_content_reports_summary(self, content_type: str, content_id: str) -> Dict:
         """Get summary of reports for specific content"""
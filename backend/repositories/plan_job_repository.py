@@ -0,0 +1,89 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.results import InsertOneResult, UpdateResult
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+class PlanJobRepository:
+    """Repository for background plan generation jobs"""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def create(self, job_data: Dict) -> Dict:
+        """Create a new pending job"""
+        now = datetime.utcnow()
+        job_data['status'] = self.STATUS_PENDING
+        job_data['created_at'] = now
+        job_data['updated_at'] = now
+
+        result: InsertOneResult = self.collection.insert_one(job_data)
+        job_data['_id'] = result.inserted_id
+        return job_data
+
+    def find_by_id(self, job_id: str) -> Optional[Dict]:
+        """Find a job by its ID"""
+        try:
+            return self.collection.find_one({"_id": ObjectId(job_id)})
+        except:
+            return None
+
+    def mark_running(self, job_id: str) -> UpdateResult:
+        return self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"status": self.STATUS_RUNNING, "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+        )
+
+    def mark_completed(self, job_id: str, result: Optional[Dict] = None) -> UpdateResult:
+        update = {
+            "status": self.STATUS_COMPLETED,
+            "completed_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }
+        if result is not None:
+            update["result"] = result
+
+        return self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": update})
+
+    def mark_failed(self, job_id: str, error: str) -> UpdateResult:
+        return self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "status": self.STATUS_FAILED,
+                "error": error,
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    def _stale_filter(self, timeout_seconds: int) -> Dict:
+        return {
+            "status": {"$in": [self.STATUS_PENDING, self.STATUS_RUNNING]},
+            "updated_at": {"$lt": datetime.utcnow() - timedelta(seconds=timeout_seconds)}
+        }
+
+    def fail_if_stale(self, job_id, timeout_seconds: int) -> Optional[Dict]:
+        """Fail a job whose worker disappeared before finishing it; returns the job if it was failed here"""
+        return self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id), **self._stale_filter(timeout_seconds)},
+            {"$set": {
+                "status": self.STATUS_FAILED,
+                "error": "Plan generation timed out",
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def find_stale_ids(self, timeout_seconds: int, limit: int = 500) -> List[ObjectId]:
+        """Unfinished jobs not updated within the timeout, oldest first"""
+        return [
+            job["_id"] for job in self.collection.find(
+                self._stale_filter(timeout_seconds), {"_id": 1}
+            ).sort("updated_at", 1).limit(limit)
+        ]
@@ -0,0 +1,98 @@
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import UpdateResult
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+
+class ScheduledJobRepository:
+    """Repository for scheduler job state: next run time, lease and last outcome"""
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def register(self, name: str, schedule: str, next_run_at: datetime) -> None:
+        """Create a job, or reschedule it if its schedule expression changed"""
+        try:
+            self.collection.update_one(
+                {"_id": name, "schedule": {"$ne": schedule}},
+                {
+                    "$set": {"schedule": schedule, "next_run_at": next_run_at, "updated_at": datetime.utcnow()},
+                    "$setOnInsert": {"paused": False, "locked_until": None, "owner": None, "run_count": 0, "failure_count": 0}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Already registered with the same schedule
+            pass
+
+    def claim_due(self, name: str, owner: str, lease_seconds: int) -> Optional[Dict]:
+        """Atomically take the lease on a job that is due and not held by a live worker"""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                "_id": name,
+                "paused": {"$ne": True},
+                "next_run_at": {"$lte": now},
+                "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]
+            },
+            {"$set": {
+                "owner": owner,
+                "locked_until": now + timedelta(seconds=lease_seconds),
+                "started_at": now
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def renew_lease(self, name: str, owner: str, lease_seconds: int) -> bool:
+        """Extend a running job's lease; False if this owner no longer holds it"""
+        result = self.collection.update_one(
+            {"_id": name, "owner": owner},
+            {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+        )
+        return result.matched_count == 1
+
+    def complete(self, name: str, owner: str, next_run_at: datetime, last_run: Dict, failed: bool) -> UpdateResult:
+        """Release the lease and schedule the next run.
+
+        A run requested while this one was running (``requested_at`` after
+        ``started_at``) keeps the job due and its trigger, so the request is
+        served by the next poll instead of being dropped.
+        """
+        requested_during_run = {"$gt": ["$requested_at", "$started_at"]}
+        return self.collection.update_one(
+            {"_id": name, "owner": owner},
+            [{"$set": {
+                "next_run_at": {"$cond": [requested_during_run, "$next_run_at", {"$literal": next_run_at}]},
+                "trigger": {"$cond": [requested_during_run, "$trigger", None]},
+                "locked_until": None,
+                "owner": None,
+                "last_run": {"$literal": last_run},
+                "updated_at": datetime.utcnow(),
+                "run_count": {"$add": [{"$ifNull": ["$run_count", 0]}, 1]},
+                "failure_count": {"$add": [{"$ifNull": ["$failure_count", 0]}, 1 if failed else 0]}
+            }}]
+        )
+
+    def request_run(self, name: str, requested_by: Optional[str] = None) -> UpdateResult:
+        """Make a job due immediately; whichever scheduler polls next picks it up"""
+        return self.collection.update_one(
+            {"_id": name},
+            {"$set": {
+                "next_run_at": datetime.utcnow(),
+                "trigger": "manual",
+                "requested_by": requested_by,
+                "requested_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    def set_paused(self, paused: bool, name: Optional[str] = None) -> UpdateResult:
+        """Pause or resume one job, or every job when no name is given"""
+        query = {"_id": name} if name else {}
+        return self.collection.update_many(query, {"$set": {"paused": paused, "updated_at": datetime.utcnow()}})
+
+    def find_all(self) -> List[Dict]:
+        return list(self.collection.find().sort("_id", 1))
+
+    def find_by_name(self, name: str) -> Optional[Dict]:
+        return self.collection.find_one({"_id": name})
@@ -1,4 +1,5 @@
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
@@ -15,7 +16,7 @@ class SharedSkillRepository:
         skill_data['updated_at'] = datetime.utcnow()
         skill_data['likes_count'] = 0
         skill_data['downloads_count'] = 0
-        skill_data['rating'] = {'average': 0.0, 'count': 0}
+        skill_data['rating'] = {'average': 0.0, 'count': 0, 'sum': 0}
         
         result: InsertOneResult = self.collection.insert_one(skill_data)
         return self.collection.find_one({"_id": result.inserted_id})
@@ -126,24 +127,19 @@ class SharedSkillRepository:
         
         return list(self.collection.aggregate(pipeline))
 
-    def increment_likes(self, skill_id: str) -> UpdateResult:
-        """Increment the likes count for a skill"""
-        return self.collection.update_one(
-            {"_id": ObjectId(skill_id)},
-            {
-                "$inc": {"likes_count": 1},
-                "$set": {"updated_at": datetime.utcnow()}
-            }
-        )
-
-    def decrement_likes(self, skill_id: str) -> UpdateResult:
-        """Decrement the likes count for a skill"""
-        return self.collection.update_one(
-            {"_id": ObjectId(skill_id)},
+    def adjust_likes(self, skill_id: str, delta: int, liker_id: str) -> Optional[Dict]:
+        """Atomically change the likes count and return the updated skill.
+        
+        Returns None when the skill does not exist or belongs to the liker.
+        """
+        return self.collection.find_one_and_update(
+            {"_id": ObjectId(skill_id), "shared_by": {"$ne": ObjectId(liker_id)}},
             {
-                "$inc": {"likes_count": -1},
+                "$inc": {"likes_count": delta},
                 "$set": {"updated_at": datetime.utcnow()}
-            }
+            },
+            projection={"title": 1, "description": 1, "category": 1, "difficulty": 1, "shared_by": 1, "likes_count": 1},
+            return_document=ReturnDocument.AFTER
         )
 
     def increment_downloads(self, skill_id: str) -> UpdateResult:
@@ -156,17 +152,29 @@ class SharedSkillRepository:
             }
         )
 
-    def update_rating(self, skill_id: str, new_average: float, new_count: int) -> UpdateResult:
-        """Update the rating for a skill"""
-        return self.collection.update_one(
+    def apply_rating_delta(self, skill_id: str, sum_delta: int, count_delta: int) -> Optional[Dict]:
+        """Fold one rating change into the running sum and count and recompute the average in the same write"""
+        # Skills rated before the running sum existed derive it from their average
+        current_sum = {"$ifNull": ["$rating.sum", {"$round": [
+            {"$multiply": [{"$ifNull": ["$rating.average", 0]}, {"$ifNull": ["$rating.count", 0]}]}, 0
+        ]}]}
+        
+        return self.collection.find_one_and_update(
             {"_id": ObjectId(skill_id)},
-            {
-                "$set": {
-                    "rating.average": round(new_average, 2),
-                    "rating.count": new_count,
+            [
+                {"$set": {
+                    "rating.sum": {"$add": [current_sum, sum_delta]},
+                    "rating.count": {"$add": [{"$ifNull": ["$rating.count", 0]}, count_delta]},
                     "updated_at": datetime.utcnow()
-                }
-            }
+                }},
+                {"$set": {"rating.average": {"$cond": [
+                    {"$gt": ["$rating.count", 0]},
+                    {"$round": [{"$divide": ["$rating.sum", "$rating.count"]}, 2]},
+                    0.0
+                ]}}}
+            ],
+            projection={"rating": 1},
+            return_document=ReturnDocument.AFTER
         )
 
     def update_custom_task_status(self, skill_id: str, has_custom_tasks: bool) -> UpdateResult:
@@ -51,6 +51,13 @@ class SkillCompletionRepository:
             "completed_at": {"$gte": cutoff_date}
         }).sort("completed_at", -1))
     
+    def find_user_completions_since(self, user_id: str, since: datetime) -> List[Dict]:
+        """Get all user completions on or after a cutoff in one query"""
+        return list(self.collection.find({
+            "user_id": ObjectId(user_id),
+            "completed_at": {"$gte": since}
+        }).sort("completed_at", 1))
+    
     def find_completions_by_date(self, user_id: str, date: datetime) -> List[Dict]:
         """Get all completions for a specific date"""
         start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -116,6 +116,31 @@ class UserRelationshipRepository:
             "is_active": True
         })
 
+    def iter_follower_ids(self, user_id: str, batch_size: int = 500):
+        """Yield follower IDs in batches without joining user documents"""
+        cursor = self.collection.find(
+            {"following_id": ObjectId(user_id), "relationship_type": "follow", "is_active": True},
+            {"follower_id": 1, "_id": 0}
+        ).batch_size(batch_size)
+
+        batch = []
+        for relationship in cursor:
+            batch.append(str(relationship["follower_id"]))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_following_ids(self, user_id: str, limit: int = 1000, among: Optional[List[str]] = None) -> List[str]:
+        """Get IDs of users this user follows, optionally restricted to a candidate set"""
+        query = {"follower_id": ObjectId(user_id), "relationship_type": "follow", "is_active": True}
+        if among is not None:
+            query["following_id"] = {"$in": [ObjectId(candidate) for candidate in among]}
+
+        cursor = self.collection.find(query, {"following_id": 1, "_id": 0}).limit(limit)
+        return [str(relationship["following_id"]) for relationship in cursor]
+
     def get_mutual_followers(self, user1_id: str, user2_id: str) -> List[Dict]:
         """Get mutual followers between two users"""
         pipeline = [
@@ -145,71 +170,53 @@ class UserRelationshipRepository:
         
         return list(self.collection.aggregate(pipeline))
 
-    def get_suggested_follows(self, user_id: str, limit: int = 10) -> List[Dict]:
-        """Get suggested users to follow based on mutual connections"""
+    def get_blocked_ids(self, user_id: str) -> List[str]:
+        """Get IDs of users this user has blocked or been blocked by"""
+        cursor = self.collection.find(
+            {
+                "$or": [{"follower_id": ObjectId(user_id)}, {"following_id": ObjectId(user_id)}],
+                "relationship_type": "block",
+                "is_active": True
+            },
+            {"follower_id": 1, "following_id": 1, "_id": 0}
+        )
+        return [
+            str(block["following_id"] if str(block["follower_id"]) == user_id else block["follower_id"])
+            for block in cursor
+        ]
+
+    def get_suggestion_candidates(self, user_id: str, limit: int = 50, following_limit: int = 1000) -> List[Dict]:
+        """Rank friends-of-friends by how many of the user's followees follow them.
+
+        One indexed $in match over the followees' outgoing edges, without
+        per-row $lookup; excludes the user, existing followees and blocks.
+        """
+        following_ids = self.get_following_ids(user_id, limit=following_limit)
+        if not following_ids:
+            return []
+
+        excluded = {user_id, *following_ids, *self.get_blocked_ids(user_id)}
         pipeline = [
-            # Get users that current user's follows are following
             {"$match": {
-                "follower_id": ObjectId(user_id),
+                "follower_id": {"$in": [ObjectId(followed_id) for followed_id in following_ids]},
                 "relationship_type": "follow",
-                "is_active": True
-            }},
-            {"$lookup": {
-                "from": "user_relationships",
-                "let": {"following_id": "$following_id"},
-                "pipeline": [
-                    {"$match": {
-                        "$expr": {"$eq": ["$follower_id", "$$following_id"]},
-                        "relationship_type": "follow",
-                        "is_active": True
-                    }}
-                ],
-                "as": "their_follows"
+                "is_active": True,
+                "following_id": {"$nin": [ObjectId(excluded_id) for excluded_id in excluded]}
             }},
-            {"$unwind": "$their_follows"},
             {"$group": {
-                "_id": "$their_follows.following_id",
+                "_id": "$following_id",
                 "mutual_count": {"$sum": 1}
             }},
-            # Exclude users already being followed or self
-            {"$lookup": {
-                "from": "user_relationships",
-                "let": {"suggested_user": "$_id"},
-                "pipeline": [
-                    {"$match": {
-                        "$expr": {
-                            "$and": [
-                                {"$eq": ["$follower_id", ObjectId(user_id)]},
-                                {"$eq": ["$following_id", "$$suggested_user"]},
-                                {"$eq": ["$is_active", True]}
-                            ]
-                        }
-                    }}
-                ],
-                "as": "existing_follow"
-            }},
-            {"$match": {
-                "_id": {"$ne": ObjectId(user_id)},  # Not self
-                "existing_follow": {"$size": 0}     # Not already following
-            }},
-            {"$lookup": {
-                "from": "users",
-                "localField": "_id",
-                "foreignField": "_id",
-                "as": "user_info"
-            }},
-            {"$unwind": "$user_info"},
+            {"$sort": {"mutual_count": -1, "_id": 1}},
+            {"$limit": limit},
             {"$project": {
+                "_id": 0,
                 "user_id": "$_id",
-                "username": "$user_info.username",
-                "profile_picture": "$user_info.profile_picture",
                 "mutual_connections": "$mutual_count"
-            }},
-            {"$sort": {"mutual_connections": -1, "username": 1}},
-            {"$limit": limit}
+            }}
         ]
         
-        return list(self.collection.aggregate(pipeline))
+        return list(self.collection.aggregate(pipeline, allowDiskUse=True))
 
     def is_following(self, follower_id: str, following_id: str) -> bool:
         """Check if user is following another user"""
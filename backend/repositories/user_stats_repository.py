@@ -0,0 +1,84 @@
+from bson import ObjectId
+from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from typing import List, Dict, Optional
+
+class UserStatsRepository:
+    """Repository for the denormalized social counters kept on user documents"""
+
+    COUNTER_FIELDS = ("followers_count", "following_count", "shared_skills_count")
+    SCORE_FIELDS = ("followers_count", "shared_skills_count", "overall_score")
+    PROFILE_FIELDS = {"username": 1, "bio": 1, "profile_picture": 1, "is_verified": 1, "is_deactivated": 1}
+
+    # overall_score = shared skills + half a point per follower
+    OVERALL_SCORE_EXPR = {"$add": [
+        {"$ifNull": ["$shared_skills_count", 0]},
+        {"$multiply": [{"$ifNull": ["$followers_count", 0]}, 0.5]}
+    ]}
+
+    def __init__(self, db_collection):
+        self.collection = db_collection
+
+    def increment_counter(self, user_id: str, field: str, delta: int) -> Optional[Dict]:
+        """Atomically adjust a counter (never below zero) and recompute overall_score in the same write"""
+        if field not in self.COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+
+        return self.collection.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            [
+                {"$set": {field: {"$max": [0, {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}]}}},
+                {"$set": {"overall_score": self.OVERALL_SCORE_EXPR}}
+            ],
+            projection={**{name: 1 for name in self.SCORE_FIELDS}, "is_deactivated": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def find_top(self, field: str, limit: int) -> List[Dict]:
+        """Highest-scoring active users for a score field (served by a descending index)"""
+        return list(
+            self.collection.find(
+                {field: {"$gt": 0}, "is_deactivated": {"$ne": True}},
+                {field: 1}
+            )
+            .sort(field, -1)
+            .limit(limit)
+        )
+
+    def find_profiles(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Leaderboard display fields keyed by user ID"""
+        users = self.collection.find(
+            {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}},
+            self.PROFILE_FIELDS
+        )
+        return {str(user["_id"]): user for user in users}
+
+    def set_counters(self, counts: Dict[ObjectId, Dict[str, int]], reconciled_at: datetime) -> int:
+        """Overwrite counters with recounted values; users not in counts are reset to zero"""
+        operations = [
+            UpdateOne({"_id": user_id}, [
+                {"$set": {
+                    **{field: values.get(field, 0) for field in self.COUNTER_FIELDS},
+                    "counters_reconciled_at": reconciled_at
+                }},
+                {"$set": {"overall_score": self.OVERALL_SCORE_EXPR}}
+            ])
+            for user_id, values in counts.items()
+        ]
+        modified = 0
+        if operations:
+            modified = self.collection.bulk_write(operations, ordered=False).modified_count
+
+        # Users who lost all their followers, followees and skills since the last recount
+        reset = self.collection.update_many(
+            {
+                "counters_reconciled_at": {"$ne": reconciled_at},
+                "$or": [{field: {"$gt": 0}} for field in self.COUNTER_FIELDS]
+            },
+            {"$set": {
+                **{field: 0 for field in self.COUNTER_FIELDS},
+                "overall_score": 0,
+                "counters_reconciled_at": reconciled_at
+            }}
+        )
+        return modified + reset.modified_count
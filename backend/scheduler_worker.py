@@ -0,0 +1,16 @@
+"""Dedicated batch job worker.
+
+Run with ``python -m backend.scheduler_worker`` and set SCHEDULER_MODE=worker on
+the web processes so scheduled jobs run only here.
+"""
+import os
+import logging
+
+os.environ.setdefault('SCHEDULER_MODE', 'worker')
+
+from backend.app import app  # noqa: E402,F401 - builds the app and registers the jobs
+from backend.services.scheduler_service import job_scheduler  # noqa: E402
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    job_scheduler.run_forever()
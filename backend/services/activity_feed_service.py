@@ -2,8 +2,11 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from flask import g
 from bson import ObjectId
+from bson.errors import InvalidId
 import logging
+import os
 from backend.services.cache_service import CacheService
+from backend.repositories.feed_activity_repository import FeedActivityRepository
 from backend.repositories.user_relationship_repository import UserRelationshipRepository
 
 class ActivityFeedService:
@@ -19,68 +22,90 @@ class ActivityFeedService:
     SKILL_RATED = "skill_rated"
     ACHIEVEMENT_EARNED = "achievement_earned"
 
+    # Fan-out-on-write timelines
+    TIMELINE_PREFIX = f"{CacheService.FEED_PREFIX}timeline:"
+    PULL_ACTORS_KEY = f"{CacheService.FEED_PREFIX}pull_actors"
+    TIMELINE_MAX_LENGTH = int(os.getenv('FEED_TIMELINE_MAX_LENGTH', 500))
+    TIMELINE_TTL = int(os.getenv('FEED_TIMELINE_TTL', 604800))  # idle timelines expire after a week
+    FANOUT_FOLLOWER_LIMIT = int(os.getenv('FEED_FANOUT_FOLLOWER_LIMIT', 5000))
+    FANOUT_BATCH_SIZE = 500
+    FOLLOW_BACKFILL_LIMIT = 50
+    _EPOCH = datetime(1970, 1, 1)
+
     @staticmethod
-    def generate_user_feed(user_id: str, limit: int = 50, include_own: bool = False) -> Dict[str, Any]:
-        """Generate personalized activity feed for a user"""
+    def generate_user_feed(user_id: str, limit: int = 50, include_own: bool = False,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Read a page of the user's activity feed, newest first.
+        
+        Activities of ordinary accounts are pushed into the user's timeline when
+        they happen, so a page is a range read of that timeline plus a pull of
+        the few high-follower accounts the user follows.
+        """
+        
+        before, before_id = ActivityFeedService._decode_cursor(cursor)
         
         try:
-            # Check cache first
-            cached_feed = CacheService.get_user_feed(user_id)
-            if cached_feed is not None:
-                return {
-                    "activities": cached_feed,
-                    "total_count": len(cached_feed),
-                    "cached": True
-                }
+            timeline_key = ActivityFeedService._timeline_key(user_id)
+            before_score = ActivityFeedService._score(before) if before else None
+            before_member = str(before_id) if before_id else None
             
-            # Get users that this user follows
             relationship_repo = UserRelationshipRepository(g.db.user_relationships)
-            following_users = relationship_repo.get_following(user_id, limit=1000)
-            
-            following_ids = [str(follow["following_id"]) for follow in following_users]
+            activity_repo = FeedActivityRepository(g.db.feed_activities)
+            
+            page = CacheService.timeline_page(timeline_key, before_score, limit, ActivityFeedService.TIMELINE_TTL,
+                                              before_member=before_member)
+            if page is None and ActivityFeedService._rebuild_timeline(user_id):
+                page = CacheService.timeline_page(timeline_key, before_score, limit, ActivityFeedService.TIMELINE_TTL,
+                                                  before_member=before_member)
+            
+            if page is None:
+                # Timelines unavailable: read every followee's activities directly
+                activities = []
+                pull_actor_ids = relationship_repo.get_following_ids(user_id, limit=1000)
+            else:
+                activity_ids = [member for member, _ in page]
+                activities = activity_repo.find_by_ids(activity_ids)
+                
+                # Undone activities (e.g. unlikes) are dropped from timelines lazily
+                removed_ids = set(activity_ids) - {str(activity["_id"]) for activity in activities}
+                if removed_ids:
+                    CacheService.timeline_remove(timeline_key, list(removed_ids))
+                
+                pull_actors = ActivityFeedService._get_pull_actors()
+                pull_actor_ids = relationship_repo.get_following_ids(user_id, among=pull_actors) if pull_actors else []
             
-            # Include own activities if requested
             if include_own:
-                following_ids.append(user_id)
+                pull_actor_ids.append(user_id)
+            activities.extend(activity_repo.find_by_actors(pull_actor_ids, before, limit, before_id=before_id))
+            
+            # Merge push and pull results in (timestamp, _id) order, matching the cursor
+            unique_activities = {str(activity["_id"]): activity for activity in activities}
+            activities = sorted(unique_activities.values(),
+                                key=lambda x: (x.get('timestamp', datetime.min), str(x["_id"])), reverse=True)
+            activities = activities[:limit]
             
-            if not following_ids:
+            if not activities and before is None and relationship_repo.get_following_count(user_id) == 0:
                 # User doesn't follow anyone, show popular/trending content
                 return ActivityFeedService._generate_discovery_feed(user_id, limit)
             
-            # Generate feed from followed users' activities
-            activities = []
-            
-            # Get skill sharing activities
-            skill_activities = ActivityFeedService._get_skill_activities(following_ids, limit)
-            activities.extend(skill_activities)
-            
-            # Get social activities
-            social_activities = ActivityFeedService._get_social_activities(following_ids, limit)
-            activities.extend(social_activities)
+            next_cursor = None
+            if len(activities) == limit:
+                next_cursor = ActivityFeedService._encode_cursor(activities[-1]["timestamp"], activities[-1]["_id"])
             
-            # Get engagement activities
-            engagement_activities = ActivityFeedService._get_engagement_activities(following_ids, limit)
-            activities.extend(engagement_activities)
-            
-            # Sort by timestamp and limit
-            activities.sort(key=lambda x: x.get('timestamp', datetime.min), reverse=True)
-            activities = activities[:limit]
-            
-            # Enrich activities with additional data
+            # Enrich activities with current counts and display data
+            ActivityFeedService._attach_skill_counts(activities)
             enriched_activities = ActivityFeedService._enrich_activities(activities)
             
-            # Cache the feed
-            CacheService.cache_user_feed(user_id, enriched_activities, CacheService.SHORT_TTL)
-            
             return {
                 "activities": enriched_activities,
                 "total_count": len(enriched_activities),
-                "cached": False
+                "next_cursor": next_cursor,
+                "cached": page is not None
             }
             
         except Exception as e:
             logging.error(f"Error generating user feed for {user_id}: {e}")
-            return {"activities": [], "total_count": 0, "error": str(e)}
+            return {"activities": [], "total_count": 0, "next_cursor": None, "error": str(e)}
 
     @staticmethod
     def _generate_discovery_feed(user_id: str, limit: int) -> Dict[str, Any]:
@@ -114,160 +139,216 @@ class ActivityFeedService:
             logging.error(f"Error generating discovery feed: {e}")
             return {"activities": [], "total_count": 0}
 
+    # Fan-out on write
+
     @staticmethod
-    def _get_skill_activities(user_ids: List[str], limit: int) -> List[Dict]:
-        """Get skill-related activities from followed users"""
+    def record_activity(actor_id: str, activity_type: str, skill: Optional[Dict] = None,
+                        target_user: Optional[Dict] = None) -> Optional[Dict]:
+        """Store an activity once and push it into the timelines of the actor's followers"""
         
         try:
-            # Get recent skill shares
-            cutoff_date = datetime.utcnow() - timedelta(days=7)
-            
-            pipeline = [
-                {"$match": {
-                    "shared_by": {"$in": [ObjectId(uid) for uid in user_ids]},
-                    "created_at": {"$gte": cutoff_date},
-                    "visibility": "public"
-                }},
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "shared_by",
-                    "foreignField": "_id",
-                    "as": "user_info"
-                }},
-                {"$unwind": "$user_info"},
-                {"$project": {
-                    "activity_type": {"$literal": ActivityFeedService.SKILL_SHARED},
-                    "timestamp": "$created_at",
-                    "user_id": "$shared_by",
-                    "username": "$user_info.username",
-                    "user_avatar": "$user_info.profile_picture",
-                    "skill_id": "$_id",
-                    "skill_title": "$title",
-                    "skill_description": "$description",
-                    "skill_category": "$category",
-                    "skill_difficulty": "$difficulty",
-                    "likes_count": "$likes_count",
-                    "downloads_count": "$downloads_count"
-                }},
-                {"$sort": {"timestamp": -1}},
-                {"$limit": limit}
-            ]
+            actor = g.db.users.find_one({"_id": ObjectId(actor_id)}, {"username": 1, "profile_picture": 1}) or {}
+            
+            activity = {
+                "activity_type": activity_type,
+                "timestamp": datetime.utcnow(),
+                "user_id": ObjectId(actor_id),
+                "username": actor.get("username"),
+                "user_avatar": actor.get("profile_picture")
+            }
             
-            return list(g.db.shared_skills.aggregate(pipeline))
+            if skill:
+                activity.update({
+                    "skill_id": skill["_id"],
+                    "skill_title": skill.get("title"),
+                    "skill_description": skill.get("description"),
+                    "skill_category": skill.get("category"),
+                    "skill_difficulty": skill.get("difficulty")
+                })
+            
+            if target_user:
+                activity.update({
+                    "target_user_id": target_user["_id"],
+                    "target_username": target_user.get("username"),
+                    "target_avatar": target_user.get("profile_picture")
+                })
+            
+            FeedActivityRepository(g.db.feed_activities).create(activity)
+            ActivityFeedService._fan_out(actor_id, activity)
+            return activity
             
         except Exception as e:
-            logging.error(f"Error getting skill activities: {e}")
-            return []
+            logging.error(f"Error recording {activity_type} activity for {actor_id}: {e}")
+            return None
 
     @staticmethod
-    def _get_social_activities(user_ids: List[str], limit: int) -> List[Dict]:
-        """Get social activities from followed users"""
+    def remove_activity(actor_id: str, activity_type: str, skill_id: str):
+        """Remove an undone activity; follower timelines drop it on their next read"""
         
         try:
-            activities = []
-            cutoff_date = datetime.utcnow() - timedelta(days=3)
+            FeedActivityRepository(g.db.feed_activities).delete_activity(actor_id, activity_type, skill_id)
+        except Exception as e:
+            logging.error(f"Error removing {activity_type} activity for {actor_id}: {e}")
+
+    @staticmethod
+    def _fan_out(actor_id: str, activity: Dict) -> int:
+        """Push an activity into follower timelines; high-follower accounts are pulled at read time instead"""
+        
+        relationship_repo = UserRelationshipRepository(g.db.user_relationships)
+        
+        if relationship_repo.get_follower_count(actor_id) > ActivityFeedService.FANOUT_FOLLOWER_LIMIT:
+            ActivityFeedService._mark_pull_actor(actor_id)
+            return 0
+        
+        entry = {str(activity["_id"]): ActivityFeedService._score(activity["timestamp"])}
+        pushed = 0
+        
+        for follower_ids in relationship_repo.iter_follower_ids(actor_id, ActivityFeedService.FANOUT_BATCH_SIZE):
+            keys = [ActivityFeedService._timeline_key(follower_id) for follower_id in follower_ids]
+            pushed += CacheService.timeline_push(keys, entry, ActivityFeedService.TIMELINE_MAX_LENGTH)
+        
+        return pushed
+
+    @staticmethod
+    def _rebuild_timeline(user_id: str) -> bool:
+        """Build a missing timeline from the stored activities of the user's followees"""
+        
+        if not CacheService.is_available():
+            return False
+        
+        try:
+            relationship_repo = UserRelationshipRepository(g.db.user_relationships)
+            activity_repo = FeedActivityRepository(g.db.feed_activities)
             
-            # Get follow activities
-            follow_pipeline = [
-                {"$match": {
-                    "follower_id": {"$in": [ObjectId(uid) for uid in user_ids]},
-                    "relationship_type": "follow",
-                    "created_at": {"$gte": cutoff_date}
-                }},
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "follower_id",
-                    "foreignField": "_id",
-                    "as": "follower_info"
-                }},
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "following_id",
-                    "foreignField": "_id",
-                    "as": "following_info"
-                }},
-                {"$unwind": "$follower_info"},
-                {"$unwind": "$following_info"},
-                {"$project": {
-                    "activity_type": {"$literal": ActivityFeedService.USER_FOLLOWED},
-                    "timestamp": "$created_at",
-                    "user_id": "$follower_id",
-                    "username": "$follower_info.username",
-                    "user_avatar": "$follower_info.profile_picture",
-                    "target_user_id": "$following_id",
-                    "target_username": "$following_info.username",
-                    "target_avatar": "$following_info.profile_picture"
-                }},
-                {"$sort": {"timestamp": -1}},
-                {"$limit": limit // 2}
+            pull_actors = set(ActivityFeedService._get_pull_actors())
+            following_ids = [
+                following_id for following_id in relationship_repo.get_following_ids(user_id, limit=1000)
+                if following_id not in pull_actors
             ]
             
-            follow_activities = list(g.db.user_relationships.aggregate(follow_pipeline))
-            activities.extend(follow_activities)
+            recent_activities = activity_repo.find_by_actors(following_ids, limit=ActivityFeedService.TIMELINE_MAX_LENGTH)
+            entries = {
+                str(activity["_id"]): ActivityFeedService._score(activity["timestamp"])
+                for activity in recent_activities
+            }
             
-            return activities
+            return CacheService.timeline_fill(
+                ActivityFeedService._timeline_key(user_id),
+                entries,
+                ActivityFeedService.TIMELINE_MAX_LENGTH,
+                ActivityFeedService.TIMELINE_TTL
+            )
             
         except Exception as e:
-            logging.error(f"Error getting social activities: {e}")
-            return []
+            logging.error(f"Error rebuilding timeline for {user_id}: {e}")
+            return False
 
     @staticmethod
-    def _get_engagement_activities(user_ids: List[str], limit: int) -> List[Dict]:
-        """Get engagement activities from analytics data"""
+    def on_follow(follower_id: str, following_id: str, following_user: Optional[Dict] = None):
+        """Backfill a new followee's recent activities and announce the follow"""
         
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=2)
-            
-            # Get high-engagement activities (likes, downloads, comments)
-            pipeline = [
-                {"$match": {
-                    "user_id": {"$in": [ObjectId(uid) for uid in user_ids]},
-                    "timestamp": {"$gte": cutoff_date},
-                    "event_type": {"$in": ["skill_like", "skill_download", "skill_comment"]}
-                }},
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user_info"
-                }},
-                {"$lookup": {
-                    "from": "shared_skills",
-                    "localField": "skill_id",
-                    "foreignField": "_id",
-                    "as": "skill_info"
-                }},
-                {"$unwind": "$user_info"},
-                {"$unwind": "$skill_info"},
-                {"$project": {
-                    "activity_type": {
-                        "$switch": {
-                            "branches": [
-                                {"case": {"$eq": ["$event_type", "skill_like"]}, "then": ActivityFeedService.SKILL_LIKED},
-                                {"case": {"$eq": ["$event_type", "skill_download"]}, "then": ActivityFeedService.SKILL_DOWNLOADED},
-                                {"case": {"$eq": ["$event_type", "skill_comment"]}, "then": ActivityFeedService.SKILL_COMMENTED}
-                            ],
-                            "default": "unknown"
-                        }
-                    },
-                    "timestamp": "$timestamp",
-                    "user_id": "$user_id",
-                    "username": "$user_info.username",
-                    "user_avatar": "$user_info.profile_picture",
-                    "skill_id": "$skill_id",
-                    "skill_title": "$skill_info.title",
-                    "skill_category": "$skill_info.category",
-                    "metadata": "$metadata"
-                }},
-                {"$sort": {"timestamp": -1}},
-                {"$limit": limit}
-            ]
-            
-            return list(g.db.analytics_events.aggregate(pipeline))
-            
+            if following_id not in ActivityFeedService._get_pull_actors():
+                recent = FeedActivityRepository(g.db.feed_activities).find_ids_by_actor(
+                    following_id, limit=ActivityFeedService.FOLLOW_BACKFILL_LIMIT
+                )
+                entries = {str(activity["_id"]): ActivityFeedService._score(activity["timestamp"]) for activity in recent}
+                CacheService.timeline_push(
+                    [ActivityFeedService._timeline_key(follower_id)], entries, ActivityFeedService.TIMELINE_MAX_LENGTH
+                )
         except Exception as e:
-            logging.error(f"Error getting engagement activities: {e}")
-            return []
+            logging.error(f"Error backfilling timeline of {follower_id}: {e}")
+        
+        ActivityFeedService.record_activity(
+            follower_id,
+            ActivityFeedService.USER_FOLLOWED,
+            target_user=following_user or {"_id": ObjectId(following_id)}
+        )
+
+    @staticmethod
+    def on_unfollow(follower_id: str, following_id: str):
+        """Remove an unfollowed user's activities from the follower's timeline"""
+        
+        try:
+            recent = FeedActivityRepository(g.db.feed_activities).find_ids_by_actor(
+                following_id, limit=ActivityFeedService.TIMELINE_MAX_LENGTH
+            )
+            CacheService.timeline_remove(
+                ActivityFeedService._timeline_key(follower_id),
+                [str(activity["_id"]) for activity in recent]
+            )
+        except Exception as e:
+            logging.error(f"Error trimming timeline of {follower_id}: {e}")
+
+    @staticmethod
+    def _mark_pull_actor(user_id: str):
+        """Flag an account whose activities are too widely followed to fan out"""
+        result = g.db.users.update_one(
+            {"_id": ObjectId(user_id), "feed_pull": {"$ne": True}},
+            {"$set": {"feed_pull": True}}
+        )
+        if result.modified_count:
+            logging.info(f"User {user_id} switched to pull-based feed delivery")
+            CacheService.delete(ActivityFeedService.PULL_ACTORS_KEY)
+
+    @staticmethod
+    def _get_pull_actors() -> List[str]:
+        """IDs of accounts whose activities are read on demand rather than fanned out"""
+        return CacheService.get_or_set(
+            ActivityFeedService.PULL_ACTORS_KEY,
+            lambda: [str(user["_id"]) for user in g.db.users.find({"feed_pull": True}, {"_id": 1})],
+            CacheService.MEDIUM_TTL
+        ) or []
+
+    @staticmethod
+    def _attach_skill_counts(activities: List[Dict]):
+        """Add current like/download/comment counts to skill activities in one query"""
+        
+        skill_ids = list({activity["skill_id"] for activity in activities if activity.get("skill_id")})
+        if not skill_ids:
+            return
+        
+        try:
+            counts = {
+                skill["_id"]: skill for skill in g.db.shared_skills.find(
+                    {"_id": {"$in": skill_ids}},
+                    {"likes_count": 1, "downloads_count": 1, "comments_count": 1}
+                )
+            }
+            for activity in activities:
+                skill = counts.get(activity.get("skill_id"))
+                if skill:
+                    activity["likes_count"] = skill.get("likes_count", 0)
+                    activity["downloads_count"] = skill.get("downloads_count", 0)
+                    activity["comments_count"] = skill.get("comments_count", 0)
+        except Exception as e:
+            logging.error(f"Error loading skill counts for feed: {e}")
+
+    @staticmethod
+    def _timeline_key(user_id: str) -> str:
+        return f"{ActivityFeedService.TIMELINE_PREFIX}{user_id}"
+
+    @staticmethod
+    def _score(timestamp: datetime) -> int:
+        """Timeline score: milliseconds since the epoch"""
+        return int((timestamp - ActivityFeedService._EPOCH).total_seconds() * 1000)
+
+    @staticmethod
+    def _encode_cursor(timestamp: datetime, activity_id: ObjectId) -> str:
+        """Position after the last activity of a page: its timeline score and _id break ties"""
+        return f"{ActivityFeedService._score(timestamp)}:{activity_id}"
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> tuple:
+        """(timestamp, activity _id) of a cursor; cursors without an _id skip the whole millisecond"""
+        if not cursor:
+            return None, None
+        try:
+            score, _, activity_id = cursor.partition(":")
+            before = ActivityFeedService._EPOCH + timedelta(milliseconds=int(score))
+            return before, ObjectId(activity_id) if activity_id else None
+        except (TypeError, ValueError, OverflowError, InvalidId):
+            raise ValueError("Invalid feed cursor")
 
     @staticmethod
     def _get_trending_skills(limit: int) -> List[Dict]:
@@ -501,20 +582,9 @@ class ActivityFeedService:
 
     @staticmethod
     def invalidate_user_feed(user_id: str):
-        """Invalidate user's cached activity feed"""
+        """Drop the user's timeline so the next read rebuilds it from stored activities"""
         CacheService.invalidate_user_feed(user_id)
-        
-        # Also invalidate feeds of users who follow this user
-        try:
-            relationship_repo = UserRelationshipRepository(g.db.user_relationships)
-            followers = relationship_repo.get_followers(user_id, limit=1000)
-            
-            for follower in followers:
-                follower_id = str(follower["follower_id"])
-                CacheService.invalidate_user_feed(follower_id)
-                
-        except Exception as e:
-            logging.error(f"Error invalidating follower feeds: {e}")
+        CacheService.delete(ActivityFeedService._timeline_key(user_id))
 
     @staticmethod
     def get_global_feed(limit: int = 100) -> Dict[str, Any]:
@@ -1,17 +1,121 @@
 import os
-import httpx
+import re
 import json
+import hashlib
 import logging
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from backend.services.resource_service import ResourceService
+from backend.services.cache_service import CacheService, LocalLRUCache, _MISSING
+from backend.services.http_client_service import http_client_service
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL_NAME = os.getenv("AI_MODEL_NAME", "deepseek/deepseek-r1-0528:free")
 
+class PlanCache:
+    """Shared plan cache: bounded in-process LRU in front of Redis, versioned by model"""
+    
+    KEY_PREFIX = "ai_plan:"
+    FORMAT_VERSION = 2  # bump when the plan structure or topic normalization changes
+    
+    TOPIC_SYNONYMS = {
+        "js": "javascript",
+        "javascript es6": "javascript",
+        "ts": "typescript",
+        "py": "python",
+        "python3": "python",
+        "golang": "go",
+        "cpp": "c++",
+        "c plus plus": "c++",
+        "c sharp": "c#",
+        "csharp": "c#",
+        "reactjs": "react",
+        "react js": "react",
+        "react.js": "react",
+        "nodejs": "node.js",
+        "node js": "node.js",
+        "ml": "machine learning",
+        "ai": "artificial intelligence",
+        "ds": "data science",
+        "ui ux": "ui/ux design",
+        "ux ui": "ui/ux design"
+    }
+    # Only phrases that ask to be taught; "learning", "basics" etc. can be part of the subject
+    FILLER_PREFIXES = (
+        "learn how to ", "learn ", "how to ", "introduction to ", "intro to ", "getting started with "
+    )
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.ttl = int(os.getenv('AI_PLAN_CACHE_TTL', 7 * 86400))
+        self.max_entry_bytes = int(os.getenv('AI_PLAN_CACHE_MAX_ENTRY_BYTES', 256 * 1024))
+        self._local = LocalLRUCache(int(os.getenv('AI_PLAN_CACHE_MAX_ENTRIES', 200)), self.ttl)
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "stored": 0, "rejected_too_large": 0}
+    
+    @classmethod
+    def normalize_topic(cls, topic: str) -> str:
+        """Fold case, whitespace, punctuation and common synonyms so equivalent topics share a key
+
+        Synonyms replace the whole topic only, so "ai" matches "artificial
+        intelligence" but "ai art" stays as it is.
+        """
+        normalized = re.sub(r"[^\w\s+#./]", " ", topic.lower())
+        normalized = re.sub(r"\s+", " ", normalized).strip()
+        
+        for prefix in cls.FILLER_PREFIXES:
+            if normalized.startswith(prefix) and len(normalized) > len(prefix):
+                normalized = normalized[len(prefix):]
+                break
+        
+        return cls.TOPIC_SYNONYMS.get(normalized, normalized)
+    
+    def make_key(self, topic: str, plan_type: str) -> str:
+        topic_hash = hashlib.sha1(self.normalize_topic(topic).encode('utf-8')).hexdigest()
+        model_hash = hashlib.sha1(self.model_name.encode('utf-8')).hexdigest()[:12]
+        return f"{self.KEY_PREFIX}v{self.FORMAT_VERSION}:{model_hash}:{plan_type}:{topic_hash}"
+    
+    def get(self, topic: str, plan_type: str) -> Optional[List[Dict[str, Any]]]:
+        key = self.make_key(topic, plan_type)
+        
+        plan = self._local.get(key)
+        if plan is not _MISSING:
+            self.stats["local_hits"] += 1
+            return plan
+        
+        plan = CacheService.get(key)
+        if plan is not None:
+            self.stats["shared_hits"] += 1
+            self._local.set(key, plan, self.ttl)
+            return plan
+        
+        self.stats["misses"] += 1
+        return None
+    
+    def set(self, topic: str, plan_type: str, plan: List[Dict[str, Any]]) -> bool:
+        size = len(json.dumps(plan, default=str))
+        if size > self.max_entry_bytes:
+            self.stats["rejected_too_large"] += 1
+            logging.warning(f"Not caching plan for {topic}: {size} bytes exceeds {self.max_entry_bytes}")
+            return False
+        
+        key = self.make_key(topic, plan_type)
+        self._local.set(key, plan, self.ttl)
+        self.stats["stored"] += 1
+        return CacheService.set(key, plan, self.ttl)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "format_version": self.FORMAT_VERSION,
+            "local_entries": len(self._local),
+            "local_max_entries": self._local.max_entries,
+            "ttl_seconds": self.ttl,
+            **self.stats
+        }
+
 class AIService:
-    _plan_cache = {}
+    _plan_cache = PlanCache(MODEL_NAME)
     _last_api_call = 0
     _api_cooldown = 60  
     
@@ -24,10 +128,10 @@ class AIService:
         3. Fall back to local template generation
         """
         
-        cache_key = f"{topic.lower().strip()}_{plan_type}"
-        if cache_key in AIService._plan_cache:
+        cached_plan = AIService._plan_cache.get(topic, plan_type)
+        if cached_plan is not None:
             logging.info(f"Using cached plan for {topic}")
-            return AIService._plan_cache[cache_key]
+            return cached_plan
         
         current_time = time.time()
         if current_time - AIService._last_api_call < AIService._api_cooldown:
@@ -37,7 +141,7 @@ class AIService:
         if OPENROUTER_API_KEY:
             try:
                 plan = await AIService._generate_ai_plan(topic, plan_type)
-                AIService._plan_cache[cache_key] = plan
+                AIService._plan_cache.set(topic, plan_type, plan)
                 AIService._last_api_call = current_time
                 return plan
             except Exception as e:
@@ -63,37 +167,36 @@ class AIService:
         """
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:  
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": MODEL_NAME,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "response_format": {"type": "json_object"},
-                        "max_tokens": 4000,  
-                        "temperature": 0.7
-                    }
-                )
-                
-                if response.status_code == 429:  
-                    raise Exception("Rate limited by AI service")
-                
-                response.raise_for_status()
-                response_data = response.json()
-                ai_response_content = response_data["choices"][0]["message"]["content"]
-                
-                parsed_plan = json.loads(ai_response_content)
-                
-                if isinstance(parsed_plan, dict) and "daily_tasks" in parsed_plan:
-                   
-                    enhanced_plan = AIService._enhance_plan_with_resources(parsed_plan["daily_tasks"], topic)
-                    return enhanced_plan
-                
-                raise ValueError("Invalid AI response format")
+            response = await http_client_service.post(
+                "https://openrouter.ai/api/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": MODEL_NAME,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "response_format": {"type": "json_object"},
+                    "max_tokens": 4000,  
+                    "temperature": 0.7
+                }
+            )
+            
+            if response.status_code == 429:  
+                raise Exception("Rate limited by AI service")
+            
+            response.raise_for_status()
+            response_data = response.json()
+            ai_response_content = response_data["choices"][0]["message"]["content"]
+            
+            parsed_plan = json.loads(ai_response_content)
+            
+            if isinstance(parsed_plan, dict) and "daily_tasks" in parsed_plan:
+               
+                enhanced_plan = AIService._enhance_plan_with_resources(parsed_plan["daily_tasks"], topic)
+                return enhanced_plan
+            
+            raise ValueError("Invalid AI response format")
                 
         except Exception as e:
             logging.error(f"AI service error: {e}")
@@ -206,9 +309,6 @@ class AIService:
         
         enhanced_plan = AIService._enhance_plan_with_resources(plan, topic)
         
-        cache_key = f"{topic.lower().strip()}_{plan_type}"
-        AIService._plan_cache[cache_key] = enhanced_plan
-        
         logging.info(f"Generated local plan for {topic} with {len(enhanced_plan)} days")
         return enhanced_plan
     
@@ -0,0 +1,269 @@
+import os
+import atexit
+import logging
+import threading
+import time
+import pymongo
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pymongo.errors import BulkWriteError, PyMongoError, ServerSelectionTimeoutError
+from backend.repositories.analytics_repository import AnalyticsRepository
+from backend.services.database_service import DatabaseService
+from backend.services.distinct_user_counter import DistinctUserCounter
+
+
+class AnalyticsIngestService:
+    """Write-behind buffer for analytics events.
+
+    ``track_event`` appends to a bounded in-process buffer and returns; a
+    daemon flusher thread per worker process writes the buffer with unordered
+    ``insert_many`` once ``batch_size`` events are waiting or every
+    ``flush_interval`` seconds. When the buffer is full the overflow policy
+    decides what gives: ``drop_oldest`` (ring buffer), ``drop_newest``, or
+    ``block`` (wait up to ``block_timeout`` for the flusher, then drop).
+    Whatever is buffered is written on shutdown.
+    """
+
+    POLICY_DROP_OLDEST = "drop_oldest"
+    POLICY_DROP_NEWEST = "drop_newest"
+    POLICY_BLOCK = "block"
+
+    FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', 1.0))
+    MAX_RETRY_BACKOFF = 30.0
+    # Client-side limit on each write attempt, including the _id lookup below
+    WRITE_TIMEOUT = float(os.getenv('ANALYTICS_WRITE_TIMEOUT', 10.0))
+    # A retried batch keeps the _ids of its first insert attempt only while
+    # they are younger than this; older events that did not go in get fresh
+    # _ids before the next attempt. No attempt starts with an _id older than
+    # REUSE_ID_SECONDS and none runs longer than WRITE_TIMEOUT, so consumers
+    # reading events in _id order (EngagementAggregator,
+    # AnalyticsRollupAggregator) see every event if they stay this far behind,
+    # however long the database is unavailable.
+    REUSE_ID_SECONDS = 20.0
+    SETTLE_SECONDS = REUSE_ID_SECONDS + WRITE_TIMEOUT + 15
+
+    def __init__(self):
+        self.enabled = os.getenv('ANALYTICS_WRITE_BEHIND', 'true').lower() == 'true'
+        self.capacity = int(os.getenv('ANALYTICS_BUFFER_SIZE', 10000))
+        self.batch_size = int(os.getenv('ANALYTICS_FLUSH_BATCH_SIZE', 500))
+        self.flush_interval = self.FLUSH_INTERVAL
+        self.overflow_policy = os.getenv('ANALYTICS_OVERFLOW_POLICY', self.POLICY_DROP_OLDEST).lower()
+        self.block_timeout = float(os.getenv('ANALYTICS_BLOCK_TIMEOUT', 0.05))
+
+        self._buffer: deque = deque()
+        self._condition = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._closing = False
+        self._failures = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats: Dict[str, Any] = {
+            "enqueued": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "failed": 0,
+            "requeued": 0,
+            "reissued": 0,
+            "flushes": 0,
+            "high_water_mark": 0,
+            "total_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_flush_ms": 0.0,
+            "last_flush_at": None
+        }
+
+    def _analytics_repo(self) -> AnalyticsRepository:
+        return AnalyticsRepository(DatabaseService.get_database().analytics_events)
+
+    def _ensure_flusher(self):
+        """Start the flusher thread lazily, once per process (threads do not survive fork)"""
+        if self._thread_pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread_pid == os.getpid():
+                return
+            # A forked child inherits the parent's buffer, which the parent
+            # writes itself, and possibly a held lock, so both start over
+            self._condition = threading.Condition()
+            self._buffer = deque()
+            self._closing = False
+            self._failures = 0
+            self._reset_stats()
+            self._thread = threading.Thread(target=self._run, name="analytics-flusher", daemon=True)
+            self._thread.start()
+            self._thread_pid = os.getpid()
+
+    def enqueue(self, event: Dict) -> bool:
+        """Buffer an event for the next flush; False if it was dropped"""
+        if not self.enabled:
+            self._analytics_repo().record_events([event])
+            DistinctUserCounter.record([event])
+            return True
+
+        self._ensure_flusher()
+        with self._condition:
+            if len(self._buffer) >= self.capacity:
+                if self.overflow_policy == self.POLICY_BLOCK:
+                    self._condition.notify_all()
+                    if not self._condition.wait_for(lambda: len(self._buffer) < self.capacity, self.block_timeout):
+                        self.stats["dropped"] += 1
+                        return False
+                elif self.overflow_policy == self.POLICY_DROP_NEWEST:
+                    self.stats["dropped"] += 1
+                    return False
+                else:
+                    self._buffer.popleft()
+                    self.stats["dropped"] += 1
+
+            self._buffer.append(event)
+            self.stats["enqueued"] += 1
+            depth = len(self._buffer)
+            if depth > self.stats["high_water_mark"]:
+                self.stats["high_water_mark"] = depth
+            if depth >= self.batch_size:
+                self._condition.notify_all()
+
+        return True
+
+    def _take_batch(self) -> List[Dict]:
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        # Wake producers waiting for space under the block policy
+        self._condition.notify_all()
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closing or len(self._buffer) >= self.batch_size,
+                    self.flush_interval
+                )
+                if self._closing:
+                    return
+                batch = self._take_batch()
+
+            if batch and not self._write(batch):
+                time.sleep(min(self.flush_interval * 2 ** min(self._failures, 5), self.MAX_RETRY_BACKOFF))
+
+    def _write(self, batch: List[Dict]) -> bool:
+        """Insert one batch; returns False if it should be retried after a backoff"""
+        started = time.perf_counter()
+        pending = batch
+        try:
+            with pymongo.timeout(self.WRITE_TIMEOUT):
+                pending = self._reissue_stale_ids(batch)
+                inserted = self._analytics_repo().record_events(pending)
+            inserted += len(batch) - len(pending)
+        except BulkWriteError as e:
+            # Unordered: everything except the reported documents went in.
+            # Duplicate keys are events a previous, interrupted attempt already wrote.
+            write_errors = e.details.get("writeErrors", [])
+            rejected = sum(1 for error in write_errors if error.get("code") != 11000)
+            inserted = e.details.get("nInserted", 0) + len(batch) - len(pending)
+            self.stats["failed"] += rejected
+            if rejected:
+                logging.error(f"Analytics flush rejected {rejected} of {len(batch)} events: {write_errors[0].get('errmsg')}")
+        except PyMongoError as e:
+            self._failures += 1
+            if isinstance(e, ServerSelectionTimeoutError):
+                # Nothing was sent, so let the retry assign fresh _ids; the
+                # engagement aggregator reads events in _id order
+                for event in pending:
+                    event.pop("_id", None)
+            self._requeue(pending)
+            logging.warning(f"Analytics flush of {len(pending)} events failed, requeued: {e}")
+            return False
+
+        self._failures = 0
+        self._observe_flush(inserted, (time.perf_counter() - started) * 1000)
+        # PFADD is idempotent, so events written by an earlier attempt can be added again
+        DistinctUserCounter.record(batch)
+        return True
+
+    def _reissue_stale_ids(self, batch: List[Dict]) -> List[Dict]:
+        """Drop events an earlier attempt wrote and give fresh _ids to the rest, if their _ids are too old to reuse.
+
+        ObjectIds carry the time of the first insert attempt, which assigned
+        them. An attempt that failed after the server committed the write
+        (rather than before) can rarely leave an event written twice.
+        """
+        now = time.time()
+        stale = [event for event in batch
+                 if "_id" in event and now - event["_id"].generation_time.timestamp() >= self.REUSE_ID_SECONDS]
+        if not stale:
+            return batch
+
+        written = self._analytics_repo().find_existing_ids([event["_id"] for event in stale])
+        for event in stale:
+            if event["_id"] not in written:
+                event.pop("_id")
+                self.stats["reissued"] += 1
+        return [event for event in batch if event.get("_id") not in written]
+
+    def _requeue(self, batch: List[Dict]):
+        """Put a failed batch back ahead of newer events, as far as capacity allows"""
+        with self._condition:
+            room = max(self.capacity - len(self._buffer), 0)
+            kept = batch[:room]
+            self._buffer.extendleft(reversed(kept))
+            self.stats["requeued"] += len(kept)
+            self.stats["dropped"] += len(batch) - len(kept)
+
+    def _observe_flush(self, inserted: int, latency_ms: float):
+        self.stats["flushed"] += inserted
+        self.stats["flushes"] += 1
+        self.stats["total_flush_ms"] += latency_ms
+        self.stats["last_flush_ms"] = latency_ms
+        self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], latency_ms)
+        self.stats["last_flush_at"] = datetime.utcnow()
+
+    def close(self):
+        """Stop the flusher and write everything still buffered (graceful shutdown)"""
+        if self._thread_pid != os.getpid():
+            return
+
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=10)
+
+        remaining = len(self._buffer)
+        while self._buffer:
+            with self._condition:
+                batch = self._take_batch()
+            if not self._write(batch):
+                # The database is gone; retrying would only hold up shutdown
+                self.stats["dropped"] += len(self._buffer)
+                self._buffer.clear()
+
+        if remaining:
+            logging.info(f"Flushed {remaining} buffered analytics events on shutdown")
+        self._thread = None
+        self._thread_pid = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth, drop counts and flush latency for this worker process"""
+        flushes = self.stats["flushes"]
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive(),
+            "overflow_policy": self.overflow_policy,
+            "capacity": self.capacity,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "queue_depth": len(self._buffer),
+            "avg_flush_ms": round(self.stats["total_flush_ms"] / flushes, 1) if flushes else 0,
+            **{key: round(value, 1) if isinstance(value, float) else value
+               for key, value in self.stats.items() if key != "total_flush_ms"}
+        }
+
+# Global analytics ingestion instance
+analytics_ingest_service = AnalyticsIngestService()
+
+atexit.register(analytics_ingest_service.close)
@@ -0,0 +1,175 @@
+import os
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+from bson import ObjectId
+from pymongo import UpdateOne
+from backend.repositories.analytics_repository import AnalyticsRepository
+from backend.repositories.analytics_rollup_repository import AnalyticsRollupRepository
+from backend.repositories.checkpoint_repository import CheckpointRepository
+from backend.services.analytics_ingest_service import AnalyticsIngestService
+from backend.services.bulk_writer import BulkWriter
+
+class AnalyticsRollupAggregator:
+    """Folds new analytics events into hourly rollups and compacts old hours into days.
+
+    Runs resume after the last processed ``analytics_events`` _id, like the
+    engagement aggregator. Once a range is written the checkpoint's applied
+    position moves, and ``AnalyticsRepository`` answers window queries from
+    the rollups plus the raw events after that position. A range whose run
+    failed is applied again by a later run; hourly documents record the last
+    range added to them, so the increments already written are skipped.
+    Hourly documents older than ``HOURLY_RETENTION_DAYS`` (counted from the
+    applied position) are folded into daily documents.
+    """
+
+    CHECKPOINT_NAME = AnalyticsRepository.ROLLUP_CHECKPOINT
+
+    BATCH_SIZE = int(os.getenv('ANALYTICS_ROLLUP_BATCH_SIZE', 10000))
+    MAX_BATCHES_PER_RUN = int(os.getenv('ANALYTICS_ROLLUP_MAX_BATCHES_PER_RUN', 20))
+    HOURLY_RETENTION_DAYS = int(os.getenv('ANALYTICS_ROLLUP_HOURLY_DAYS', 2))
+    MAX_DAYS_COMPACTED_PER_RUN = 30
+    # Newer events may still be committing out of _id order (retried flushes)
+    SETTLE_SECONDS = AnalyticsIngestService.SETTLE_SECONDS
+    # Events are kept for 90 days (BatchProcessor.cleanup_old_data), so the
+    # first runs backfill that much history
+    INITIAL_LOOKBACK = timedelta(days=90)
+    CLAIM_TIMEOUT = timedelta(minutes=10)  # a claimed range not applied by then is applied again
+
+    def __init__(self, db):
+        self.db = db
+        self.checkpoints = CheckpointRepository(db.batch_checkpoints)
+        self.rollups = AnalyticsRollupRepository(db.analytics_rollups)
+
+    def run(self) -> Dict[str, Any]:
+        """Roll up every settled event since the checkpoint, then compact old hours"""
+        now = datetime.utcnow()
+        upper_bound = ObjectId.from_datetime(now - timedelta(seconds=self.SETTLE_SECONDS))
+        checkpoint = self.checkpoints.get_or_create(
+            self.CHECKPOINT_NAME, ObjectId.from_datetime(now - self.INITIAL_LOOKBACK)
+        )
+        last_event_id = checkpoint["last_event_id"]
+
+        summary = {"events": 0, "rollups": 0, "batches": 0, "days_compacted": 0, "reapplied": 0}
+        pending = self.checkpoints.reclaim_pending(self.CHECKPOINT_NAME, now - self.CLAIM_TIMEOUT)
+        if pending:
+            events = self._load_range(pending["applied_event_id"], pending["last_event_id"])
+            logging.warning(f"Re-applying {len(events)} analytics rollup events from an unfinished run")
+            summary["rollups"] += self._apply(events, pending["last_event_id"])
+            self.checkpoints.mark_applied(self.CHECKPOINT_NAME, pending["last_event_id"])
+            summary["reapplied"] = len(events)
+
+        for _ in range(self.MAX_BATCHES_PER_RUN):
+            if last_event_id >= upper_bound:
+                break
+
+            events = self._load_events(last_event_id, upper_bound)
+            caught_up = len(events) < self.BATCH_SIZE
+            next_event_id = upper_bound if caught_up else events[-1]["_id"]
+
+            if not self.checkpoints.advance(self.CHECKPOINT_NAME, last_event_id, next_event_id, len(events)):
+                logging.info("Analytics rollup events already claimed by another worker")
+                break
+
+            summary["rollups"] += self._apply(events, next_event_id)
+            self.checkpoints.mark_applied(self.CHECKPOINT_NAME, next_event_id)
+            summary["events"] += len(events)
+            summary["batches"] += 1
+            last_event_id = next_event_id
+
+            if caught_up:
+                break
+
+        # Only compact behind the applied position: hours a pending range may
+        # still be re-applied to must stay hourly
+        applied_event_id = self.checkpoints.find(self.CHECKPOINT_NAME)["applied_event_id"]
+        summary["days_compacted"] = self._compact(applied_event_id.generation_time.replace(tzinfo=None))
+        return summary
+
+    def _find_events(self, id_range: Dict):
+        return self.db.analytics_events.find(
+            {"_id": id_range},
+            {"event_type": 1, "skill_id": 1, "target_user_id": 1, "task_id": 1, "timestamp": 1}
+        ).sort("_id", 1)
+
+    def _load_events(self, after_id: ObjectId, before_id: ObjectId) -> List[Dict]:
+        return list(self._find_events({"$gt": after_id, "$lt": before_id}).limit(self.BATCH_SIZE))
+
+    def _load_range(self, after_id: ObjectId, through_id: ObjectId) -> List[Dict]:
+        """Every event of a claimed range; a full batch's range ends at its last event"""
+        return list(self._find_events({"$gt": after_id, "$lte": through_id}))
+
+    def _apply(self, events: List[Dict], range_id: ObjectId) -> int:
+        """Fold a batch into per-hour rollup increments and write them with one bulk_write.
+
+        ``range_id`` is the end of the claimed range; applying the same range
+        again leaves the documents it already reached unchanged.
+        """
+        if not events:
+            return 0
+
+        rollups: Dict[tuple, Dict[str, Any]] = defaultdict(lambda: {"count": 0, "first_at": None, "last_at": None})
+        for event in events:
+            if not event.get("event_type"):
+                continue
+
+            timestamp = event.get("timestamp") or event["_id"].generation_time.replace(tzinfo=None)
+            entity_id = next(
+                (event[field] for field in AnalyticsRepository.ENTITY_FIELDS if event.get(field) is not None),
+                None
+            )
+            key = (timestamp.replace(minute=0, second=0, microsecond=0), event["event_type"], entity_id)
+
+            rollup = rollups[key]
+            rollup["count"] += 1
+            rollup["first_at"] = min(rollup["first_at"] or timestamp, timestamp)
+            rollup["last_at"] = max(rollup["last_at"] or timestamp, timestamp)
+
+        with BulkWriter(self.db.analytics_rollups, name="analytics_rollup") as writer:
+            for (bucket, event_type, entity_id), rollup in rollups.items():
+                writer.add(UpdateOne(
+                    {"_id": AnalyticsRollupRepository.rollup_id(
+                        AnalyticsRollupRepository.HOUR, bucket, event_type, entity_id
+                    )},
+                    AnalyticsRollupRepository.increment_update(
+                        AnalyticsRollupRepository.HOUR, bucket, event_type, entity_id,
+                        rollup["count"], rollup["first_at"], rollup["last_at"], range_id
+                    ),
+                    upsert=True
+                ))
+
+        return len(rollups)
+
+    def _compact(self, applied_until: datetime) -> int:
+        """Compact whole days that are past the hourly retention and fully rolled up"""
+        horizon = min(datetime.utcnow(), applied_until) - timedelta(days=self.HOURLY_RETENTION_DAYS)
+        horizon = horizon.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        compacted = 0
+        while compacted < self.MAX_DAYS_COMPACTED_PER_RUN:
+            oldest = self.rollups.find_oldest_hour_bucket(horizon)
+            if oldest is None:
+                break
+
+            day = oldest.replace(hour=0)
+            removed = self.rollups.compact_day(day)
+            logging.info(f"Compacted {removed} hourly analytics rollups into {day:%Y-%m-%d}")
+            compacted += 1
+
+        return compacted
+
+    def get_status(self) -> Dict[str, Any]:
+        """Checkpoint position and lag for the batch status endpoint"""
+        checkpoint = self.checkpoints.find(self.CHECKPOINT_NAME)
+        if not checkpoint or not checkpoint.get("applied_event_id"):
+            return {"initialized": False}
+
+        applied = checkpoint["applied_event_id"]
+        return {
+            "initialized": True,
+            "applied_event_id": str(applied),
+            "lag_seconds": round((datetime.utcnow() - applied.generation_time.replace(tzinfo=None)).total_seconds()),
+            "events_processed": checkpoint.get("events_processed", 0),
+            "updated_at": checkpoint.get("updated_at")
+        }
@@ -1,9 +1,12 @@
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from flask import g, request, current_app
+from flask import g, request
 from bson import ObjectId
 import logging
 from backend.repositories.analytics_repository import AnalyticsRepository
+from backend.services.analytics_ingest_service import analytics_ingest_service
+from backend.services.cache_service import CacheService
+from backend.services.distinct_user_counter import DistinctUserCounter
 
 class AnalyticsService:
     """Service for managing user engagement analytics and tracking"""
@@ -28,7 +31,12 @@ class AnalyticsService:
 
     @staticmethod
     def track_event(event_type: str, user_id: str = None, **kwargs) -> bool:
-        """Track a user engagement event"""
+        """Track a user engagement event.
+
+        The event is buffered and written in batches by the ingestion
+        flusher; returns False if it could not be tracked or was dropped
+        under backpressure.
+        """
         
         try:
             # Get user from session if not provided
@@ -42,7 +50,8 @@ class AnalyticsService:
                 "session_id": AnalyticsService._get_session_id(),
                 "ip_address": AnalyticsService._get_client_ip(),
                 "user_agent": request.headers.get('User-Agent', '') if request else '',
-                "metadata": kwargs
+                "metadata": kwargs,
+                "timestamp": datetime.utcnow()
             }
             
             # Add specific fields based on event type
@@ -57,18 +66,8 @@ class AnalyticsService:
             if event_type in [AnalyticsService.CUSTOM_TASK_ADD, AnalyticsService.TASK_VOTE]:
                 event_data["task_id"] = ObjectId(kwargs.get("task_id")) if kwargs.get("task_id") else None
             
-            # Record the event
-            analytics_repo = AnalyticsRepository(g.db.analytics_events)
-            analytics_repo.record_event(event_data)
-            
-            # Update real-time metrics if WebSocket is available
-            try:
-                if hasattr(current_app, 'websocket_service'):
-                    AnalyticsService._update_real_time_metrics(event_type, event_data)
-            except Exception as e:
-                logging.warning(f"Failed to update real-time metrics: {e}")
-            
-            return True
+            # Hand the event to the write-behind buffer
+            return analytics_ingest_service.enqueue(event_data)
             
         except Exception as e:
             logging.error(f"Failed to track event {event_type}: {e}")
@@ -115,12 +114,23 @@ class AnalyticsService:
             return {}
 
     @staticmethod
-    def get_trending_content(content_type: str = "skill", days: int = 7, limit: int = 20) -> Dict:
-        """Get trending content based on engagement"""
+    def get_trending_content(content_type: str = "skill", days: int = 7, limit: int = 20,
+                             approximate: bool = False) -> Dict:
+        """Get trending content based on engagement.
+
+        With approximate=True distinct users come from HyperLogLog sketches
+        (see DistinctUserCounter); falls back to exact counts if Redis is
+        unavailable.
+        """
         
         try:
             analytics_repo = AnalyticsRepository(g.db.analytics_events)
-            trending_items = analytics_repo.get_trending_content(content_type, days, limit)
+            trending_items = None
+            if approximate:
+                trending_items = AnalyticsService._approximate_trending(analytics_repo, content_type, days, limit)
+            if trending_items is None:
+                approximate = False
+                trending_items = analytics_repo.get_trending_content(content_type, days, limit)
             
             # Enrich trending items with additional data
             enriched_items = []
@@ -139,7 +149,8 @@ class AnalyticsService:
             return {
                 "content_type": content_type,
                 "period_days": days,
-                "trending_items": enriched_items
+                "trending_items": enriched_items,
+                "distinct_users": AnalyticsService._distinct_users_method(approximate)
             }
             
         except Exception as e:
@@ -147,25 +158,61 @@ class AnalyticsService:
             return {"content_type": content_type, "trending_items": []}
 
     @staticmethod
-    def get_platform_dashboard_metrics(days: int = 30) -> Dict:
-        """Get comprehensive platform metrics for dashboard"""
+    def _approximate_trending(analytics_repo: AnalyticsRepository, content_type: str,
+                              days: int, limit: int) -> Optional[List[Dict]]:
+        """Rank items by interactions plus HyperLogLog distinct users; None if Redis is unavailable"""
+        items = analytics_repo.get_trending_candidates(content_type, days, limit)
+        users = DistinctUserCounter.users_by_item([str(item["_id"]) for item in items], days)
+        if users is None:
+            return None
+        
+        return AnalyticsRepository.rank_trending(content_type, items, users, limit)
+
+    @staticmethod
+    def _estimate_distinct_users(event_types: List[str], days: int) -> Optional[Dict]:
+        """Distinct user counts from HyperLogLog sketches, shaped like AnalyticsRepository.get_distinct_users"""
+        active_users = DistinctUserCounter.active_users(days)
+        by_type = DistinctUserCounter.users_by_event_type(event_types, days)
+        daily = DistinctUserCounter.daily_users_by_event_type(event_types, days)
+        if active_users is None or by_type is None or daily is None:
+            return None
+        
+        return {"active_users": active_users, "by_event_type": by_type, "daily_by_event_type": daily}
+
+    @staticmethod
+    def _distinct_users_method(approximate: bool) -> Dict:
+        return DistinctUserCounter.error_bounds() if approximate else {"method": "exact"}
+
+    @staticmethod
+    def get_platform_dashboard_metrics(days: int = 30, approximate: bool = False) -> Dict:
+        """Get comprehensive platform metrics for dashboard.
+
+        With approximate=True the overview and feature usage take distinct
+        users from HyperLogLog sketches; falls back to exact counts if Redis
+        is unavailable.
+        """
         
         try:
             analytics_repo = AnalyticsRepository(g.db.analytics_events)
             
-            # Get overview metrics
-            overview = analytics_repo.get_platform_overview_metrics(days)
-            
-            # Get feature usage analytics
-            feature_usage = analytics_repo.get_feature_usage_analytics(days)
-            
-            # Get retention metrics for recent cohorts
-            retention_data = []
-            for i in range(7):  # Last 7 days of cohorts
-                cohort_date = datetime.utcnow() - timedelta(days=i)
-                retention = analytics_repo.get_user_retention_metrics(cohort_date, 7)
-                if retention["cohort_size"] > 0:
-                    retention_data.append(retention)
+            # Get overview and feature usage metrics; distinct users are counted once for both
+            overview = analytics_repo.get_platform_overview_metrics(days, count_users=False)
+            feature_usage = analytics_repo.get_feature_usage_analytics(days, count_users=False)
+            distinct_users = None
+            if approximate:
+                event_types = [result["_id"] for result in overview["events_by_type"]]
+                distinct_users = AnalyticsService._estimate_distinct_users(event_types, days)
+            if distinct_users is None:
+                approximate = False
+                distinct_users = analytics_repo.get_distinct_users(days)
+            AnalyticsRepository.with_overview_users(overview, distinct_users)
+            AnalyticsRepository.with_feature_users(feature_usage, distinct_users)
+            
+            # Get retention metrics for recent cohorts (last 7 days of cohorts)
+            retention_data = [
+                retention for retention in AnalyticsService.get_retention_cohorts(cohorts=7, days_to_track=7)
+                if retention["cohort_size"] > 0
+            ]
             
             # Get conversion funnel for key user journey
             funnel_events = [
@@ -174,13 +221,14 @@ class AnalyticsService:
                 AnalyticsService.SKILL_LIKE,
                 AnalyticsService.SKILL_DOWNLOAD
             ]
-            funnel = analytics_repo.get_conversion_funnel(funnel_events, days)
+            funnel = AnalyticsService.get_conversion_funnel(funnel_events, days)
             
             return {
                 "overview": overview,
                 "feature_usage": feature_usage,
                 "retention_cohorts": retention_data,
                 "user_journey_funnel": funnel,
+                "distinct_users": AnalyticsService._distinct_users_method(approximate),
                 "generated_at": datetime.utcnow().isoformat()
             }
             
@@ -188,6 +236,53 @@ class AnalyticsService:
             logging.error(f"Error getting platform dashboard metrics: {e}")
             return {}
 
+    @staticmethod
+    def get_retention_cohorts(cohorts: int = 7, days_to_track: int = 7) -> List[Dict]:
+        """Day-N retention for the most recent daily cohorts, newest first.
+
+        Each (cohort, window) result is cached, for a day once the cohort's
+        tracking window has ended; cohorts missing from the cache are
+        computed together in one pass.
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        cohort_dates = [today - timedelta(days=i) for i in range(cohorts)]
+        cache_keys = {
+            cohort_date: f"retention:{cohort_date:%Y%m%d}:{days_to_track}" for cohort_date in cohort_dates
+        }
+        
+        cached = CacheService.mget([f"{CacheService.ANALYTICS_PREFIX}{key}" for key in cache_keys.values()])
+        results = {
+            cohort_date: cached[f"{CacheService.ANALYTICS_PREFIX}{key}"]
+            for cohort_date, key in cache_keys.items()
+            if f"{CacheService.ANALYTICS_PREFIX}{key}" in cached
+        }
+        
+        missing = [cohort_date for cohort_date in cohort_dates if cohort_date not in results]
+        if missing:
+            analytics_repo = AnalyticsRepository(g.db.analytics_events)
+            for cohort_date, retention in zip(missing, analytics_repo.get_retention_cohorts(missing, days_to_track)):
+                tracking_ended = cohort_date + timedelta(days=days_to_track + 1) <= datetime.utcnow()
+                CacheService.cache_analytics_data(
+                    cache_keys[cohort_date], retention,
+                    CacheService.LONG_TTL if tracking_ended else CacheService.SHORT_TTL
+                )
+                results[cohort_date] = retention
+        
+        return [results[cohort_date] for cohort_date in cohort_dates]
+
+    @staticmethod
+    def get_conversion_funnel(funnel_events: List[str], days: int = 30,
+                              step_window_hours: Optional[float] = None) -> Dict:
+        """Ordered conversion funnel, cached per (steps, period, step window)"""
+        cache_key = f"funnel:{','.join(funnel_events)}:{days}:{step_window_hours}"
+        funnel = CacheService.get_analytics_data(cache_key)
+        if funnel is None:
+            funnel = AnalyticsRepository(g.db.analytics_events).get_conversion_funnel(
+                funnel_events, days, step_window_hours
+            )
+            CacheService.cache_analytics_data(cache_key, funnel, CacheService.SHORT_TTL)
+        return funnel
+
     @staticmethod
     def get_user_behavior_insights(user_id: str, days: int = 30) -> Dict:
         """Get behavioral insights for a user"""
@@ -351,22 +446,6 @@ class AnalyticsService:
         else:
             return request.remote_addr or 'unknown'
 
-    @staticmethod
-    def _update_real_time_metrics(event_type: str, event_data: Dict):
-        """Update real-time metrics via WebSocket"""
-        if hasattr(current_app, 'websocket_service'):
-            websocket_service = current_app.websocket_service
-            
-            # Send real-time update to dashboard
-            websocket_service.notify_system_update(
-                update_type="analytics_event",
-                data={
-                    "event_type": event_type,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "user_count": 1  # This could be enhanced with more real-time data
-                }
-            )
-
     @staticmethod
     def _generate_user_insights(metrics: Dict) -> List[str]:
         """Generate insights from user engagement metrics"""
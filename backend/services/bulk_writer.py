@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+from typing import Dict, Any, List, Set
+from backend.services.cache_service import CacheService
+
+class BulkWriter:
+    """Buffers write operations for one collection and flushes them with unordered bulk_write.
+
+    Cache keys and tags made stale by the writes are collected alongside and
+    dropped when the writer is closed, after the data is written: keys in one
+    pipelined pass, tags through CacheService.invalidate_tags one chunk at a
+    time.
+    Each flushed chunk is logged with its throughput.
+
+        with BulkWriter(g.db.users, name="user_engagement") as writer:
+            writer.add(UpdateOne(...))
+            writer.invalidate(key)
+            writer.invalidate_tags(CacheService.user_tag(user_id))
+        writer.stats  # totals for the whole run
+    """
+
+    CHUNK_SIZE = int(os.getenv('BULK_WRITE_CHUNK_SIZE', 1000))
+
+    def __init__(self, collection, name: str = None, chunk_size: int = None):
+        self.collection = collection
+        self.name = name or collection.name
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self._operations: List = []
+        self._stale_keys: Set[str] = set()
+        self._stale_tags: Set[str] = set()
+        self.stats: Dict[str, Any] = {
+            "operations": 0,
+            "matched": 0,
+            "modified": 0,
+            "upserted": 0,
+            "batches": 0,
+            "write_seconds": 0.0,
+            "keys_invalidated": 0
+        }
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Writes that already went out still need their cache keys dropped
+        self.close(flush=exc_type is None)
+        return False
+
+    def add(self, operation):
+        """Queue an operation, flushing when a chunk is full"""
+        self._operations.append(operation)
+        if len(self._operations) >= self.chunk_size:
+            self.flush()
+
+    def invalidate(self, *keys: str):
+        """Queue cache keys to unlink once the writes are done"""
+        self._stale_keys.update(keys)
+
+    def invalidate_tags(self, *tags: str):
+        """Queue cache tags whose keys are deleted once the writes are done"""
+        self._stale_tags.update(tags)
+
+    def flush(self):
+        """Write the queued operations as one unordered bulk_write"""
+        if not self._operations:
+            return
+
+        operations, self._operations = self._operations, []
+        started = time.perf_counter()
+        result = self.collection.bulk_write(operations, ordered=False)
+        elapsed = time.perf_counter() - started
+
+        self.stats["operations"] += len(operations)
+        self.stats["matched"] += result.matched_count
+        self.stats["modified"] += result.modified_count
+        self.stats["upserted"] += result.upserted_count
+        self.stats["batches"] += 1
+        self.stats["write_seconds"] += elapsed
+
+        logging.info(
+            f"Bulk write {self.name} batch {self.stats['batches']}: {len(operations)} ops "
+            f"({result.modified_count} modified) in {elapsed * 1000:.1f}ms "
+            f"({len(operations) / elapsed if elapsed else 0:.0f} ops/s)"
+        )
+
+    def close(self, flush: bool = True) -> Dict[str, Any]:
+        """Flush remaining operations and drop the collected cache keys and tags"""
+        if flush:
+            self.flush()
+        else:
+            self._operations = []
+
+        if self._stale_keys:
+            self.stats["keys_invalidated"] += CacheService.unlink_many(list(self._stale_keys))
+            self._stale_keys = set()
+
+        tags, self._stale_tags = list(self._stale_tags), set()
+        for start in range(0, len(tags), self.chunk_size):
+            self.stats["keys_invalidated"] += CacheService.invalidate_tags(tags[start:start + self.chunk_size])
+
+        return self.stats
@@ -2,10 +2,82 @@ import redis
 import json
 import pickle
 import logging
-from typing import Any, Optional, Dict, List
-from datetime import datetime, timedelta
+from typing import Any, Optional, Dict, List, Set, Tuple
+from datetime import datetime
 from flask import current_app
 import os
+import threading
+import time
+import copy
+import fnmatch
+import socket
+import math
+import random
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+_MISSING = object()
+
+class CachedValue(NamedTuple):
+    """Envelope stored by get_or_set so stale values can be served while one worker refreshes"""
+    value: Any
+    soft_expires_at: float  # epoch seconds after which the value is stale
+    compute_seconds: float  # how long the last recompute took (drives early expiration)
+
+class LocalLRUCache:
+    """Bounded in-process LRU cache with per-entry TTL (L1 in front of Redis)"""
+    
+    def __init__(self, max_entries: int, default_ttl: int):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def get(self, key: str) -> Any:
+        """Return a copy of the cached value, or _MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            
+            self._entries.move_to_end(key)
+        
+        # Callers may mutate what they get back
+        return copy.deepcopy(value)
+    
+    def set(self, key: str, value: Any, ttl: int = None):
+        ttl = min(ttl or self.default_ttl, self.default_ttl)
+        entry = (copy.deepcopy(value), time.monotonic() + ttl)
+        
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def delete_pattern(self, pattern: str):
+        with self._lock:
+            for key in [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
 
 class CacheService:
     """Redis-based caching service for performance optimization"""
@@ -22,12 +94,83 @@ class CacheService:
     SEARCH_PREFIX = "search:"
     MODERATION_PREFIX = "moderation:"
     
+    # Tag sets: tag:<tag> holds the keys cached for an entity (tag:user:<id>, tag:skill:<id>)
+    TAG_PREFIX = "tag:"
+    HLL_PREFIX = "hll:"
+    TRENDING_TAG = "trending"
+    
     # Default TTL values (in seconds)
     DEFAULT_TTL = 3600  # 1 hour
     SHORT_TTL = 300     # 5 minutes
     MEDIUM_TTL = 1800   # 30 minutes
     LONG_TTL = 86400    # 24 hours
     TRENDING_TTL = 900  # 15 minutes
+    TAG_TTL = int(os.getenv('CACHE_TAG_TTL', 86400))  # tag sets outlive the entries they list
+
+    # In-process L1 cache settings
+    L1_ENABLED = os.getenv('CACHE_L1_ENABLED', 'true').lower() == 'true'
+    L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000))
+    L1_TTL = int(os.getenv('CACHE_L1_TTL', 30))  # seconds; bounds staleness if an invalidation is missed
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    
+    _local_cache = LocalLRUCache(L1_MAX_ENTRIES, L1_TTL)
+    _listener_pid = None
+    _listener_lock = threading.Lock()
+    _tier_stats = {
+        "l1_hits": 0,
+        "l1_misses": 0,
+        "l2_hits": 0,
+        "l2_misses": 0,
+        "invalidations_published": 0,
+        "invalidations_received": 0
+    }
+
+    # Placeholder member (score 0) that marks a built but empty timeline
+    TIMELINE_SENTINEL = "__timeline__"
+
+    # Stampede protection settings for get_or_set
+    LOCK_PREFIX = "lock:"
+    LOCK_LEASE_MS = int(os.getenv('CACHE_LOCK_LEASE_MS', 30000))
+    LOCK_WAIT_TIMEOUT = float(os.getenv('CACHE_LOCK_WAIT_TIMEOUT', 5))  # seconds a miss waits for the refresher
+    LOCK_POLL_INTERVAL = 0.05
+    EARLY_EXPIRATION_BETA = float(os.getenv('CACHE_EARLY_EXPIRATION_BETA', 1.0))
+    
+    _release_lock_script = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    _stampede_stats = {
+        "fresh_hits": 0,
+        "stale_served": 0,
+        "early_refreshes": 0,
+        "recomputes": 0,
+        "recomputes_saved": 0,
+        "lock_wait_timeouts": 0
+    }
+
+    # Circuit breaker settings
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('REDIS_BREAKER_FAILURE_THRESHOLD', 3))
+    BREAKER_RESET_TIMEOUT = int(os.getenv('REDIS_BREAKER_RESET_TIMEOUT', 30))  # seconds
+    
+    BREAKER_CLOSED = "closed"
+    BREAKER_OPEN = "open"
+    BREAKER_HALF_OPEN = "half_open"
+    
+    _breaker_lock = threading.Lock()
+    _breaker_state = BREAKER_CLOSED
+    _consecutive_failures = 0
+    _opened_at = None
+    _breaker_stats = {
+        "successes": 0,
+        "failures": 0,
+        "short_circuited": 0,
+        "times_opened": 0,
+        "probes": 0,
+        "last_failure": None,
+        "last_failure_at": None
+    }
 
     @classmethod
     def get_redis_client(cls):
@@ -42,103 +185,474 @@ class CacheService:
                     socket_connect_timeout=5,
                     retry_on_timeout=True
                 )
-                
-                # Test connection
-                cls._redis_client.ping()
-                logging.info("Redis connection established successfully")
+                logging.info("Redis client configured")
                 
             except Exception as e:
                 logging.error(f"Redis connection failed: {e}")
                 cls._redis_client = None
+                cls._record_failure(e)
                 
         return cls._redis_client
 
     @classmethod
     def is_available(cls) -> bool:
-        """Check if Redis is available"""
+        """Check if Redis is available according to the circuit breaker (no round trip)"""
+        if cls._breaker_state != cls.BREAKER_CLOSED:
+            cls._breaker_stats["short_circuited"] += 1
+            cls._schedule_probe()
+            return False
+        
+        return cls.get_redis_client() is not None
+
+    # In-process L1 tier
+    
+    @classmethod
+    def _l1_get(cls, key: str) -> Any:
+        """Look a key up in the local tier"""
+        if not cls.L1_ENABLED:
+            return _MISSING
+        
+        value = cls._local_cache.get(key)
+        if value is _MISSING:
+            cls._tier_stats["l1_misses"] += 1
+        else:
+            cls._tier_stats["l1_hits"] += 1
+        return value
+
+    @classmethod
+    def _l1_set(cls, key: str, value: Any, ttl: int = None):
+        """Store a value in the local tier and make sure invalidations are being received"""
+        if not cls.L1_ENABLED:
+            return
+        
+        cls._ensure_invalidation_listener()
+        cls._local_cache.set(key, value, ttl)
+
+    @classmethod
+    def _publish_invalidation(cls, pipe_or_client, kind: str, target: Any):
+        """Queue an invalidation message for the other workers' L1"""
+        if not cls.L1_ENABLED:
+            return
+        
+        message = json.dumps({"kind": kind, "target": target, "origin": cls._origin_id()})
+        pipe_or_client.publish(cls.INVALIDATION_CHANNEL, message)
+        cls._tier_stats["invalidations_published"] += 1
+
+    @classmethod
+    def _origin_id(cls) -> str:
+        """Identify this worker so it can skip its own invalidation messages"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def _apply_invalidation(cls, raw_message):
+        """Evict local entries named by an invalidation message"""
+        try:
+            if isinstance(raw_message, bytes):
+                raw_message = raw_message.decode('utf-8')
+            message = json.loads(raw_message)
+        except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+            return
+        
+        if message.get("origin") == cls._origin_id():
+            return
+        
+        cls._tier_stats["invalidations_received"] += 1
+        if message.get("kind") == "pattern":
+            cls._local_cache.delete_pattern(message.get("target", ""))
+        elif message.get("kind") == "keys":
+            for key in message.get("target", []):
+                cls._local_cache.delete(key)
+        elif message.get("kind") == "clear":
+            cls._local_cache.clear()
+        else:
+            cls._local_cache.delete(message.get("target", ""))
+
+    @classmethod
+    def _ensure_invalidation_listener(cls):
+        """Start the pub/sub listener thread once per process"""
+        pid = os.getpid()
+        if cls._listener_pid == pid:
+            return
+        
+        with cls._listener_lock:
+            if cls._listener_pid == pid:
+                return
+            cls._listener_pid = pid
+        
+        thread = threading.Thread(target=cls._listen_for_invalidations, daemon=True)
+        thread.start()
+
+    @classmethod
+    def _listen_for_invalidations(cls):
+        """Apply invalidations published by other workers until the process exits"""
+        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        
+        while True:
+            try:
+                # Dedicated connection without a read timeout: pub/sub blocks while idle
+                client = redis.from_url(redis_url, decode_responses=False,
+                                        socket_connect_timeout=5, socket_keepalive=True)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.INVALIDATION_CHANNEL)
+                
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        cls._apply_invalidation(message.get("data"))
+                        
+            except Exception as e:
+                logging.warning(f"Cache invalidation listener disconnected: {e}")
+            
+            # Invalidations may have been missed while disconnected
+            cls._local_cache.clear()
+            time.sleep(5)
+
+    @classmethod
+    def get_tier_stats(cls) -> Dict[str, Any]:
+        """Get per-tier hit/miss counters"""
+        l1_total = cls._tier_stats["l1_hits"] + cls._tier_stats["l1_misses"]
+        l2_total = cls._tier_stats["l2_hits"] + cls._tier_stats["l2_misses"]
+        
+        return {
+            "l1": {
+                "enabled": cls.L1_ENABLED,
+                "entries": len(cls._local_cache),
+                "max_entries": cls.L1_MAX_ENTRIES,
+                "ttl_seconds": cls.L1_TTL,
+                "hits": cls._tier_stats["l1_hits"],
+                "misses": cls._tier_stats["l1_misses"],
+                "evictions": cls._local_cache.evictions,
+                "hit_rate": round((cls._tier_stats["l1_hits"] / l1_total) * 100, 2) if l1_total else 0,
+                "invalidations_published": cls._tier_stats["invalidations_published"],
+                "invalidations_received": cls._tier_stats["invalidations_received"]
+            },
+            "l2": {
+                "hits": cls._tier_stats["l2_hits"],
+                "misses": cls._tier_stats["l2_misses"],
+                "hit_rate": round((cls._tier_stats["l2_hits"] / l2_total) * 100, 2) if l2_total else 0
+            }
+        }
+
+    # Circuit breaker
+    
+    @classmethod
+    def _record_success(cls):
+        """Record a successful Redis command"""
+        cls._breaker_stats["successes"] += 1
+        if cls._consecutive_failures or cls._breaker_state != cls.BREAKER_CLOSED:
+            with cls._breaker_lock:
+                cls._consecutive_failures = 0
+                if cls._breaker_state != cls.BREAKER_CLOSED:
+                    cls._breaker_state = cls.BREAKER_CLOSED
+                    cls._opened_at = None
+                    logging.info("Redis circuit breaker closed")
+
+    @classmethod
+    def _record_failure(cls, error: Exception):
+        """Record a failed Redis command; connection-level errors can trip the breaker"""
+        if not isinstance(error, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OSError)):
+            return
+        
+        with cls._breaker_lock:
+            cls._breaker_stats["failures"] += 1
+            cls._breaker_stats["last_failure"] = str(error)
+            cls._breaker_stats["last_failure_at"] = datetime.utcnow().isoformat()
+            cls._consecutive_failures += 1
+            
+            should_open = (
+                cls._breaker_state == cls.BREAKER_HALF_OPEN or
+                cls._consecutive_failures >= cls.BREAKER_FAILURE_THRESHOLD
+            )
+            if should_open and cls._breaker_state != cls.BREAKER_OPEN:
+                cls._breaker_state = cls.BREAKER_OPEN
+                cls._opened_at = time.monotonic()
+                cls._breaker_stats["times_opened"] += 1
+                logging.warning(f"Redis circuit breaker opened after {cls._consecutive_failures} failures: {error}")
+
+    @classmethod
+    def _schedule_probe(cls):
+        """Start a background PING once the open breaker's cooldown has elapsed"""
+        with cls._breaker_lock:
+            if cls._breaker_state != cls.BREAKER_OPEN:
+                return
+            if cls._opened_at is not None and time.monotonic() - cls._opened_at < cls.BREAKER_RESET_TIMEOUT:
+                return
+            cls._breaker_state = cls.BREAKER_HALF_OPEN
+            cls._breaker_stats["probes"] += 1
+        
+        thread = threading.Thread(target=cls._probe, daemon=True)
+        thread.start()
+
+    @classmethod
+    def _probe(cls):
+        """Probe Redis outside the request path and update the breaker"""
         try:
             client = cls.get_redis_client()
-            return client is not None and client.ping()
-        except:
-            return False
+            if client is not None and client.ping():
+                cls._record_success()
+                return
+            raise redis.exceptions.ConnectionError("Redis client not configured")
+        except Exception as e:
+            cls._record_failure(e)
+            with cls._breaker_lock:
+                # Non-connection errors must still re-open a half-open breaker
+                if cls._breaker_state == cls.BREAKER_HALF_OPEN:
+                    cls._breaker_state = cls.BREAKER_OPEN
+                    cls._opened_at = time.monotonic()
 
     @classmethod
-    def set(cls, key: str, value: Any, ttl: int = None) -> bool:
-        """Set a value in cache"""
+    def get_breaker_stats(cls) -> Dict[str, Any]:
+        """Get circuit breaker state and counters"""
+        open_for = None
+        if cls._opened_at is not None:
+            open_for = round(time.monotonic() - cls._opened_at, 1)
+        
+        return {
+            "state": cls._breaker_state,
+            "consecutive_failures": cls._consecutive_failures,
+            "failure_threshold": cls.BREAKER_FAILURE_THRESHOLD,
+            "reset_timeout_seconds": cls.BREAKER_RESET_TIMEOUT,
+            "open_for_seconds": open_for,
+            **cls._breaker_stats
+        }
+
+    @staticmethod
+    def _serialize(value: Any) -> Tuple[Any, Any]:
+        """Redis payload for a value, and the value as a read from Redis returns it.
+
+        Dicts and lists go through JSON (datetimes and ObjectIds become
+        strings), so L1 keeps the round-tripped copy rather than the original
+        and every worker returns the same thing for a key.
+        """
+        if isinstance(value, (dict, list)):
+            serialized_value = json.dumps(value, default=str)
+            return serialized_value, json.loads(serialized_value)
+        return pickle.dumps(value), value
+
+    @classmethod
+    def set(cls, key: str, value: Any, ttl: int = None, tags: List[str] = None) -> bool:
+        """Set a value in cache, optionally registering it under invalidation tags"""
         if not cls.is_available():
             return False
         
         try:
             client = cls.get_redis_client()
+            serialized_value, value = cls._serialize(value)
             
-            # Serialize the value
-            if isinstance(value, (dict, list)):
-                serialized_value = json.dumps(value, default=str)
-            else:
-                serialized_value = pickle.dumps(value)
-            
-            # Set with TTL
+            # Set with TTL and tell other workers to drop their L1 copy in the same round trip
             ttl = ttl or cls.DEFAULT_TTL
-            result = client.setex(key, ttl, serialized_value)
+            pipe = client.pipeline(transaction=False)
+            pipe.setex(key, ttl, serialized_value)
+            cls._add_tags(pipe, {key: tags}, ttl)
+            cls._publish_invalidation(pipe, "key", key)
+            result = pipe.execute()[0]
+            cls._record_success()
+            
+            cls._local_cache.delete(key)
+            if result:
+                cls._l1_set(key, value, ttl)
             
             return bool(result)
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache set error for key {key}: {e}")
             return False
 
     @classmethod
     def get(cls, key: str) -> Optional[Any]:
         """Get a value from cache"""
+        local_value = cls._l1_get(key)
+        if local_value is not _MISSING:
+            return local_value
+        
         if not cls.is_available():
             return None
         
         try:
             client = cls.get_redis_client()
             value = client.get(key)
+            cls._record_success()
             
             if value is None:
+                cls._tier_stats["l2_misses"] += 1
                 return None
             
+            cls._tier_stats["l2_hits"] += 1
+            
             # Try JSON first, then pickle
             try:
-                return json.loads(value.decode('utf-8'))
+                decoded = json.loads(value.decode('utf-8'))
             except (json.JSONDecodeError, UnicodeDecodeError):
-                return pickle.loads(value)
+                decoded = pickle.loads(value)
+            
+            cls._l1_set(key, decoded)
+            return decoded
                 
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache get error for key {key}: {e}")
             return None
 
     @classmethod
     def delete(cls, key: str) -> bool:
         """Delete a key from cache"""
+        cls._local_cache.delete(key)
+        
         if not cls.is_available():
             return False
         
         try:
             client = cls.get_redis_client()
-            result = client.delete(key)
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(key)
+            cls._publish_invalidation(pipe, "key", key)
+            result = pipe.execute()[0]
+            cls._record_success()
             return bool(result)
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache delete error for key {key}: {e}")
             return False
 
+    @classmethod
+    def delete_many(cls, keys: List[str]) -> int:
+        """Delete several known keys in one round trip"""
+        if not keys:
+            return 0
+        
+        for key in keys:
+            cls._local_cache.delete(key)
+        
+        if not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            cls._publish_invalidation(pipe, "keys", list(keys))
+            deleted = pipe.execute()[0]
+            cls._record_success()
+            return deleted
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache delete_many error for {len(keys)} keys: {e}")
+            return 0
+
+    @classmethod
+    def unlink_many(cls, keys: List[str], chunk_size: int = 500) -> int:
+        """Drop many known keys with pipelined UNLINK (freed in the background by Redis)"""
+        if not keys:
+            return 0
+        
+        for key in keys:
+            cls._local_cache.delete(key)
+        
+        if not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            chunks = [keys[start:start + chunk_size] for start in range(0, len(keys), chunk_size)]
+            pipe = client.pipeline(transaction=False)
+            for chunk in chunks:
+                pipe.unlink(*chunk)
+            cls._publish_invalidation(pipe, "keys", list(keys))
+            
+            results = pipe.execute()
+            cls._record_success()
+            return sum(results[:len(chunks)])
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache unlink error for {len(keys)} keys: {e}")
+            return 0
+
+    # Tag-based invalidation
+    
+    # Unlinks every key listed in the given tag sets and the sets themselves;
+    # returns the keys so workers can drop their L1 copies
+    _invalidate_tags_script = """
+    local removed = {}
+    for _, tag_key in ipairs(KEYS) do
+        local members = redis.call('smembers', tag_key)
+        for i = 1, #members, 500 do
+            redis.call('unlink', unpack(members, i, math.min(i + 499, #members)))
+        end
+        for _, member in ipairs(members) do
+            removed[#removed + 1] = member
+        end
+        redis.call('unlink', tag_key)
+    end
+    return removed
+    """
+    
+    @classmethod
+    def user_tag(cls, user_id) -> str:
+        return f"user:{user_id}"
+    
+    @classmethod
+    def skill_tag(cls, skill_id) -> str:
+        return f"skill:{skill_id}"
+    
+    @classmethod
+    def _add_tags(cls, pipe, key_tags: Dict[str, Optional[List[str]]], ttl: int):
+        """Queue tag set registrations for cached keys in the caller's pipeline"""
+        tag_ttl = max(ttl, cls.TAG_TTL)
+        for key, tags in key_tags.items():
+            for tag in tags or []:
+                tag_key = f"{cls.TAG_PREFIX}{tag}"
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, tag_ttl)
+    
+    @classmethod
+    def invalidate_tags(cls, tags: List[str]) -> int:
+        """Delete exactly the keys registered under the tags in one atomic call"""
+        if not tags:
+            return 0
+        
+        if not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            removed = client.eval(cls._invalidate_tags_script, len(tags),
+                                  *[f"{cls.TAG_PREFIX}{tag}" for tag in tags])
+            removed = [key.decode('utf-8') if isinstance(key, bytes) else key for key in removed]
+            
+            for key in removed:
+                cls._local_cache.delete(key)
+            if removed:
+                cls._publish_invalidation(client, "keys", removed)
+            
+            cls._record_success()
+            return len(removed)
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache tag invalidation error for {tags}: {e}")
+            return 0
+
     @classmethod
     def delete_pattern(cls, pattern: str) -> int:
         """Delete all keys matching a pattern"""
+        cls._local_cache.delete_pattern(pattern)
+        
         if not cls.is_available():
             return 0
         
         try:
             client = cls.get_redis_client()
             keys = client.keys(pattern)
-            if keys:
-                return client.delete(*keys)
-            return 0
+            deleted = client.delete(*keys) if keys else 0
+            cls._publish_invalidation(client, "pattern", pattern)
+            cls._record_success()
+            return deleted
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache delete pattern error for {pattern}: {e}")
             return 0
 
@@ -150,9 +664,12 @@ class CacheService:
         
         try:
             client = cls.get_redis_client()
-            return bool(client.exists(key))
+            exists = bool(client.exists(key))
+            cls._record_success()
+            return exists
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache exists error for key {key}: {e}")
             return False
 
@@ -164,9 +681,12 @@ class CacheService:
         
         try:
             client = cls.get_redis_client()
-            return bool(client.expire(key, ttl))
+            result = bool(client.expire(key, ttl))
+            cls._record_success()
+            return result
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache expire error for key {key}: {e}")
             return False
 
@@ -178,9 +698,12 @@ class CacheService:
         
         try:
             client = cls.get_redis_client()
-            return client.incrby(key, amount)
+            value = client.incrby(key, amount)
+            cls._record_success()
+            return value
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache increment error for key {key}: {e}")
             return None
 
@@ -192,19 +715,67 @@ class CacheService:
         
         try:
             client = cls.get_redis_client()
-            return client.decrby(key, amount)
+            value = client.decrby(key, amount)
+            cls._record_success()
+            return value
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache decrement error for key {key}: {e}")
             return None
 
+    # HyperLogLog sketches (Redis only, not cached in L1)
+    
+    @classmethod
+    def hll_add_many(cls, key_members: Dict[str, Set[str]], ttl: int) -> bool:
+        """PFADD members into many sketches in one pipeline, refreshing their TTL"""
+        if not key_members or not cls.is_available():
+            return False
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for key, members in key_members.items():
+                pipe.pfadd(key, *members)
+                pipe.expire(key, ttl)
+            pipe.execute()
+            cls._record_success()
+            return True
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache PFADD error for {len(key_members)} sketches: {e}")
+            return False
+
+    @classmethod
+    def hll_count_many(cls, key_groups: List[List[str]]) -> Optional[List[int]]:
+        """Cardinality of the union of each group of sketches (pipelined PFCOUNT)"""
+        if not cls.is_available():
+            return None
+        if not key_groups:
+            return []
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for keys in key_groups:
+                pipe.pfcount(*keys)
+            counts = pipe.execute()
+            cls._record_success()
+            return counts
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache PFCOUNT error for {len(key_groups)} sketch groups: {e}")
+            return None
+
     # Specialized caching methods
     
     @classmethod
     def cache_user_profile(cls, user_id: str, profile_data: Dict, ttl: int = None) -> bool:
         """Cache user profile data"""
         key = f"{cls.USER_PREFIX}profile:{user_id}"
-        return cls.set(key, profile_data, ttl or cls.MEDIUM_TTL)
+        return cls.set(key, profile_data, ttl or cls.MEDIUM_TTL, [cls.user_tag(user_id)])
 
     @classmethod
     def get_user_profile(cls, user_id: str) -> Optional[Dict]:
@@ -216,7 +787,7 @@ class CacheService:
     def cache_skill_data(cls, skill_id: str, skill_data: Dict, ttl: int = None) -> bool:
         """Cache skill data"""
         key = f"{cls.SKILL_PREFIX}data:{skill_id}"
-        return cls.set(key, skill_data, ttl or cls.MEDIUM_TTL)
+        return cls.set(key, skill_data, ttl or cls.MEDIUM_TTL, [cls.skill_tag(skill_id)])
 
     @classmethod
     def get_skill_data(cls, skill_id: str) -> Optional[Dict]:
@@ -228,7 +799,7 @@ class CacheService:
     def cache_trending_skills(cls, trending_data: List[Dict], ttl: int = None) -> bool:
         """Cache trending skills"""
         key = f"{cls.TRENDING_PREFIX}skills"
-        return cls.set(key, trending_data, ttl or cls.TRENDING_TTL)
+        return cls.set(key, trending_data, ttl or cls.TRENDING_TTL, [cls.TRENDING_TAG])
 
     @classmethod
     def get_trending_skills(cls) -> Optional[List[Dict]]:
@@ -240,7 +811,7 @@ class CacheService:
     def cache_user_feed(cls, user_id: str, feed_data: List[Dict], ttl: int = None) -> bool:
         """Cache user activity feed"""
         key = f"{cls.FEED_PREFIX}user:{user_id}"
-        return cls.set(key, feed_data, ttl or cls.SHORT_TTL)
+        return cls.set(key, feed_data, ttl or cls.SHORT_TTL, [cls.user_tag(user_id)])
 
     @classmethod
     def get_user_feed(cls, user_id: str) -> Optional[List[Dict]]:
@@ -287,7 +858,7 @@ class CacheService:
     def cache_user_notifications(cls, user_id: str, notifications: List[Dict], ttl: int = None) -> bool:
         """Cache user notifications"""
         key = f"{cls.NOTIFICATION_PREFIX}user:{user_id}"
-        return cls.set(key, notifications, ttl or cls.SHORT_TTL)
+        return cls.set(key, notifications, ttl or cls.SHORT_TTL, [cls.user_tag(user_id)])
 
     @classmethod
     def get_user_notifications(cls, user_id: str) -> Optional[List[Dict]]:
@@ -303,48 +874,86 @@ class CacheService:
 
     # Rate limiting
     
+    # Sliding-window counters: one INCR bucket per window; the previous
+    # bucket is weighted by how much of it still overlaps the window.
+    # Every window is checked before any is incremented, so a hit rejected
+    # by one limit costs nothing against the others.
+    # KEYS: current, previous bucket per window
+    # ARGV: cost, then limit, window_seconds, previous_weight per window
+    # Returns {allowed, index of the rejecting window or 0, estimates...}
+    _sliding_window_script = """
+    local cost = tonumber(ARGV[1])
+    local estimates = {}
+    for i = 1, #KEYS / 2 do
+        local current = tonumber(redis.call('get', KEYS[i * 2 - 1]) or '0')
+        local previous = tonumber(redis.call('get', KEYS[i * 2]) or '0')
+        local estimate = previous * tonumber(ARGV[i * 3 + 1]) + current
+        if estimate + cost > tonumber(ARGV[i * 3 - 1]) then
+            return {0, i, tostring(estimate)}
+        end
+        estimates[i] = tostring(estimate + cost)
+    end
+    for i = 1, #KEYS / 2 do
+        redis.call('incrby', KEYS[i * 2 - 1], cost)
+        redis.call('expire', KEYS[i * 2 - 1], tonumber(ARGV[i * 3]) * 2)
+    end
+    return {1, 0, unpack(estimates)}
+    """
+
     @classmethod
-    def check_rate_limit(cls, identifier: str, limit: int, window_seconds: int) -> Dict[str, Any]:
-        """Check rate limit for an identifier"""
+    def sliding_window_hit(cls, identifier: str, limit: int, window_seconds: int, cost: int = 1) -> Dict[str, Any]:
+        """Count a hit against a sliding-window limit in O(1); fails open when Redis is down"""
+        return cls.sliding_windows_hit([(identifier, limit, window_seconds)], cost)
+
+    @classmethod
+    def sliding_windows_hit(cls, windows: List[Tuple[str, int, int]], cost: int = 1) -> Dict[str, Any]:
+        """Count one hit against several (identifier, limit, window_seconds) limits atomically.
+
+        The hit is counted against all of them only when every limit allows
+        it. ``remaining`` and ``reset_time`` describe the rejecting limit
+        (whose position is ``rejected``), or the tightest one when allowed.
+        Fails open when Redis is down.
+        """
+        if not windows:
+            return {"allowed": True}
         if not cls.is_available():
-            return {"allowed": True, "remaining": limit}
+            return {"allowed": True, "remaining": min(limit for _, limit, _ in windows)}
+        
+        now = time.time()
+        keys, args, reset_times = [], [cost], []
+        for identifier, limit, window_seconds in windows:
+            bucket = int(now // window_seconds)
+            keys.extend((f"rate_limit:{identifier}:{bucket}", f"rate_limit:{identifier}:{bucket - 1}"))
+            args.extend((limit, window_seconds, 1 - (now % window_seconds) / window_seconds))
+            reset_times.append(datetime.utcfromtimestamp((bucket + 1) * window_seconds).isoformat())
         
         try:
             client = cls.get_redis_client()
-            key = f"rate_limit:{identifier}"
-            
-            # Use sliding window counter
-            now = datetime.utcnow()
-            window_start = now - timedelta(seconds=window_seconds)
+            allowed, rejected, *estimates = client.eval(cls._sliding_window_script, len(keys), *keys, *args)
+            cls._record_success()
             
-            # Clean old entries and count current requests
-            pipe = client.pipeline()
-            pipe.zremrangebyscore(key, 0, window_start.timestamp())
-            pipe.zcard(key)
-            pipe.expire(key, window_seconds)
-            
-            results = pipe.execute()
-            current_requests = results[1]
-            
-            if current_requests < limit:
-                # Add current request
-                client.zadd(key, {str(now.timestamp()): now.timestamp()})
-                remaining = limit - current_requests - 1
-                return {
-                    "allowed": True,
-                    "remaining": remaining,
-                    "reset_time": (now + timedelta(seconds=window_seconds)).isoformat()
-                }
-            else:
+            if not allowed:
+                index = int(rejected) - 1
                 return {
                     "allowed": False,
-                    "remaining": 0,
-                    "reset_time": (now + timedelta(seconds=window_seconds)).isoformat()
+                    "rejected": index,
+                    "remaining": max(0, int(windows[index][1] - float(estimates[0]))),
+                    "reset_time": reset_times[index]
                 }
+            
+            remaining = [max(0, int(window[1] - float(estimate))) for window, estimate in zip(windows, estimates)]
+            index = remaining.index(min(remaining))
+            return {"allowed": True, "remaining": remaining[index], "reset_time": reset_times[index]}
                 
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Rate limit check error: {e}")
-            return {"allowed": True, "remaining": limit}
+            return {"allowed": True, "remaining": min(limit for _, limit, _ in windows)}
+
+    @classmethod
+    def check_rate_limit(cls, identifier: str, limit: int, window_seconds: int) -> Dict[str, Any]:
+        """Check rate limit for an identifier"""
+        return cls.sliding_window_hit(identifier, limit, window_seconds)
 
     # Cache warming and maintenance
     
@@ -409,11 +1018,17 @@ class CacheService:
     def get_cache_stats(cls) -> Dict[str, Any]:
         """Get cache statistics"""
         if not cls.is_available():
-            return {"status": "unavailable"}
+            return {
+                "status": "unavailable",
+                "circuit_breaker": cls.get_breaker_stats(),
+                "tiers": cls.get_tier_stats(),
+                "stampede_protection": cls.get_stampede_stats()
+            }
         
         try:
             client = cls.get_redis_client()
             info = client.info()
+            cls._record_success()
             
             stats = {
                 "status": "available",
@@ -434,58 +1049,185 @@ class CacheService:
             else:
                 stats["hit_rate"] = 0
             
+            stats["circuit_breaker"] = cls.get_breaker_stats()
+            stats["tiers"] = cls.get_tier_stats()
+            stats["stampede_protection"] = cls.get_stampede_stats()
+            
             return stats
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache stats error: {e}")
-            return {"status": "error", "error": str(e)}
+            return {"status": "error", "error": str(e), "circuit_breaker": cls.get_breaker_stats()}
 
     # Context manager for cache operations
     
     @classmethod
-    def get_or_set(cls, key: str, fetch_function, ttl: int = None) -> Any:
-        """Get from cache or fetch and set if not found"""
-        # Try to get from cache first
-        cached_value = cls.get(key)
-        if cached_value is not None:
-            return cached_value
+    def get_or_set(cls, key: str, fetch_function, ttl: int = None, stale_ttl: int = None,
+                   tags: List[str] = None) -> Any:
+        """Get from cache or fetch and set if not found.
+        
+        Values are fresh for ``ttl`` seconds and may be served stale for a further
+        ``stale_ttl`` seconds (defaults to ``ttl``) while a single worker holding
+        the refresh lock recomputes them. Entries are also refreshed early with a
+        probability that rises as they approach expiry, so hot keys rarely expire
+        under load.
+        """
+        ttl = ttl or cls.DEFAULT_TTL
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+        
+        entry = cls.get(key)
+        if isinstance(entry, CachedValue):
+            if not cls._should_refresh(entry):
+                cls._stampede_stats["fresh_hits"] += 1
+                return entry.value
+            
+            lock_token = cls._acquire_lock(key)
+            if lock_token is None:
+                # Someone else is refreshing; the stale value is good enough
+                cls._stampede_stats["stale_served"] += 1
+                cls._stampede_stats["recomputes_saved"] += 1
+                return entry.value
+            
+            if time.time() < entry.soft_expires_at:
+                cls._stampede_stats["early_refreshes"] += 1
+            return cls._recompute(key, fetch_function, ttl, stale_ttl, lock_token, tags)
         
-        # Fetch fresh data
-        fresh_value = fetch_function()
+        if entry is not None:
+            # Plain value written by set(); honour it as before
+            return entry
+        
+        lock_token = cls._acquire_lock(key)
+        if lock_token is None and cls.is_available():
+            waited_value = cls._wait_for_refresh(key)
+            if waited_value is not _MISSING:
+                cls._stampede_stats["recomputes_saved"] += 1
+                return waited_value
+            cls._stampede_stats["lock_wait_timeouts"] += 1
+        
+        return cls._recompute(key, fetch_function, ttl, stale_ttl, lock_token, tags)
+
+    @classmethod
+    def _should_refresh(cls, entry: CachedValue) -> bool:
+        """Probabilistic early expiration (XFetch): refresh sooner for slow-to-compute values"""
+        jitter = -entry.compute_seconds * cls.EARLY_EXPIRATION_BETA * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.soft_expires_at
+
+    @classmethod
+    def _recompute(cls, key: str, fetch_function, ttl: int, stale_ttl: int, lock_token: Optional[str],
+                   tags: List[str] = None) -> Any:
+        """Run the fetch function and store its result with soft and hard expiry"""
+        try:
+            started = time.time()
+            fresh_value = fetch_function()
+            compute_seconds = time.time() - started
+            cls._stampede_stats["recomputes"] += 1
+            
+            if fresh_value is not None:
+                entry = CachedValue(fresh_value, time.time() + ttl, compute_seconds)
+                cls.set(key, entry, ttl + stale_ttl, tags)
+            
+            return fresh_value
+        finally:
+            if lock_token is not None:
+                cls._release_lock(key, lock_token)
+
+    @classmethod
+    def _wait_for_refresh(cls, key: str) -> Any:
+        """Poll for the value another worker is computing, up to the wait timeout"""
+        deadline = time.monotonic() + cls.LOCK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(cls.LOCK_POLL_INTERVAL)
+            entry = cls.get(key)
+            if isinstance(entry, CachedValue):
+                return entry.value
+            if entry is not None:
+                return entry
+        return _MISSING
+
+    @classmethod
+    def _acquire_lock(cls, key: str) -> Optional[str]:
+        """Take the per-key refresh lock with a lease; returns a token or None"""
+        if not cls.is_available():
+            return None
         
-        # Cache the result
-        if fresh_value is not None:
-            cls.set(key, fresh_value, ttl or cls.DEFAULT_TTL)
+        try:
+            client = cls.get_redis_client()
+            token = uuid.uuid4().hex
+            acquired = client.set(f"{cls.LOCK_PREFIX}{key}", token, nx=True, px=cls.LOCK_LEASE_MS)
+            cls._record_success()
+            return token if acquired else None
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache lock error for key {key}: {e}")
+            return None
+
+    @classmethod
+    def _release_lock(cls, key: str, token: str):
+        """Release the refresh lock only if we still own it"""
+        if not cls.is_available():
+            return
         
-        return fresh_value
+        try:
+            client = cls.get_redis_client()
+            client.eval(cls._release_lock_script, 1, f"{cls.LOCK_PREFIX}{key}", token)
+            cls._record_success()
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache unlock error for key {key}: {e}")
+
+    @classmethod
+    def get_stampede_stats(cls) -> Dict[str, Any]:
+        """Get get_or_set refresh counters"""
+        return dict(cls._stampede_stats)
 
     @classmethod
     def mget(cls, keys: List[str]) -> Dict[str, Any]:
         """Get multiple keys at once"""
+        result = {}
+        remote_keys = []
+        for key in keys:
+            local_value = cls._l1_get(key)
+            if local_value is _MISSING:
+                remote_keys.append(key)
+            else:
+                result[key] = local_value
+        
+        if not remote_keys:
+            return result
+        
         if not cls.is_available():
-            return {}
+            return result
         
         try:
             client = cls.get_redis_client()
-            values = client.mget(keys)
+            values = client.mget(remote_keys)
+            cls._record_success()
             
-            result = {}
-            for key, value in zip(keys, values):
+            for key, value in zip(remote_keys, values):
                 if value is not None:
+                    cls._tier_stats["l2_hits"] += 1
                     try:
                         result[key] = json.loads(value.decode('utf-8'))
                     except (json.JSONDecodeError, UnicodeDecodeError):
                         result[key] = pickle.loads(value)
+                    cls._l1_set(key, result[key])
+                else:
+                    cls._tier_stats["l2_misses"] += 1
                 
             return result
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache mget error: {e}")
-            return {}
+            return result
 
     @classmethod
-    def mset(cls, key_value_pairs: Dict[str, Any], ttl: int = None) -> bool:
-        """Set multiple key-value pairs at once"""
+    def mset(cls, key_value_pairs: Dict[str, Any], ttl: int = None,
+             tags: Dict[str, List[str]] = None) -> bool:
+        """Set multiple key-value pairs at once; tags maps keys to their invalidation tags"""
         if not cls.is_available():
             return False
         
@@ -493,17 +1235,247 @@ class CacheService:
             client = cls.get_redis_client()
             pipe = client.pipeline()
             
+            decoded_values = {}
             for key, value in key_value_pairs.items():
-                if isinstance(value, (dict, list)):
-                    serialized_value = json.dumps(value, default=str)
-                else:
-                    serialized_value = pickle.dumps(value)
-                
+                serialized_value, decoded_values[key] = cls._serialize(value)
                 pipe.setex(key, ttl or cls.DEFAULT_TTL, serialized_value)
             
-            results = pipe.execute()
+            cls._add_tags(pipe, tags or {}, ttl or cls.DEFAULT_TTL)
+            cls._publish_invalidation(pipe, "keys", list(key_value_pairs.keys()))
+            
+            results = pipe.execute()[:len(key_value_pairs)]
+            cls._record_success()
+            
+            for key, value in decoded_values.items():
+                cls._local_cache.delete(key)
+                cls._l1_set(key, value, ttl or cls.DEFAULT_TTL)
+            
             return all(results)
             
         except Exception as e:
+            cls._record_failure(e)
             logging.error(f"Cache mset error: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    # Sorted-set timelines (members ordered by score, newest first)
+    
+    # Adds members to each key that already exists, then trims it to the top max_length
+    _zadd_existing_script = """
+    local max_length = tonumber(ARGV[1])
+    local updated = 0
+    for _, key in ipairs(KEYS) do
+        if redis.call('exists', key) == 1 then
+            for i = 2, #ARGV, 2 do
+                redis.call('zadd', key, ARGV[i + 1], ARGV[i])
+            end
+            redis.call('zremrangebyrank', key, 0, -(max_length + 1))
+            updated = updated + 1
+        end
+    end
+    return updated
+    """
+    
+    @classmethod
+    def timeline_push(cls, keys: List[str], entries: Dict[str, float], max_length: int) -> int:
+        """Add scored members to existing timelines and trim each to max_length; returns timelines updated"""
+        if not keys or not entries or not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            args = [max_length]
+            for member, score in entries.items():
+                args.extend([member, score])
+            
+            # Missing timelines are skipped: they are rebuilt from the database on the next read
+            updated = client.eval(cls._zadd_existing_script, len(keys), *keys, *args)
+            cls._record_success()
+            return int(updated)
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache timeline push error for {len(keys)} timelines: {e}")
+            return 0
+    
+    @classmethod
+    def timeline_fill(cls, key: str, entries: Dict[str, float], max_length: int, ttl: int = None) -> bool:
+        """Replace a timeline's contents; an empty timeline is kept so it is not rebuilt on every read"""
+        if not cls.is_available():
+            return False
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.zadd(key, {**entries, cls.TIMELINE_SENTINEL: 0})
+            pipe.zremrangebyrank(key, 0, -(max_length + 2))
+            pipe.expire(key, ttl or cls.DEFAULT_TTL)
+            pipe.execute()
+            cls._record_success()
+            return True
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache timeline fill error for key {key}: {e}")
+            return False
+    
+    @classmethod
+    def timeline_page(cls, key: str, before: Optional[float] = None, limit: int = 20,
+                      ttl: int = None, before_member: Optional[str] = None) -> Optional[List[tuple]]:
+        """Get up to limit (member, score) pairs after the (before, before_member) position, newest first.
+        
+        Members sharing a score are ordered by member, descending; with
+        before_member the ones at score `before` ranking below it are included,
+        otherwise everything at that score is skipped.
+        Returns None when the timeline does not exist or Redis is unavailable.
+        Reading a timeline extends its TTL so active users keep receiving fan-out.
+        """
+        if not cls.is_available():
+            return None
+        
+        try:
+            client = cls.get_redis_client()
+            max_score = f"({before}" if before is not None else "+inf"
+            pipe = client.pipeline(transaction=False)
+            pipe.exists(key)
+            pipe.zrevrangebyscore(key, max_score, "(0", start=0, num=limit, withscores=True)
+            pipe.expire(key, ttl or cls.DEFAULT_TTL)
+            if before is not None and before_member is not None:
+                pipe.zrevrangebyscore(key, before, before, withscores=True)
+            exists, entries, _, *ties = pipe.execute()
+            cls._record_success()
+            
+            if not exists:
+                return None
+            
+            page = [(member.decode('utf-8'), score) for member, score in entries]
+            if ties:
+                tied = [(member.decode('utf-8'), score) for member, score in ties[0]]
+                page = [(member, score) for member, score in tied if member < before_member] + page
+            return page[:limit]
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache timeline page error for key {key}: {e}")
+            return None
+    
+    @classmethod
+    def timeline_remove(cls, key: str, members: List[str]) -> int:
+        """Remove members from a timeline"""
+        if not members or not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            removed = client.zrem(key, *members)
+            cls._record_success()
+            return removed
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache timeline remove error for key {key}: {e}")
+            return 0
+
+    # Sorted-set leaderboards (members ordered by score, highest first)
+    
+    @classmethod
+    def leaderboard_update(cls, key: str, entries: Dict[str, float], max_length: int) -> bool:
+        """Set member scores on an existing leaderboard and trim it; missing boards are rebuilt on read"""
+        if not entries or not cls.is_available():
+            return False
+        
+        try:
+            client = cls.get_redis_client()
+            args = [max_length]
+            for member, score in entries.items():
+                args.extend([member, score])
+            
+            updated = client.eval(cls._zadd_existing_script, 1, key, *args)
+            cls._record_success()
+            return bool(updated)
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache leaderboard update error for key {key}: {e}")
+            return False
+    
+    @classmethod
+    def leaderboard_fill(cls, key: str, entries: Dict[str, float], ttl: int = None) -> bool:
+        """Replace a leaderboard's contents atomically"""
+        if not cls.is_available():
+            return False
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(key)
+            if entries:
+                pipe.zadd(key, entries)
+                pipe.expire(key, ttl or cls.LONG_TTL)
+            pipe.execute()
+            cls._record_success()
+            return True
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache leaderboard fill error for key {key}: {e}")
+            return False
+    
+    @classmethod
+    def leaderboard_top(cls, key: str, limit: int) -> Optional[List[tuple]]:
+        """Get the top (member, score) pairs, highest first.
+        
+        Returns None when the leaderboard does not exist or Redis is unavailable.
+        """
+        if not cls.is_available():
+            return None
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.exists(key)
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            exists, entries = pipe.execute()
+            cls._record_success()
+            
+            if not exists:
+                return None
+            
+            return [(member.decode('utf-8'), score) for member, score in entries]
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache leaderboard read error for key {key}: {e}")
+            return None
+    
+    @classmethod
+    def leaderboard_remove(cls, keys: List[str], member: str) -> int:
+        """Remove a member from several leaderboards"""
+        if not keys or not cls.is_available():
+            return 0
+        
+        try:
+            client = cls.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.zrem(key, member)
+            removed = sum(pipe.execute())
+            cls._record_success()
+            return removed
+            
+        except Exception as e:
+            cls._record_failure(e)
+            logging.error(f"Cache leaderboard remove error for member {member}: {e}")
+            return 0
+
+
+def _reset_after_fork():
+    # Locks and L1 contents must not be inherited from the parent process
+    CacheService._local_cache = LocalLRUCache(CacheService.L1_MAX_ENTRIES, CacheService.L1_TTL)
+    CacheService._listener_lock = threading.Lock()
+    CacheService._listener_pid = None
+    CacheService._breaker_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -5,6 +5,8 @@ from bson import ObjectId
 import logging
 from backend.repositories.custom_task_repository import CustomTaskRepository
 from backend.repositories.shared_skill_repository import SharedSkillRepository
+from backend.services.moderation_service import ModerationService
+from backend.services.user_info_loader import UserInfoLoader
 
 class CustomTaskService:
     """Service for managing custom tasks added to shared skills"""
@@ -55,6 +57,8 @@ class CustomTaskService:
             }
         }
         
+        ModerationService.check_posting_rate(user_id, ModerationService.CUSTOM_TASK)
+        
         # Create the custom task
         custom_task = custom_task_repo.create(clean_task_data)
         
@@ -133,10 +137,7 @@ class CustomTaskService:
             tasks = custom_task_repo.find_by_skill(skill_id)
         
         # Enrich tasks with user information
-        enriched_tasks = []
-        for task in tasks:
-            task["user_info"] = CustomTaskService._get_user_info(str(task["user_id"]))
-            enriched_tasks.append(task)
+        enriched_tasks = UserInfoLoader.current().attach(list(tasks))
         
         # Group by day if getting all tasks
         if not day:
@@ -168,8 +169,7 @@ class CustomTaskService:
         popular_tasks = custom_task_repo.get_popular_tasks(limit)
         
         # Enrich with user information
-        for task in popular_tasks:
-            task["user_info"] = CustomTaskService._get_user_info(str(task["user_id"]))
+        UserInfoLoader.current().attach(popular_tasks)
         
         return popular_tasks
 
@@ -329,18 +329,4 @@ class CustomTaskService:
     @staticmethod
     def _get_user_info(user_id: str) -> Dict:
         """Get basic user information"""
-        from backend.auth.models import User
-        
-        user = User.find_by_id(user_id)
-        if user:
-            return {
-                "user_id": user_id,
-                "username": user.get("username", "Unknown"),
-                "avatar_url": f"https://ui-avatars.com/api/?name={user.get('username', 'U')}&background=8B5CF6&color=fff&size=40"
-            }
-        else:
-            return {
-                "user_id": user_id,
-                "username": "Unknown User",
-                "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
-            }
\ No newline at end of file
+        return UserInfoLoader.current().load(user_id)
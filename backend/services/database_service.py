@@ -0,0 +1,189 @@
+import os
+import logging
+import threading
+import time
+from typing import Any, Dict
+from pymongo import MongoClient, monitoring
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Collects connection pool counters for the shared MongoClient"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._checkout_started.clear()
+            self.connections_open = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.pools_cleared = 0
+
+    def _record_wait(self, event) -> None:
+        started = self._checkout_started.pop(threading.get_ident(), None)
+        if started is None:
+            return
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.total_wait_ms += waited_ms
+        self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started[threading.get_ident()] = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._record_wait(event)
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._record_wait(event)
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "pools_cleared": self.pools_cleared
+            }
+
+
+class DatabaseService:
+    """Process-wide pooled MongoDB client shared by every request in a worker"""
+
+    _client = None
+    _client_pid = None
+    _lock = threading.Lock()
+    _pool_listener = PoolMetricsListener()
+
+    @classmethod
+    def get_pool_options(cls) -> Dict[str, Any]:
+        """Connection pool settings, overridable through the environment"""
+        return {
+            "maxPoolSize": int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+            "minPoolSize": int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+            "maxIdleTimeMS": int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000)),
+            "maxConnecting": int(os.getenv('MONGO_MAX_CONNECTING', 2)),
+            "waitQueueTimeoutMS": int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+            "connectTimeoutMS": int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000)),
+            "serverSelectionTimeoutMS": int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+        }
+
+    @classmethod
+    def get_client(cls) -> MongoClient:
+        """Get the MongoClient for the current process, creating it after a fork"""
+        pid = os.getpid()
+        if cls._client is not None and cls._client_pid == pid:
+            return cls._client
+
+        with cls._lock:
+            if cls._client is not None and cls._client_pid == pid:
+                return cls._client
+
+            mongo_uri = os.getenv("MONGO_URI")
+            if not mongo_uri:
+                raise ValueError("MONGO_URI environment variable not set.")
+
+            if cls._client is not None:
+                # Inherited from the parent process; its sockets belong to the parent
+                logging.info(f"Discarding MongoDB client inherited from pid {cls._client_pid}")
+                cls._pool_listener = PoolMetricsListener()
+
+            cls._client = MongoClient(
+                mongo_uri,
+                event_listeners=[cls._pool_listener],
+                **cls.get_pool_options()
+            )
+            cls._client_pid = pid
+            logging.info(f"MongoDB connection pool created for pid {pid}")
+
+        return cls._client
+
+    @classmethod
+    def get_database(cls):
+        """Get the default database of the shared client"""
+        return cls.get_client().get_default_database()
+
+    @classmethod
+    def close(cls) -> None:
+        """Close the shared client (call on worker shutdown)"""
+        with cls._lock:
+            if cls._client is not None and cls._client_pid == os.getpid():
+                cls._client.close()
+            cls._client = None
+            cls._client_pid = None
+            cls._pool_listener.reset()
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """Get connection pool metrics for this worker process"""
+        options = cls.get_pool_options()
+        stats: Dict[str, Any] = {
+            "status": "connected" if cls._client is not None and cls._client_pid == os.getpid() else "not_connected",
+            "pid": os.getpid(),
+            "max_pool_size": options["maxPoolSize"],
+            "min_pool_size": options["minPoolSize"],
+            "max_idle_time_ms": options["maxIdleTimeMS"],
+            "wait_queue_timeout_ms": options["waitQueueTimeoutMS"]
+        }
+        stats.update(cls._pool_listener.snapshot())
+        return stats
+
+
+def _reset_after_fork() -> None:
+    # Child processes must never reuse the parent's sockets or lock state
+    DatabaseService._lock = threading.Lock()
+    DatabaseService._client = None
+    DatabaseService._client_pid = None
+    DatabaseService._pool_listener = PoolMetricsListener()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
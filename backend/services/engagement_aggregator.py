@@ -0,0 +1,193 @@
+import os
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Set
+from bson import ObjectId
+from pymongo import UpdateOne
+from backend.repositories.checkpoint_repository import CheckpointRepository
+from backend.services.analytics_ingest_service import AnalyticsIngestService
+from backend.services.bulk_writer import BulkWriter
+from backend.services.cache_service import CacheService
+
+class EngagementAggregator:
+    """Folds new skill analytics events into running engagement counters on shared skills.
+
+    Each run resumes after the last processed ``analytics_events`` _id, so its cost
+    tracks the number of new events rather than a time window. A range of events is
+    claimed by moving the checkpoint with a compare-and-set before it is applied, so
+    concurrent workers never apply the same events twice. A range whose run failed
+    is applied again by a later run; skills record the last range applied to them
+    so the counters that were already written are not incremented twice.
+    """
+
+    CHECKPOINT_NAME = "skill_engagement"
+
+    # Running counter per event type and its engagement score weight
+    EVENT_FIELDS = {
+        "skill_view": "views",
+        "skill_like": "likes",
+        "skill_download": "downloads",
+        "skill_comment": "comments"
+    }
+    EVENT_WEIGHTS = {
+        "skill_view": 1,
+        "skill_like": 3,
+        "skill_download": 5,
+        "skill_comment": 4
+    }
+    UNIQUE_USER_WEIGHT = 2
+
+    BATCH_SIZE = int(os.getenv('ENGAGEMENT_BATCH_SIZE', 5000))
+    MAX_BATCHES_PER_RUN = int(os.getenv('ENGAGEMENT_MAX_BATCHES_PER_RUN', 20))
+    # Newer events may still be committing out of _id order (retried flushes)
+    SETTLE_SECONDS = AnalyticsIngestService.SETTLE_SECONDS
+    INITIAL_LOOKBACK = timedelta(hours=1)
+    CLAIM_TIMEOUT = timedelta(minutes=10)  # a claimed range not applied by then is applied again
+
+    def __init__(self, db):
+        self.db = db
+        self.checkpoints = CheckpointRepository(db.batch_checkpoints)
+
+    def run(self) -> Dict[str, Any]:
+        """Process every settled event since the checkpoint, in bounded batches"""
+        now = datetime.utcnow()
+        upper_bound = ObjectId.from_datetime(now - timedelta(seconds=self.SETTLE_SECONDS))
+        checkpoint = self.checkpoints.get_or_create(
+            self.CHECKPOINT_NAME, ObjectId.from_datetime(now - self.INITIAL_LOOKBACK)
+        )
+        last_event_id = checkpoint["last_event_id"]
+
+        summary = {"events": 0, "skills": 0, "batches": 0, "reapplied": 0}
+        pending = self.checkpoints.reclaim_pending(self.CHECKPOINT_NAME, now - self.CLAIM_TIMEOUT)
+        if pending:
+            events = self._load_range(pending["applied_event_id"], pending["last_event_id"])
+            logging.warning(f"Re-applying {len(events)} engagement events from an unfinished run")
+            summary["skills"] += self._apply(events, pending["last_event_id"], reapply=True)
+            self.checkpoints.mark_applied(self.CHECKPOINT_NAME, pending["last_event_id"])
+            summary["reapplied"] = len(events)
+
+        for _ in range(self.MAX_BATCHES_PER_RUN):
+            if last_event_id >= upper_bound:
+                break
+
+            events = self._load_events(last_event_id, upper_bound)
+            caught_up = len(events) < self.BATCH_SIZE
+            next_event_id = upper_bound if caught_up else events[-1]["_id"]
+
+            if not self.checkpoints.advance(self.CHECKPOINT_NAME, last_event_id, next_event_id, len(events)):
+                logging.info("Engagement events already claimed by another worker")
+                break
+
+            summary["skills"] += self._apply(events, next_event_id)
+            self.checkpoints.mark_applied(self.CHECKPOINT_NAME, next_event_id)
+            summary["events"] += len(events)
+            summary["batches"] += 1
+            last_event_id = next_event_id
+
+            if caught_up:
+                break
+
+        return summary
+
+    def _find_events(self, id_range: Dict):
+        return self.db.analytics_events.find(
+            {
+                "_id": id_range,
+                "event_type": {"$in": list(self.EVENT_FIELDS)},
+                "skill_id": {"$ne": None}
+            },
+            {"event_type": 1, "skill_id": 1, "user_id": 1}
+        ).sort("_id", 1)
+
+    def _load_events(self, after_id: ObjectId, before_id: ObjectId) -> List[Dict]:
+        return list(self._find_events({"$gt": after_id, "$lt": before_id}).limit(self.BATCH_SIZE))
+
+    def _load_range(self, after_id: ObjectId, through_id: ObjectId) -> List[Dict]:
+        """Every event of a claimed range; a full batch's range ends at its last event"""
+        return list(self._find_events({"$gt": after_id, "$lte": through_id}))
+
+    def _apply(self, events: List[Dict], range_id: ObjectId, reapply: bool = False) -> int:
+        """Fold a batch into per-skill deltas and write them with one bulk_write.
+
+        ``range_id`` is the end of the claimed range. Skills already carrying
+        it (or a later one) in ``engagement_applied_to`` are skipped, which
+        makes applying the same range again safe.
+        """
+        if not events:
+            return 0
+
+        counters: Dict[Any, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        engagers: Dict[Any, Set] = defaultdict(set)
+
+        for event in events:
+            skill_id = event["skill_id"]
+            event_type = event["event_type"]
+            counters[skill_id][self.EVENT_FIELDS[event_type]] += 1
+            counters[skill_id]["score"] += self.EVENT_WEIGHTS[event_type]
+            if event.get("user_id"):
+                engagers[skill_id].add(event["user_id"])
+
+        for skill_id, new_users in self._record_new_engagers(engagers, range_id, reapply).items():
+            counters[skill_id]["unique_users"] += new_users
+            counters[skill_id]["score"] += new_users * self.UNIQUE_USER_WEIGHT
+
+        now = datetime.utcnow()
+        with BulkWriter(self.db.shared_skills, name="skill_engagement") as writer:
+            for skill_id, delta in counters.items():
+                increments = {f"engagement.{field}": count for field, count in delta.items() if field != "score"}
+                increments["engagement_score"] = delta["score"]
+                writer.add(UpdateOne(
+                    {"_id": skill_id, "engagement_applied_to": {"$not": {"$gte": range_id}}},
+                    {"$inc": increments, "$set": {"last_engagement_update": now, "engagement_applied_to": range_id}}
+                ))
+                writer.invalidate(f"{CacheService.SKILL_PREFIX}data:{skill_id}")
+
+        return len(counters)
+
+    def _record_new_engagers(self, engagers: Dict[Any, Set], range_id: ObjectId,
+                             reapply: bool = False) -> Dict[Any, int]:
+        """Count users engaging with each skill for the first time in this range"""
+        operations = []
+        owners = []
+        for skill_id, user_ids in engagers.items():
+            for user_id in user_ids:
+                operations.append(UpdateOne(
+                    {"skill_id": skill_id, "user_id": user_id},
+                    {"$setOnInsert": {"first_seen": datetime.utcnow(), "first_range": range_id}},
+                    upsert=True
+                ))
+                owners.append(skill_id)
+
+        if not operations:
+            return {}
+
+        result = self.db.skill_engagers.bulk_write(operations, ordered=False)
+
+        new_users: Dict[Any, int] = defaultdict(int)
+        if reapply:
+            # Engagers the failed attempt inserted already exist, so count by range
+            for row in self.db.skill_engagers.aggregate([
+                {"$match": {"skill_id": {"$in": list(engagers)}, "first_range": range_id}},
+                {"$group": {"_id": "$skill_id", "count": {"$sum": 1}}}
+            ]):
+                new_users[row["_id"]] = row["count"]
+            return new_users
+
+        for operation_index in result.upserted_ids:
+            new_users[owners[operation_index]] += 1
+        return new_users
+
+    def get_status(self) -> Dict[str, Any]:
+        """Checkpoint position and lag for the batch status endpoint"""
+        checkpoint = self.checkpoints.find(self.CHECKPOINT_NAME)
+        if not checkpoint:
+            return {"initialized": False}
+
+        return {
+            "initialized": True,
+            "last_event_id": str(checkpoint["last_event_id"]),
+            "lag_seconds": round((datetime.utcnow() - checkpoint["last_event_id"].generation_time.replace(tzinfo=None)).total_seconds()),
+            "events_processed": checkpoint.get("events_processed", 0),
+            "updated_at": checkpoint.get("updated_at")
+        }
@@ -4,6 +4,9 @@ from bson import ObjectId
 import logging
 from backend.repositories.user_relationship_repository import UserRelationshipRepository
 from backend.services.notification_service import NotificationService
+from backend.services.activity_feed_service import ActivityFeedService
+from backend.services.leaderboard_service import LeaderboardService
+from backend.services.follow_suggestion_service import FollowSuggestionService
 
 class FollowService:
     """Service for managing user follow relationships and related features"""
@@ -38,6 +41,8 @@ class FollowService:
             relationship = relationship_repo.create_relationship(
                 follower_id, following_id, "follow"
             )
+            LeaderboardService.record_follow(follower_id, following_id, 1)
+            FollowSuggestionService.on_follow(follower_id, following_id)
             
             # Create notification for the followed user
             follower_user = User.find_by_id(follower_id)
@@ -71,6 +76,8 @@ class FollowService:
             except Exception as e:
                 logging.error(f"Failed to send follow WebSocket notification: {e}")
             
+            ActivityFeedService.on_follow(follower_id, following_id, target_user)
+            
             logging.info(f"User {follower_id} started following {following_id}")
             
             return True, "Successfully followed user", {
@@ -104,6 +111,9 @@ class FollowService:
             result = relationship_repo.delete_relationship(follower_id, following_id, "follow")
             
             if result.deleted_count > 0:
+                LeaderboardService.record_follow(follower_id, following_id, -1)
+                FollowSuggestionService.on_unfollow(follower_id)
+                ActivityFeedService.on_unfollow(follower_id, following_id)
                 logging.info(f"User {follower_id} unfollowed {following_id}")
                 return True, "Successfully unfollowed user"
             else:
@@ -215,12 +225,10 @@ class FollowService:
 
     @staticmethod
     def get_follow_suggestions(user_id: str, limit: int = 10) -> Dict:
-        """Get suggested users to follow"""
-        
-        relationship_repo = UserRelationshipRepository(g.db.user_relationships)
+        """Get suggested users to follow from the precomputed suggestion index"""
         
         try:
-            suggestions = relationship_repo.get_suggested_follows(user_id, limit)
+            suggestions = FollowSuggestionService.get_suggestions(user_id, limit)
             
             # Format suggestions
             formatted_suggestions = []
@@ -322,7 +330,14 @@ class FollowService:
         relationship_repo = UserRelationshipRepository(g.db.user_relationships)
         
         try:
-            unfollowed_count = relationship_repo.bulk_unfollow(user_id, following_ids)
+            followed_ids = relationship_repo.get_following_ids(user_id, limit=len(following_ids), among=following_ids)
+            unfollowed_count = relationship_repo.bulk_unfollow(user_id, followed_ids) if followed_ids else 0
+            
+            for following_id in followed_ids:
+                LeaderboardService.record_follow(user_id, following_id, -1)
+                ActivityFeedService.on_unfollow(user_id, following_id)
+            if followed_ids:
+                FollowSuggestionService.on_unfollow(user_id)
             
             logging.info(f"User {user_id} bulk unfollowed {unfollowed_count} users")
             
@@ -350,11 +365,16 @@ class FollowService:
                 return False, "User is already blocked"
             
             # Remove any follow relationships first
-            relationship_repo.delete_relationship(blocker_id, blocked_id, "follow")
-            relationship_repo.delete_relationship(blocked_id, blocker_id, "follow")
+            for follower_id, following_id in ((blocker_id, blocked_id), (blocked_id, blocker_id)):
+                result = relationship_repo.delete_relationship(follower_id, following_id, "follow")
+                if result.deleted_count > 0:
+                    LeaderboardService.record_follow(follower_id, following_id, -1)
+                    FollowSuggestionService.on_unfollow(follower_id)
+                    ActivityFeedService.on_unfollow(follower_id, following_id)
             
             # Create block relationship
             relationship_repo.create_relationship(blocker_id, blocked_id, "block")
+            FollowSuggestionService.on_block(blocker_id, blocked_id)
             
             logging.info(f"User {blocker_id} blocked user {blocked_id}")
             
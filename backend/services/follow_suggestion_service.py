@@ -0,0 +1,125 @@
+from typing import Dict, List
+from datetime import datetime, timedelta
+from flask import g
+import logging
+import os
+from backend.repositories.follow_suggestion_repository import FollowSuggestionRepository
+from backend.repositories.user_relationship_repository import UserRelationshipRepository
+from backend.repositories.user_stats_repository import UserStatsRepository
+
+class FollowSuggestionService:
+    """Friends-of-friends suggestions served from a precomputed per-user index.
+
+    Each user's top-K candidates and their mutual-connection counts are stored
+    in ``follow_suggestions``. Follow edge changes mark the affected entries
+    dirty (the user and, up to a fan-out limit, their followers, whose
+    candidates are counted through them); a scheduled job recomputes dirty
+    entries. Reads are a single document lookup plus one profile query.
+    """
+
+    TOP_K = int(os.getenv('SUGGESTIONS_TOP_K', 50))
+    MAX_AGE = timedelta(seconds=int(os.getenv('SUGGESTIONS_MAX_AGE', 86400)))
+    FANOUT_LIMIT = int(os.getenv('SUGGESTIONS_FANOUT_LIMIT', 5000))
+    REFRESH_BATCH_SIZE = int(os.getenv('SUGGESTIONS_REFRESH_BATCH_SIZE', 500))
+
+    @staticmethod
+    def get_suggestions(user_id: str, limit: int = 10) -> List[Dict]:
+        """Top candidates with profile fields, computing the entry on first use"""
+        suggestion_repo = FollowSuggestionRepository(g.db.follow_suggestions)
+        entry = suggestion_repo.find(user_id)
+
+        if entry is None:
+            candidates = FollowSuggestionService.compute(user_id)
+        else:
+            candidates = entry.get("candidates", [])
+            if not entry.get("dirty") and entry["computed_at"] < datetime.utcnow() - FollowSuggestionService.MAX_AGE:
+                # Serve the stale list and let the refresh job recompute it
+                suggestion_repo.mark_dirty([user_id])
+
+        # Over-fetch a little so deactivated users can be skipped
+        candidates = candidates[:limit * 2]
+        profiles = UserStatsRepository(g.db.users).find_profiles([str(c["user_id"]) for c in candidates])
+
+        suggestions = []
+        for candidate in candidates:
+            profile = profiles.get(str(candidate["user_id"]))
+            if not profile or profile.get("is_deactivated") or not profile.get("username"):
+                continue
+
+            suggestions.append({**candidate, "username": profile["username"],
+                                "profile_picture": profile.get("profile_picture")})
+            if len(suggestions) >= limit:
+                break
+
+        return suggestions
+
+    @staticmethod
+    def compute(user_id: str) -> List[Dict]:
+        """Recompute and store a user's candidates"""
+        started_at = datetime.utcnow()
+        candidates = UserRelationshipRepository(g.db.user_relationships).get_suggestion_candidates(
+            user_id, FollowSuggestionService.TOP_K
+        )
+        FollowSuggestionRepository(g.db.follow_suggestions).replace(user_id, candidates, started_at)
+        return candidates
+
+    @staticmethod
+    def on_follow(follower_id: str, following_id: str):
+        """Drop the newly followed user from the follower's list and invalidate dependent entries"""
+        try:
+            FollowSuggestionRepository(g.db.follow_suggestions).remove_candidate(follower_id, following_id)
+            FollowSuggestionService._mark_network_dirty(follower_id)
+        except Exception as e:
+            logging.error(f"Error invalidating follow suggestions for {follower_id} -> {following_id}: {e}")
+
+    @staticmethod
+    def on_unfollow(follower_id: str):
+        """Invalidate entries whose candidates were counted through the follower's removed edges"""
+        try:
+            FollowSuggestionService._mark_network_dirty(follower_id)
+        except Exception as e:
+            logging.error(f"Error invalidating follow suggestions for {follower_id}: {e}")
+
+    @staticmethod
+    def on_block(blocker_id: str, blocked_id: str):
+        """Hide both users from each other's suggestions right away"""
+        try:
+            suggestion_repo = FollowSuggestionRepository(g.db.follow_suggestions)
+            suggestion_repo.remove_candidate(blocker_id, blocked_id)
+            suggestion_repo.remove_candidate(blocked_id, blocker_id)
+            suggestion_repo.mark_dirty([blocker_id, blocked_id])
+        except Exception as e:
+            logging.error(f"Error invalidating follow suggestions after block {blocker_id} -> {blocked_id}: {e}")
+
+    @staticmethod
+    def _mark_network_dirty(user_id: str):
+        suggestion_repo = FollowSuggestionRepository(g.db.follow_suggestions)
+        suggestion_repo.mark_dirty([user_id])
+
+        # Followers see this user's followees as candidates; very large
+        # audiences are left to the max-age refresh instead
+        marked = 0
+        relationship_repo = UserRelationshipRepository(g.db.user_relationships)
+        for follower_ids in relationship_repo.iter_follower_ids(user_id):
+            suggestion_repo.mark_dirty(follower_ids)
+            marked += len(follower_ids)
+            if marked >= FollowSuggestionService.FANOUT_LIMIT:
+                break
+
+    @staticmethod
+    def refresh_dirty() -> int:
+        """Recompute dirty entries, oldest first; scheduled job"""
+        user_ids = FollowSuggestionRepository(g.db.follow_suggestions).find_dirty(
+            FollowSuggestionService.REFRESH_BATCH_SIZE
+        )
+
+        refreshed = 0
+        for user_id in user_ids:
+            try:
+                FollowSuggestionService.compute(user_id)
+                refreshed += 1
+            except Exception as e:
+                logging.error(f"Error refreshing follow suggestions for {user_id}: {e}")
+
+        logging.info(f"Refreshed follow suggestions for {refreshed} of {len(user_ids)} users")
+        return refreshed
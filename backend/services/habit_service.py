@@ -6,6 +6,7 @@ from backend.services.ai_service import AIService
 import logging
 from flask import g
 from backend.services.unsplash_service import UnsplashService
+from backend.services.http_client_service import http_client_service
 
 class HabitService:
     @staticmethod
@@ -67,8 +68,7 @@ class HabitService:
             habit_plan_data["reminder_message"] = reminder_message
 
         try:
-            import asyncio
-            habit_plan_data["icon_url"] = asyncio.run(UnsplashService.fetch_image(category or title))
+            habit_plan_data["icon_url"] = http_client_service.run(UnsplashService.fetch_image(category or title), timeout=60)
         except Exception as e:
             logging.error(f"Unsplash fetch failed for habit '{title}': {e}")
 
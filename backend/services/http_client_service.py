@@ -0,0 +1,254 @@
+import os
+import atexit
+import asyncio
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+class UpstreamStats:
+    """Request counters and a latency histogram for one upstream host"""
+
+    LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.status_codes: Dict[str, int] = {}
+        self.bucket_counts = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+        self.total_latency_ms = 0.0
+
+    def observe(self, latency_ms: float, status: Optional[int]):
+        self.requests += 1
+        self.total_latency_ms += latency_ms
+        self.bucket_counts[bisect_left(self.LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+        status_key = str(status) if status is not None else "error"
+        self.status_codes[status_key] = self.status_codes.get(status_key, 0) + 1
+        if status is None or status >= 500:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        bounds = [f"le_{bound}ms" for bound in self.LATENCY_BUCKETS_MS] + ["le_inf"]
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "status_codes": dict(self.status_codes),
+            "avg_latency_ms": round(self.total_latency_ms / self.requests, 1) if self.requests else 0,
+            "latency_histogram": dict(zip(bounds, self.bucket_counts))
+        }
+
+
+class HttpClientService:
+    """Shared outbound HTTP layer: one event loop thread per process with pooled keep-alive clients per host"""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Methods that can be sent twice without a second side effect
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    # Transport errors raised before the request reached the upstream
+    UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+    # Per-upstream overrides; other hosts use the defaults below
+    UPSTREAMS = {
+        "openrouter.ai": {
+            "max_concurrency": int(os.getenv('OPENROUTER_MAX_CONCURRENCY', 4)),
+            "timeout": 30.0,
+            "max_retries": 2
+        },
+        "api.unsplash.com": {
+            "max_concurrency": int(os.getenv('UNSPLASH_MAX_CONCURRENCY', 8)),
+            "timeout": 15.0,
+            "max_retries": 2
+        }
+    }
+
+    def __init__(self):
+        self.default_concurrency = int(os.getenv('HTTP_MAX_CONCURRENCY_PER_HOST', 10))
+        self.default_timeout = float(os.getenv('HTTP_DEFAULT_TIMEOUT', 20))
+        self.default_retries = int(os.getenv('HTTP_MAX_RETRIES', 2))
+        self.backoff_base = float(os.getenv('HTTP_RETRY_BACKOFF_BASE', 0.5))  # seconds
+        self.backoff_max = float(os.getenv('HTTP_RETRY_BACKOFF_MAX', 8))
+        self.keepalive_expiry = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 60))
+
+        self._loop = None
+        self._loop_thread = None
+        self._loop_pid = None
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, UpstreamStats] = {}
+
+    # Event loop
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get this process's outbound event loop, starting its thread on first use"""
+        pid = os.getpid()
+        if self._loop is not None and self._loop_pid == pid:
+            return self._loop
+
+        with self._lock:
+            if self._loop is not None and self._loop_pid == pid:
+                return self._loop
+
+            # Clients and semaphores from a parent process are bound to its loop
+            self._clients = {}
+            self._semaphores = {}
+            self.stats = {}
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="http-client", daemon=True)
+            thread.start()
+
+            self._loop = loop
+            self._loop_thread = thread
+            self._loop_pid = pid
+            logging.info(f"Outbound HTTP event loop started for pid {pid}")
+
+        return self._loop
+
+    def submit(self, coroutine) -> "asyncio.Future":
+        """Schedule a coroutine on the shared loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop())
+
+    def run(self, coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and wait for its result (for synchronous callers)"""
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("HttpClientService.run() cannot be called from the event loop thread; await instead")
+        return self.submit(coroutine).result(timeout)
+
+    # Requests
+
+    def _upstream_config(self, host: str) -> Dict[str, Any]:
+        config = self.UPSTREAMS.get(host, {})
+        return {
+            "max_concurrency": config.get("max_concurrency", self.default_concurrency),
+            "timeout": config.get("timeout", self.default_timeout),
+            "max_retries": config.get("max_retries", self.default_retries)
+        }
+
+    def _get_client(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None:
+            config = self._upstream_config(host)
+            client = httpx.AsyncClient(
+                timeout=config["timeout"],
+                limits=httpx.Limits(
+                    max_connections=config["max_concurrency"],
+                    max_keepalive_connections=config["max_concurrency"],
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._clients[host] = client
+            self._semaphores[host] = asyncio.Semaphore(config["max_concurrency"])
+            self.stats.setdefault(host, UpstreamStats())
+        return client
+
+    async def request(self, method: str, url: str, max_retries: Optional[int] = None,
+                      retry_transport: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request through the host's pooled client, retrying 429/5xx and transport errors.
+
+        Must be awaited on the shared loop (see submit/run). The last response is
+        returned even if its status is retryable; transport errors are re-raised
+        once retries are exhausted. Non-idempotent methods (POST, PATCH) only
+        retry transport errors raised before the request was sent, since a
+        read timeout may follow a request the upstream already processed (and
+        billed); ``retry_transport=True`` retries every transport error.
+        """
+        host = urlsplit(url).hostname or url
+        client = self._get_client(host)
+        semaphore = self._semaphores[host]
+        stats = self.stats[host]
+        retries = self._upstream_config(host)["max_retries"] if max_retries is None else max_retries
+        if retry_transport is None:
+            retry_transport = method.upper() in self.IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with semaphore:
+                    status = None
+                    stats.in_flight += 1
+                    started = time.perf_counter()
+                    try:
+                        response = await client.request(method, url, **kwargs)
+                        status = response.status_code
+                    finally:
+                        stats.in_flight -= 1
+                        stats.observe((time.perf_counter() - started) * 1000, status)
+            except httpx.TransportError as e:
+                if attempt >= retries or not (retry_transport or isinstance(e, self.UNSENT_ERRORS)):
+                    raise
+
+            if response is not None and (status not in self.RETRY_STATUSES or attempt >= retries):
+                return response
+
+            attempt += 1
+            stats.retries += 1
+            delay = self._backoff_delay(attempt, response)
+            logging.warning(f"Retrying {method} {host} in {delay:.2f}s (attempt {attempt}/{retries}, status {status})")
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when the upstream sends one"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # Lifecycle and metrics
+
+    def close(self):
+        """Close pooled connections and stop the loop (call on worker shutdown)"""
+        with self._lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                return
+
+            loop = self._loop
+            clients = list(self._clients.values())
+
+            async def _close_clients():
+                for client in clients:
+                    await client.aclose()
+
+            try:
+                asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(5)
+            except Exception as e:
+                logging.warning(f"Error closing outbound HTTP clients: {e}")
+
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop = None
+            self._loop_thread = None
+            self._loop_pid = None
+            self._clients = {}
+            self._semaphores = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-upstream request metrics for this worker process"""
+        return {
+            "running": self._loop is not None and self._loop_pid == os.getpid(),
+            "upstreams": {host: stats.snapshot() for host, stats in self.stats.items()}
+        }
+
+# Global outbound HTTP client instance
+http_client_service = HttpClientService()
+
+atexit.register(http_client_service.close)
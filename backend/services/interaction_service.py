@@ -6,45 +6,50 @@ import logging
 from backend.repositories.interaction_repository import InteractionRepository
 from backend.repositories.shared_skill_repository import SharedSkillRepository
 from backend.repositories.comment_repository import CommentRepository
+from backend.services.activity_feed_service import ActivityFeedService
+from backend.services.moderation_service import ModerationService
+from backend.services.user_info_loader import UserInfoLoader
 
 class InteractionService:
     """Service for managing user interactions with shared skills (likes, comments, ratings)"""
 
     @staticmethod
     def toggle_like(user_id: str, plan_id: str) -> Dict[str, Any]:
-        """Toggle like on a shared skill"""
+        """Toggle like on a shared skill.
         
-        # Verify the shared skill exists
-        shared_skill_repo = SharedSkillRepository(g.db.shared_skills)
-        shared_skill = shared_skill_repo.find_by_id(plan_id)
+        The like document is the source of truth: only the request that actually
+        inserts or deletes it moves likes_count, so concurrent double-clicks
+        cannot drift the counter.
+        """
         
-        if not shared_skill:
+        if not ObjectId.is_valid(plan_id):
             raise ValueError("Shared skill not found")
         
-        # Don't allow users to like their own skills
-        if str(shared_skill["shared_by"]) == user_id:
-            raise ValueError("You cannot like your own skill")
-        
+        shared_skill_repo = SharedSkillRepository(g.db.shared_skills)
         interaction_repo = InteractionRepository(g.db.plan_interactions)
         
-        # Check if user has already liked this plan
-        existing_like = interaction_repo.get_user_interaction(user_id, plan_id, "like")
-        
-        if existing_like:
-            # Remove like
-            interaction_repo.remove_interaction(user_id, plan_id, "like")
-            shared_skill_repo.decrement_likes(plan_id)
-            action = "unliked"
-            liked = False
+        if interaction_repo.add_if_absent(user_id, plan_id, "like"):
+            delta, action, liked = 1, "liked", True
+        elif interaction_repo.remove_interaction(user_id, plan_id, "like").deleted_count:
+            delta, action, liked = -1, "unliked", False
         else:
-            # Add like
-            interaction_repo.upsert_interaction(user_id, plan_id, "like")
-            shared_skill_repo.increment_likes(plan_id)
-            action = "liked"
-            liked = True
+            # A concurrent request removed the like between our two writes
+            delta, action, liked = 0, "unliked", False
+        
+        # The counter update also checks that the skill exists and is not the user's own
+        updated_skill = shared_skill_repo.adjust_likes(plan_id, delta, user_id)
         
-        # Get updated like count
-        updated_skill = shared_skill_repo.find_by_id(plan_id)
+        if not updated_skill:
+            if liked:
+                interaction_repo.remove_interaction(user_id, plan_id, "like")
+            if shared_skill_repo.find_by_id(plan_id):
+                raise ValueError("You cannot like your own skill")
+            raise ValueError("Shared skill not found")
+        
+        if delta > 0:
+            ActivityFeedService.record_activity(user_id, ActivityFeedService.SKILL_LIKED, skill=updated_skill)
+        elif delta < 0:
+            ActivityFeedService.remove_activity(user_id, ActivityFeedService.SKILL_LIKED, plan_id)
         
         logging.info(f"User {user_id} {action} skill {plan_id}")
         
@@ -57,7 +62,12 @@ class InteractionService:
 
     @staticmethod
     def rate_plan(user_id: str, plan_id: str, rating: int, review: Optional[str] = None) -> Dict[str, Any]:
-        """Rate a shared skill"""
+        """Rate a shared skill.
+        
+        The skill keeps a running rating sum and count; each vote applies only
+        the difference from the user's previous rating instead of re-reading
+        every rating.
+        """
         
         # Validate rating
         if not (1 <= rating <= 5):
@@ -65,7 +75,9 @@ class InteractionService:
         
         # Verify the shared skill exists
         shared_skill_repo = SharedSkillRepository(g.db.shared_skills)
-        shared_skill = shared_skill_repo.find_by_id(plan_id)
+        shared_skill = g.db.shared_skills.find_one(
+            {"_id": ObjectId(plan_id)}, {"shared_by": 1}
+        ) if ObjectId.is_valid(plan_id) else None
         
         if not shared_skill:
             raise ValueError("Shared skill not found")
@@ -76,26 +88,17 @@ class InteractionService:
         
         interaction_repo = InteractionRepository(g.db.plan_interactions)
         
-        # Check if user has already rated this plan
-        existing_rating = interaction_repo.get_user_interaction(user_id, plan_id, "rate")
-        was_update = existing_rating is not None
-        
-        # Add/update rating
-        rating_data = {"rating": rating}
-        if review and review.strip():
-            rating_data["review"] = review.strip()[:500]  # Limit review length
+        review_text = review.strip()[:500] if review and review.strip() else None  # Limit review length
         
-        interaction_repo.upsert_interaction(user_id, plan_id, "rate", rating_data)
+        # Add/update rating, getting the previous one back in the same round trip
+        previous = interaction_repo.set_rating(user_id, plan_id, rating, review_text)
+        was_update = previous is not None
+        previous_rating = previous.get("rating", 0) if was_update else 0
         
-        # Recalculate average rating
-        all_ratings = interaction_repo.get_plan_interactions(plan_id, "rate")
-        if all_ratings:
-            total_rating = sum(r.get("rating", 0) for r in all_ratings)
-            avg_rating = total_rating / len(all_ratings)
-            rating_count = len(all_ratings)
-            
-            # Update shared skill rating
-            shared_skill_repo.update_rating(plan_id, avg_rating, rating_count)
+        updated_skill = shared_skill_repo.apply_rating_delta(
+            plan_id, rating - previous_rating, 0 if was_update else 1
+        )
+        skill_rating = (updated_skill or {}).get("rating", {})
         
         action = "updated" if was_update else "added"
         
@@ -104,9 +107,9 @@ class InteractionService:
         return {
             "action": action,
             "rating": rating,
-            "review": rating_data.get("review"),
-            "average_rating": round(avg_rating, 2) if all_ratings else rating,
-            "rating_count": rating_count if all_ratings else 1,
+            "review": review_text,
+            "average_rating": skill_rating.get("average", rating),
+            "rating_count": skill_rating.get("count", 1),
             "message": f"Rating {action} successfully"
         }
 
@@ -132,6 +135,7 @@ class InteractionService:
         comment_repo = CommentRepository(g.db.plan_comments)
         
         # If replying to a comment, verify parent exists
+        parent_comment = None
         if parent_id:
             parent_comment = comment_repo.find_by_id(parent_id)
             if not parent_comment:
@@ -139,6 +143,8 @@ class InteractionService:
             if str(parent_comment["plan_id"]) != plan_id:
                 raise ValueError("Parent comment does not belong to this skill")
         
+        ModerationService.check_posting_rate(user_id, ModerationService.COMMENT)
+        
         # Create comment data
         comment_data = {
             "plan_id": ObjectId(plan_id),
@@ -148,11 +154,13 @@ class InteractionService:
         }
         
         # Create comment
-        comment = comment_repo.create(comment_data)
+        comment = comment_repo.create(comment_data, parent=parent_comment)
         
         # Add user info to response
         comment["user_info"] = InteractionService._get_user_info(user_id)
         
+        ActivityFeedService.record_activity(user_id, ActivityFeedService.SKILL_COMMENTED, skill=shared_skill)
+        
         logging.info(f"User {user_id} added comment to skill {plan_id}")
         
         return {
@@ -167,32 +175,54 @@ class InteractionService:
         }
 
     @staticmethod
-    def get_comments(plan_id: str, limit: int = 100) -> Dict[str, Any]:
-        """Get comments for a shared skill"""
+    def get_comments(plan_id: str, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of root comments (with their threads) for a shared skill"""
         
+        InteractionService._validate_cursor(cursor)
         comment_repo = CommentRepository(g.db.plan_comments)
         
         # Get comments organized in thread structure
-        comments = comment_repo.find_by_plan(plan_id, limit)
+        comments = comment_repo.find_by_plan(plan_id, limit, after=cursor)
+        
+        # Add user info to all comments and replies with one batched lookup
+        UserInfoLoader.current().attach(comments, children_field="replies")
+        
+        result = {
+            "plan_id": plan_id,
+            "comments": comments,
+            "next_cursor": str(comments[-1]["_id"]) if len(comments) == limit else None
+        }
         
-        # Add user info to all comments and replies
-        def add_user_info_recursive(comment_list):
-            for comment in comment_list:
-                comment["user_info"] = InteractionService._get_user_info(str(comment["user_id"]))
-                if "replies" in comment:
-                    add_user_info_recursive(comment["replies"])
+        # Stats cover the whole plan, so only the first page computes them
+        if not cursor:
+            result["stats"] = comment_repo.get_plan_comment_stats(plan_id)
         
-        add_user_info_recursive(comments)
+        return result
+
+    @staticmethod
+    def get_comment_replies(comment_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get a page of direct replies to a comment (lazy expansion of large threads)"""
         
-        # Get comment stats
-        stats = comment_repo.get_plan_comment_stats(plan_id)
+        InteractionService._validate_cursor(cursor)
+        comment_repo = CommentRepository(g.db.plan_comments)
+        
+        if not comment_repo.find_by_id(comment_id):
+            raise ValueError("Comment not found")
+        
+        replies = comment_repo.find_replies(comment_id, limit, after=cursor)
+        UserInfoLoader.current().attach(replies)
         
         return {
-            "plan_id": plan_id,
-            "comments": comments,
-            "stats": stats
+            "comment_id": comment_id,
+            "replies": replies,
+            "next_cursor": str(replies[-1]["_id"]) if len(replies) == limit else None
         }
 
+    @staticmethod
+    def _validate_cursor(cursor: Optional[str]):
+        if cursor and not ObjectId.is_valid(cursor):
+            raise ValueError("Invalid comment cursor")
+
     @staticmethod
     def toggle_comment_like(user_id: str, comment_id: str) -> Dict[str, Any]:
         """Toggle like on a comment"""
@@ -314,18 +344,4 @@ class InteractionService:
     @staticmethod
     def _get_user_info(user_id: str) -> Dict:
         """Get basic user information"""
-        from backend.auth.models import User
-        
-        user = User.find_by_id(user_id)
-        if user:
-            return {
-                "user_id": user_id,
-                "username": user.get("username", "Unknown"),
-                "avatar_url": f"https://ui-avatars.com/api/?name={user.get('username', 'U')}&background=8B5CF6&color=fff&size=40"
-            }
-        else:
-            return {
-                "user_id": user_id,
-                "username": "Unknown User",
-                "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
-            }
\ No newline at end of file
+        return UserInfoLoader.current().load(user_id)
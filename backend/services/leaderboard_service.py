@@ -0,0 +1,157 @@
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from collections import defaultdict
+from flask import g
+import logging
+import os
+from backend.repositories.user_stats_repository import UserStatsRepository
+from backend.services.cache_service import CacheService
+
+class LeaderboardService:
+    """Materialized social counters and the user leaderboards built from them.
+
+    followers_count, following_count and shared_skills_count live on the user
+    document and are adjusted atomically when relationships or shared skills
+    change. Each adjustment also sets the user's score on the Redis sorted-set
+    leaderboards, so reading the top k is a range query instead of a join over
+    every user.
+    """
+
+    # Leaderboard type -> score field on the user document
+    BOARDS = {
+        "followers": "followers_count",
+        "skills_shared": "shared_skills_count",
+        "overall": "overall_score"
+    }
+    KEY_PREFIX = "leaderboard:users:"
+    BOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 1000))
+    BOARD_TTL = CacheService.LONG_TTL
+
+    @staticmethod
+    def record_follow(follower_id: str, following_id: str, delta: int = 1):
+        """Adjust both sides' counters after a follow (+1) or unfollow (-1)"""
+        try:
+            stats_repo = UserStatsRepository(g.db.users)
+            followed = stats_repo.increment_counter(following_id, "followers_count", delta)
+            stats_repo.increment_counter(follower_id, "following_count", delta)
+            LeaderboardService._update_boards(followed)
+        except Exception as e:
+            logging.error(f"Error updating follow counters for {follower_id} -> {following_id}: {e}")
+
+    @staticmethod
+    def record_skill_shared(user_id: str, delta: int = 1):
+        """Adjust a user's shared skill counter"""
+        try:
+            user = UserStatsRepository(g.db.users).increment_counter(user_id, "shared_skills_count", delta)
+            LeaderboardService._update_boards(user)
+        except Exception as e:
+            logging.error(f"Error updating shared skill counter for {user_id}: {e}")
+
+    @staticmethod
+    def _update_boards(user: Optional[Dict]):
+        if not user:
+            return
+
+        member = str(user["_id"])
+        if user.get("is_deactivated"):
+            CacheService.leaderboard_remove([LeaderboardService._key(name) for name in LeaderboardService.BOARDS], member)
+            return
+
+        for name, field in LeaderboardService.BOARDS.items():
+            CacheService.leaderboard_update(
+                LeaderboardService._key(name), {member: user.get(field, 0)}, LeaderboardService.BOARD_SIZE
+            )
+
+    @staticmethod
+    def get_leaderboard(leaderboard_type: str = "overall", limit: int = 50) -> Dict:
+        """Top users for a leaderboard type, read from its sorted set"""
+        if leaderboard_type not in LeaderboardService.BOARDS:
+            leaderboard_type = "overall"
+
+        try:
+            entries = CacheService.leaderboard_top(LeaderboardService._key(leaderboard_type), limit)
+            stats_repo = UserStatsRepository(g.db.users)
+            if entries is None and CacheService.is_available():
+                entries = LeaderboardService.rebuild_board(leaderboard_type)[:limit]
+            elif entries is None:
+                field = LeaderboardService.BOARDS[leaderboard_type]
+                entries = [(str(user["_id"]), user[field]) for user in stats_repo.find_top(field, limit)]
+
+            profiles = stats_repo.find_profiles([member for member, _ in entries])
+
+            leaderboard = []
+            for member, score in entries:
+                user = profiles.get(member)
+                if not user or user.get("is_deactivated") or not user.get("username"):
+                    continue
+
+                leaderboard.append({
+                    "rank": len(leaderboard) + 1,
+                    "user_id": member,
+                    "username": user["username"],
+                    "bio": user.get("bio", ""),
+                    "profile_picture": user.get("profile_picture"),
+                    "is_verified": user.get("is_verified", False),
+                    "score": score,
+                    "avatar_url": f"https://ui-avatars.com/api/?name={user['username'][0]}&background=8B5CF6&color=fff&size=60"
+                })
+
+            return {"users": leaderboard}
+
+        except Exception as e:
+            logging.error(f"Error getting user leaderboard: {e}")
+            return {"users": []}
+
+    @staticmethod
+    def rebuild_board(leaderboard_type: str, db=None) -> List[tuple]:
+        """Reload a leaderboard from the indexed counters; returns its (member, score) pairs"""
+        db = g.db if db is None else db
+        field = LeaderboardService.BOARDS[leaderboard_type]
+        top_users = UserStatsRepository(db.users).find_top(field, LeaderboardService.BOARD_SIZE)
+
+        entries = [(str(user["_id"]), user[field]) for user in top_users]
+        CacheService.leaderboard_fill(LeaderboardService._key(leaderboard_type), dict(entries), LeaderboardService.BOARD_TTL)
+        return entries
+
+    @staticmethod
+    def rebuild_all(db=None) -> int:
+        """Reload every leaderboard, dropping drift from missed incremental updates"""
+        rebuilt = 0
+        for leaderboard_type in LeaderboardService.BOARDS:
+            rebuilt += len(LeaderboardService.rebuild_board(leaderboard_type, db))
+        return rebuilt
+
+    @staticmethod
+    def reconcile_counters(db=None) -> int:
+        """Recount every counter from the source collections with grouped aggregations.
+
+        Repairs counters missed by failed writes and backfills users created
+        before the counters existed; run off-peak. init_social_indexes.py runs
+        it once at deploy with its own database handle (``db``), since the
+        request-scoped ``g.db`` only exists inside the app.
+        """
+        db = g.db if db is None else db
+        counts: Dict[Any, Dict[str, int]] = defaultdict(dict)
+
+        active_follows = {"relationship_type": "follow", "is_active": True}
+        for group_field, counter in (("following_id", "followers_count"), ("follower_id", "following_count")):
+            for row in db.user_relationships.aggregate([
+                {"$match": active_follows},
+                {"$group": {"_id": f"${group_field}", "count": {"$sum": 1}}}
+            ], allowDiskUse=True):
+                counts[row["_id"]][counter] = row["count"]
+
+        for row in db.shared_skills.aggregate([
+            {"$group": {"_id": "$shared_by", "count": {"$sum": 1}}}
+        ], allowDiskUse=True):
+            counts[row["_id"]]["shared_skills_count"] = row["count"]
+
+        updated = UserStatsRepository(db.users).set_counters(counts, datetime.utcnow())
+        LeaderboardService.rebuild_all(db)
+
+        logging.info(f"Reconciled social counters for {len(counts)} users ({updated} changed)")
+        return updated
+
+    @staticmethod
+    def _key(leaderboard_type: str) -> str:
+        return f"{LeaderboardService.KEY_PREFIX}{leaderboard_type}"
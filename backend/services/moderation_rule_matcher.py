@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional, Callable
+import logging
+import os
+import re
+import threading
+import time
+
+class ModerationRuleMatcher:
+    """Active auto-moderation rules compiled into a single matcher.
+
+    Every keyword of every keyword_filter rule goes into one trie-shaped regex,
+    so a document is scanned in one pass no matter how many keywords exist.
+    The compiled matcher is cached per process and tagged with the rules
+    version; it is rebuilt when the stored version moves (checked at most every
+    ``VERSION_CHECK_INTERVAL`` seconds) or after ``MAX_AGE`` seconds, which
+    also picks up rules edited directly in the database.
+    """
+
+    VERSION_CHECK_INTERVAL = float(os.getenv('MODERATION_RULES_CHECK_INTERVAL', 5))
+    MAX_AGE = float(os.getenv('MODERATION_RULES_MAX_AGE', 300))
+
+    _cached: Optional["ModerationRuleMatcher"] = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    def __init__(self, rules: List[Dict], version: int):
+        self.rules = rules
+        self.version = version
+        self.compiled_at = time.monotonic()
+
+        # keyword -> indexes of the rules it belongs to, including rules of
+        # shorter keywords that are prefixes of it (see _keyword_rule_indexes)
+        keyword_rules: Dict[str, set] = {}
+        for index, rule in enumerate(rules):
+            if rule.get("type") != "keyword_filter":
+                continue
+            for keyword in rule.get("keywords", []):
+                keyword = str(keyword).lower()
+                if keyword:
+                    keyword_rules.setdefault(keyword, set()).add(index)
+
+        self._keyword_rules = self._keyword_rule_indexes(keyword_rules)
+        self._pattern = self._compile(keyword_rules) if keyword_rules else None
+        self.rate_limit_rules = [rule for rule in rules if rule.get("type") == "rate_limit"]
+
+    @classmethod
+    def current(cls, load_rules: Callable[[], List[Dict]], load_version: Callable[[], int]) -> "ModerationRuleMatcher":
+        """Get the cached matcher, recompiling it if the rules changed"""
+        now = time.monotonic()
+        cached = cls._cached
+        if cached is not None and now - cls._checked_at < cls.VERSION_CHECK_INTERVAL:
+            return cached
+
+        version = load_version()
+        with cls._lock:
+            cached = cls._cached
+            if cached is None or cached.version != version or now - cached.compiled_at > cls.MAX_AGE:
+                cached = cls(load_rules(), version)
+                cls._cached = cached
+                logging.info(f"Compiled {len(cached.rules)} moderation rules (version {version})")
+            cls._checked_at = now
+        return cached
+
+    @classmethod
+    def invalidate(cls):
+        """Drop this process's matcher after a local rule change"""
+        with cls._lock:
+            cls._cached = None
+
+    def match(self, content_data: Dict) -> Optional[Dict]:
+        """First rule (in rule order) that the content violates"""
+        matched = self._matched_keyword_rules(content_data)
+
+        for index, rule in enumerate(self.rules):
+            if rule.get("type") == "keyword_filter":
+                if index in matched:
+                    return rule
+            elif self._matches_content_rule(content_data, rule):
+                return rule
+
+        return None
+
+    def match_many(self, documents: List[Dict]) -> List[Optional[Dict]]:
+        """Match every document against the same compiled rules"""
+        return [self.match(content_data) for content_data in documents]
+
+    def _matched_keyword_rules(self, content_data: Dict) -> set:
+        if self._pattern is None:
+            return set()
+
+        content_text = " ".join([
+            str(content_data.get("title", "")),
+            str(content_data.get("description", "")),
+            str(content_data.get("content", ""))
+        ]).lower()
+
+        matched = set()
+        # The zero-width lookahead reports the longest keyword starting at
+        # every position, so overlapping keywords are all found
+        for keyword in set(self._pattern.findall(content_text)):
+            matched |= self._keyword_rules[keyword]
+        return matched
+
+    @staticmethod
+    def _keyword_rule_indexes(keyword_rules: Dict[str, set]) -> Dict[str, set]:
+        """Fold the rules of each keyword's keyword prefixes into it.
+
+        Only the longest keyword at a position is reported, and any shorter
+        keyword starting at the same position is a prefix of it.
+        """
+        folded = {}
+        for keyword, indexes in keyword_rules.items():
+            indexes = set(indexes)
+            for length in range(1, len(keyword)):
+                indexes |= keyword_rules.get(keyword[:length], set())
+            folded[keyword] = indexes
+        return folded
+
+    @staticmethod
+    def _compile(keywords) -> "re.Pattern":
+        """Build one regex from a trie of the keywords (longest match wins)"""
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def emit(node: Dict) -> str:
+            terminal = "" in node
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # A keyword ending here makes the longer continuations optional (greedy)
+            return f"(?:{body})?" if terminal else body
+
+        return re.compile(f"(?=({emit(trie)}))")
+
+    @staticmethod
+    def _matches_content_rule(content_data: Dict, rule: Dict) -> bool:
+        """Evaluate the non-keyword rule types"""
+        rule_type = rule.get("type")
+
+        if rule_type == "spam_detection":
+            # Simple spam detection based on repetition and length
+            title = content_data.get("title", "")
+
+            # Check for excessive repetition
+            if len(set(title.split())) < len(title.split()) * 0.5:
+                return True
+
+            # Check for excessive capitalization
+            if len(title) > 10 and sum(c.isupper() for c in title) > len(title) * 0.7:
+                return True
+
+        # rate_limit rules are enforced when content is created
+        # (ModerationService.check_posting_rate), not when it is scanned
+
+        return False
@@ -5,7 +5,16 @@ from bson import ObjectId
 import logging
 import re
 from backend.repositories.moderation_repository import ModerationRepository
+from backend.services.moderation_rule_matcher import ModerationRuleMatcher
 from backend.services.notification_service import NotificationService
+from backend.services.cache_service import CacheService
+
+class PostingRateLimitError(ValueError):
+    """Raised when a user exceeds a rate_limit moderation rule"""
+
+    def __init__(self, message: str, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 class ModerationService:
     """Service for content moderation and community safety"""
@@ -301,6 +310,7 @@ class ModerationService:
             
             moderation_repo = ModerationRepository(g.db.moderation_reports)
             rule = moderation_repo.create_auto_moderation_rule(rule_data)
+            ModerationRuleMatcher.invalidate()
             
             logging.info(f"Auto-moderation rule created by {moderator_id}: {rule_data['name']}")
             
@@ -318,18 +328,73 @@ class ModerationService:
     def scan_content_for_violations(content_type: str, content_data: Dict) -> Optional[Dict]:
         """Scan content for potential violations using auto-moderation"""
         
+        return ModerationService.scan_contents_for_violations(content_type, [content_data])[0]
+
+    @staticmethod
+    def scan_contents_for_violations(content_type: str, documents: List[Dict]) -> List[Optional[Dict]]:
+        """Scan many documents with the compiled rule matcher; returns the report (or None) per document"""
+        
         try:
             moderation_repo = ModerationRepository(g.db.moderation_reports)
-            violation = moderation_repo.apply_auto_moderation(content_type, content_data)
+            matcher = ModerationRuleMatcher.current(
+                lambda: moderation_repo.get_auto_moderation_rules(active_only=True),
+                moderation_repo.get_rules_version
+            )
+            
+            rules = matcher.match_many(documents)
+            reports = iter(moderation_repo.create_auto_reports(
+                content_type,
+                [(content_data, rule) for content_data, rule in zip(documents, rules) if rule is not None]
+            ))
+            violations = [next(reports) if rule is not None else None for rule in rules]
             
-            if violation:
-                logging.info(f"Auto-moderation detected violation in {content_type}: {content_data.get('_id')}")
+            for content_data, violation in zip(documents, violations):
+                if violation:
+                    logging.info(f"Auto-moderation detected violation in {content_type}: {content_data.get('_id')}")
             
-            return violation
+            return violations
             
         except Exception as e:
             logging.error(f"Error scanning content for violations: {e}")
-            return None
+            return [None] * len(documents)
+
+    @staticmethod
+    def check_posting_rate(user_id: str, content_type: str):
+        """Count a new post against the active rate_limit rules; raises PostingRateLimitError when over a limit.
+
+        Each rule is a Redis sliding-window counter keyed by rule, content
+        type and user, so the check is O(1) instead of counting documents.
+        All rules are checked in one script and the post is only counted when
+        every rule allows it, so a rejected post uses no quota.
+        """
+        moderation_repo = ModerationRepository(g.db.moderation_reports)
+        try:
+            matcher = ModerationRuleMatcher.current(
+                lambda: moderation_repo.get_auto_moderation_rules(active_only=True),
+                moderation_repo.get_rules_version
+            )
+        except Exception as e:
+            logging.error(f"Error loading posting rate limits: {e}")
+            return
+        
+        rules = [
+            rule for rule in matcher.rate_limit_rules
+            if not rule.get("content_types") or content_type in rule["content_types"]
+        ]
+        limit_info = CacheService.sliding_windows_hit([
+            (
+                f"posting:{rule['_id']}:{content_type}:{user_id}",
+                rule.get("max_posts", 5),
+                rule.get("time_window_minutes", 60) * 60
+            )
+            for rule in rules
+        ])
+        if not limit_info["allowed"]:
+            logging.info(f"User {user_id} hit posting rate limit {rules[limit_info['rejected']]['_id']} for {content_type}")
+            raise PostingRateLimitError(
+                "You're posting too frequently. Please try again later.",
+                limit_info.get("reset_time")
+            )
 
     # Helper methods
     @staticmethod
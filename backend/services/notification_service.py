@@ -4,6 +4,7 @@ from flask import g, current_app
 from bson import ObjectId
 import logging
 from backend.repositories.notification_repository import NotificationRepository
+from backend.services.user_info_loader import UserInfoLoader
 
 class NotificationService:
     """Service for managing user notifications and real-time updates"""
@@ -290,14 +291,14 @@ class NotificationService:
         notifications = notification_repo.find_by_user(user_id, limit, unread_only)
         unread_count = notification_repo.find_unread_count(user_id)
         
-        # Enrich notifications with user info
+        # Enrich notifications with actor info in one batched lookup
+        UserInfoLoader.current().attach(
+            [notification for notification in notifications if notification.get("actor_id")],
+            id_field="actor_id", target_field="actor_info"
+        )
+        
         enriched_notifications = []
         for notification in notifications:
-            # Add actor info if available
-            if notification.get("actor_id"):
-                actor_info = NotificationService._get_user_info(str(notification["actor_id"]))
-                notification["actor_info"] = actor_info
-            
             # Format timestamps
             notification["created_at_formatted"] = NotificationService._format_timestamp(
                 notification["created_at"]
@@ -412,18 +413,4 @@ class NotificationService:
     @staticmethod
     def _get_user_info(user_id: str) -> Dict:
         """Get basic user information"""
-        from backend.auth.models import User
-        
-        user = User.find_by_id(user_id)
-        if user:
-            return {
-                "user_id": user_id,
-                "username": user.get("username", "Unknown"),
-                "avatar_url": f"https://ui-avatars.com/api/?name={user.get('username', 'U')}&background=8B5CF6&color=fff&size=40"
-            }
-        else:
-            return {
-                "user_id": user_id,
-                "username": "Unknown User",
-                "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
-            }
\ No newline at end of file
+        return UserInfoLoader.current().load(user_id)
@@ -0,0 +1,211 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+from backend.repositories.plan_job_repository import PlanJobRepository
+from backend.repositories.skill_repository import SkillRepository
+from backend.services.ai_service import AIService
+from backend.services.database_service import DatabaseService
+from backend.services.http_client_service import http_client_service
+from backend.services.unsplash_service import UnsplashService
+
+class PlanGenerationService:
+    """Background pipeline that generates skill plans and images on the shared outbound HTTP loop"""
+
+    JOB_SKILL_PLAN = "skill_plan"
+    JOB_PREVIEW_PLAN = "preview_plan"
+
+    def __init__(self):
+        self.app = None
+        self.job_timeout = int(os.getenv('PLAN_JOB_TIMEOUT', 300))
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def init_app(self, app):
+        """Keep a handle on the app for WebSocket pushes from the pipeline"""
+        self.app = app
+
+    def _jobs(self) -> PlanJobRepository:
+        return PlanJobRepository(DatabaseService.get_database().plan_generation_jobs)
+
+    def submit_skill_plan(self, skill_id: str, user_id: str, title: str) -> Dict[str, Any]:
+        """Queue plan and image generation for a skill that was saved with a pending curriculum"""
+        job = self._jobs().create({
+            "job_type": self.JOB_SKILL_PLAN,
+            "user_id": user_id,
+            "skill_id": skill_id,
+            "topic": title
+        })
+        job_id = str(job['_id'])
+
+        self.stats["submitted"] += 1
+        http_client_service.submit(self._run_skill_job(job_id, skill_id, user_id, title))
+        return job
+
+    def submit_preview_plan(self, topic: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a plan that is only returned through the job status"""
+        job = self._jobs().create({
+            "job_type": self.JOB_PREVIEW_PLAN,
+            "user_id": user_id,
+            "topic": topic
+        })
+        job_id = str(job['_id'])
+
+        self.stats["submitted"] += 1
+        http_client_service.submit(self._run_preview_job(job_id, topic))
+        return job
+
+    def get_job_status(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get a job for polling; jobs owned by a user are only visible to that user"""
+        jobs = self._jobs()
+        job = jobs.find_by_id(job_id)
+        if not job:
+            return None
+        if job.get('user_id') and job.get('user_id') != user_id:
+            return None
+
+        if job['status'] in (PlanJobRepository.STATUS_PENDING, PlanJobRepository.STATUS_RUNNING):
+            job = self._fail_stale_job(jobs, job_id) or job
+
+        return {
+            "job_id": str(job['_id']),
+            "job_type": job.get('job_type'),
+            "status": job.get('status'),
+            "skill_id": job.get('skill_id'),
+            "topic": job.get('topic'),
+            "result": job.get('result'),
+            "error": job.get('error'),
+            "created_at": job.get('created_at'),
+            "completed_at": job.get('completed_at')
+        }
+
+    def _fail_stale_job(self, jobs: PlanJobRepository, job_id) -> Optional[Dict]:
+        """Fail a job whose worker disappeared, and its skill's pending curriculum with it"""
+        job = jobs.fail_if_stale(job_id, self.job_timeout)
+        if not job:
+            return None
+
+        logging.warning(f"Plan generation job {job_id} timed out without finishing")
+        if job.get('job_type') == self.JOB_SKILL_PLAN and job.get('skill_id'):
+            try:
+                skill_repo = SkillRepository(DatabaseService.get_database().skills)
+                skill_repo.update_skill(job['skill_id'], job['user_id'], {"curriculum.status": "failed"})
+            except ValueError:
+                # The skill was deleted while its plan was being generated
+                return job
+            self._notify(job['user_id'], "skill_plan_failed", {
+                "job_id": str(job['_id']),
+                "skill_id": job['skill_id'],
+                "skill_title": job.get('topic'),
+                "message": f'We could not generate a plan for "{job.get("topic")}"'
+            })
+        return job
+
+    def fail_stale_jobs(self) -> int:
+        """Scheduled sweep failing jobs lost with their worker, whether or not anyone polls them"""
+        jobs = self._jobs()
+        failed = 0
+        for job_id in jobs.find_stale_ids(self.job_timeout):
+            if self._fail_stale_job(jobs, job_id):
+                failed += 1
+        return failed
+
+    async def _generate(self, topic: str):
+        """Run the AI plan and the Unsplash image fetch concurrently"""
+        plan_result, image_result = await asyncio.gather(
+            AIService.generate_structured_plan(topic=topic, plan_type="skill"),
+            UnsplashService.fetch_image(topic, use_specific_query=True),
+            return_exceptions=True
+        )
+
+        if isinstance(image_result, BaseException):
+            logging.error(f"Unsplash fetch failed for skill '{topic}': {image_result}")
+            image_result = None
+
+        return plan_result, image_result
+
+    async def _run_skill_job(self, job_id: str, skill_id: str, user_id: str, title: str):
+        loop = asyncio.get_running_loop()
+        jobs = self._jobs()
+
+        try:
+            await loop.run_in_executor(None, jobs.mark_running, job_id)
+            daily_tasks, image_url = await self._generate(title)
+
+            if isinstance(daily_tasks, BaseException):
+                raise daily_tasks
+
+            update_data = {
+                "curriculum.daily_tasks": daily_tasks,
+                "curriculum.status": "ready",
+                "curriculum.generated_at": datetime.utcnow()
+            }
+            if image_url:
+                update_data["image_url"] = image_url
+
+            skill_repo = SkillRepository(DatabaseService.get_database().skills)
+            await loop.run_in_executor(None, skill_repo.update_skill, skill_id, user_id, update_data)
+            await loop.run_in_executor(None, jobs.mark_completed, job_id, None)
+
+            self.stats["completed"] += 1
+            self._notify(user_id, "skill_plan_ready", {
+                "job_id": job_id,
+                "skill_id": skill_id,
+                "skill_title": title,
+                "image_url": image_url,
+                "message": f'Your plan for "{title}" is ready'
+            })
+
+        except Exception as e:
+            logging.error(f"Plan generation job {job_id} failed for skill '{title}': {e}")
+            self.stats["failed"] += 1
+
+            try:
+                skill_repo = SkillRepository(DatabaseService.get_database().skills)
+                await loop.run_in_executor(None, skill_repo.update_skill, skill_id, user_id, {"curriculum.status": "failed"})
+                await loop.run_in_executor(None, jobs.mark_failed, job_id, str(e))
+            except Exception as save_error:
+                logging.error(f"Could not record failure of plan job {job_id}: {save_error}")
+
+            self._notify(user_id, "skill_plan_failed", {
+                "job_id": job_id,
+                "skill_id": skill_id,
+                "skill_title": title,
+                "message": f'We could not generate a plan for "{title}"'
+            })
+
+    async def _run_preview_job(self, job_id: str, topic: str):
+        loop = asyncio.get_running_loop()
+        jobs = self._jobs()
+
+        try:
+            await loop.run_in_executor(None, jobs.mark_running, job_id)
+            daily_tasks = await AIService.generate_structured_plan(topic)
+
+            result = {"skill": topic, "plan": {"daily_tasks": daily_tasks}}
+            await loop.run_in_executor(None, jobs.mark_completed, job_id, result)
+            self.stats["completed"] += 1
+
+        except Exception as e:
+            logging.error(f"Plan preview job {job_id} failed for '{topic}': {e}")
+            self.stats["failed"] += 1
+            try:
+                await loop.run_in_executor(None, jobs.mark_failed, job_id, str(e))
+            except Exception as save_error:
+                logging.error(f"Could not record failure of plan job {job_id}: {save_error}")
+
+    def _notify(self, user_id: str, notification_type: str, data: Dict):
+        """Push a job result to the user's personal WebSocket room"""
+        if self.app is not None and hasattr(self.app, 'websocket_service'):
+            self.app.websocket_service.notify_user_personal(user_id, notification_type, data)
+
+    def get_pipeline_status(self) -> Dict[str, Any]:
+        """Get pipeline counters for this worker process"""
+        return {
+            "running": http_client_service.get_stats()["running"],
+            "job_timeout_seconds": self.job_timeout,
+            **self.stats
+        }
+
+# Global plan generation pipeline instance
+plan_generation_service = PlanGenerationService()
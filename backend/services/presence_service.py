@@ -0,0 +1,220 @@
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Set
+from backend.services.cache_service import CacheService
+
+class PresenceService:
+    """Cluster-wide WebSocket presence kept in Redis sorted sets.
+
+    Every member is scored with the time its entry expires. Each worker
+    process re-adds its own sessions and skill room memberships every
+    ``HEARTBEAT_INTERVAL`` seconds with a score ``TTL`` seconds ahead, and
+    removes them when a client disconnects or leaves a room. Entries of a
+    worker that dies stop being refreshed and expire on their own, and reads
+    only count members whose score is still in the future.
+
+        presence:users             user_id -> latest session expiry
+        presence:sessions          "<user_id>|<sid>" -> expiry
+        presence:rooms             skill_id -> expiry
+        presence:nodes             worker id -> expiry
+        presence:user:<user_id>    sid -> expiry
+        presence:room:<skill_id>   "<user_id>|<sid>" -> expiry
+
+    Reads return None when Redis is unavailable so callers can fall back to
+    their own process's connections.
+    """
+
+    PREFIX = "presence:"
+    USERS_KEY = f"{PREFIX}users"
+    SESSIONS_KEY = f"{PREFIX}sessions"
+    ROOMS_KEY = f"{PREFIX}rooms"
+    NODES_KEY = f"{PREFIX}nodes"
+
+    TTL = int(os.getenv('PRESENCE_TTL', 90))
+    HEARTBEAT_INTERVAL = int(os.getenv('PRESENCE_HEARTBEAT_INTERVAL', 30))
+
+    # Removes a session's room memberships (and the session itself when
+    # ARGV[4] is '1'), then re-scores the user from their remaining sessions
+    # and drops rooms nobody is left in, so other workers' sessions are kept.
+    # KEYS: users, sessions, rooms, user key, room keys...
+    # ARGV: user_id, sid, now, end_session, skill_ids...
+    _remove_presence_script = """
+    local member = ARGV[1] .. '|' .. ARGV[2]
+    for i = 5, #KEYS do
+        redis.call('zrem', KEYS[i], member)
+        if redis.call('zcount', KEYS[i], '(' .. ARGV[3], '+inf') == 0 then
+            redis.call('zrem', KEYS[3], ARGV[i])
+        end
+    end
+    if ARGV[4] ~= '1' then
+        return 1
+    end
+    redis.call('zrem', KEYS[2], member)
+    redis.call('zrem', KEYS[4], ARGV[2])
+    redis.call('zremrangebyscore', KEYS[4], '-inf', ARGV[3])
+    local latest = redis.call('zrevrange', KEYS[4], 0, 0, 'withscores')
+    if latest[2] then
+        redis.call('zadd', KEYS[1], latest[2], ARGV[1])
+        return 1
+    end
+    redis.call('zrem', KEYS[1], ARGV[1])
+    return 0
+    """
+
+    @classmethod
+    def _user_key(cls, user_id: str) -> str:
+        return f"{cls.PREFIX}user:{user_id}"
+
+    @classmethod
+    def _room_key(cls, skill_id: str) -> str:
+        return f"{cls.PREFIX}room:{skill_id}"
+
+    @staticmethod
+    def _member(user_id: str, session_id: str) -> str:
+        return f"{user_id}|{session_id}"
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    @classmethod
+    def refresh(cls, node_id: str, sessions: Dict[str, str], session_rooms: Dict[str, Set[str]]) -> bool:
+        """Re-add a worker's sessions ({sid: user_id}) and room memberships ({sid: skill_ids}) in one pipeline"""
+        if not CacheService.is_available():
+            return False
+
+        now = time.time()
+        expires_at = now + cls.TTL
+        try:
+            pipe = CacheService.get_redis_client().pipeline(transaction=False)
+            for session_id, user_id in sessions.items():
+                user_key = cls._user_key(user_id)
+                pipe.zadd(cls.SESSIONS_KEY, {cls._member(user_id, session_id): expires_at})
+                pipe.zadd(user_key, {session_id: expires_at})
+                pipe.expire(user_key, cls.TTL)
+                pipe.zadd(cls.USERS_KEY, {user_id: expires_at})
+
+                for skill_id in session_rooms.get(session_id, ()):
+                    room_key = cls._room_key(skill_id)
+                    pipe.zadd(room_key, {cls._member(user_id, session_id): expires_at})
+                    pipe.expire(room_key, cls.TTL)
+                    pipe.zadd(cls.ROOMS_KEY, {skill_id: expires_at})
+
+            pipe.zadd(cls.NODES_KEY, {node_id: expires_at})
+            for key in (cls.USERS_KEY, cls.SESSIONS_KEY, cls.ROOMS_KEY, cls.NODES_KEY):
+                pipe.zremrangebyscore(key, '-inf', now)
+            pipe.execute()
+            return True
+
+        except Exception as e:
+            logging.error(f"Presence refresh error for {len(sessions)} sessions: {e}")
+            return False
+
+    @classmethod
+    def session_started(cls, node_id: str, user_id: str, session_id: str) -> bool:
+        return cls.refresh(node_id, {session_id: user_id}, {})
+
+    @classmethod
+    def room_joined(cls, node_id: str, user_id: str, session_id: str, skill_id: str) -> bool:
+        return cls.refresh(node_id, {session_id: user_id}, {session_id: {skill_id}})
+
+    @classmethod
+    def _remove(cls, user_id: str, session_id: str, skill_ids: List[str], end_session: bool) -> bool:
+        if not CacheService.is_available():
+            return False
+
+        try:
+            keys = [cls.USERS_KEY, cls.SESSIONS_KEY, cls.ROOMS_KEY, cls._user_key(user_id)]
+            keys.extend(cls._room_key(skill_id) for skill_id in skill_ids)
+            CacheService.get_redis_client().eval(
+                cls._remove_presence_script, len(keys), *keys,
+                user_id, session_id, time.time(), '1' if end_session else '0', *skill_ids
+            )
+            return True
+
+        except Exception as e:
+            logging.error(f"Presence removal error for user {user_id} (session: {session_id}): {e}")
+            return False
+
+    @classmethod
+    def room_left(cls, user_id: str, session_id: str, skill_id: str) -> bool:
+        return cls._remove(user_id, session_id, [skill_id], end_session=False)
+
+    @classmethod
+    def session_ended(cls, user_id: str, session_id: str, skill_ids: List[str]) -> bool:
+        """Remove a session and its room memberships; the user stays online if other sessions remain"""
+        return cls._remove(user_id, session_id, list(skill_ids), end_session=True)
+
+    @classmethod
+    def is_online(cls, user_id: str) -> Optional[bool]:
+        if not CacheService.is_available():
+            return None
+
+        try:
+            return CacheService.get_redis_client().zcount(cls._user_key(user_id), f"({time.time()}", '+inf') > 0
+        except Exception as e:
+            logging.error(f"Presence lookup error for user {user_id}: {e}")
+            return None
+
+    @classmethod
+    def online_users_count(cls) -> Optional[int]:
+        if not CacheService.is_available():
+            return None
+
+        try:
+            return CacheService.get_redis_client().zcount(cls.USERS_KEY, f"({time.time()}", '+inf')
+        except Exception as e:
+            logging.error(f"Presence count error: {e}")
+            return None
+
+    @classmethod
+    def room_users(cls, skill_id: str) -> Optional[List[str]]:
+        """Distinct users with a live session in a skill room"""
+        if not CacheService.is_available():
+            return None
+
+        try:
+            members = CacheService.get_redis_client().zrangebyscore(cls._room_key(skill_id), f"({time.time()}", '+inf')
+        except Exception as e:
+            logging.error(f"Presence room lookup error for skill {skill_id}: {e}")
+            return None
+
+        users = []
+        for member in members:
+            user_id = cls._decode(member).rsplit('|', 1)[0]
+            if user_id not in users:
+                users.append(user_id)
+        return users
+
+    @classmethod
+    def get_stats(cls) -> Optional[Dict]:
+        """Cluster-wide user, connection, room and worker counts"""
+        if not CacheService.is_available():
+            return None
+
+        live = f"({time.time()}"
+        try:
+            client = CacheService.get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for key in (cls.USERS_KEY, cls.SESSIONS_KEY, cls.NODES_KEY):
+                pipe.zcount(key, live, '+inf')
+            pipe.zrangebyscore(cls.ROOMS_KEY, live, '+inf')
+            users, sessions, nodes, rooms = pipe.execute()
+
+            pipe = client.pipeline(transaction=False)
+            for skill_id in rooms:
+                pipe.zcount(cls._room_key(cls._decode(skill_id)), live, '+inf')
+            memberships = sum(pipe.execute()) if rooms else 0
+
+            return {
+                'connected_users': users,
+                'total_connections': sessions,
+                'skill_rooms': len(rooms),
+                'total_room_memberships': memberships,
+                'nodes': nodes
+            }
+
+        except Exception as e:
+            logging.error(f"Presence stats error: {e}")
+            return None
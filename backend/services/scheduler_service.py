@@ -0,0 +1,342 @@
+import os
+import atexit
+import logging
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional, Set
+from flask import g
+from backend.repositories.job_run_repository import JobRunRepository
+from backend.repositories.scheduled_job_repository import ScheduledJobRepository
+from backend.services.database_service import DatabaseService
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week (0 = Sunday).
+
+    Supports ``*``, ``a-b``, ``a,b``, ``*/n`` and ``a-b/n``.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-", 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_of_month = moment.day in self.days
+        day_of_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day and self._any_weekday:
+            return True
+        if self._any_day:
+            return day_of_week
+        if self._any_weekday:
+            return day_of_month
+        return day_of_month or day_of_week
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                month_start = moment.replace(day=1, hour=0, minute=0)
+                moment = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+class ScheduledJob:
+    """A registered job: what to run, when, and how long its lease lasts"""
+
+    def __init__(self, name: str, func: Callable[[], Optional[int]], schedule: str,
+                 jitter_seconds: int = 0, lease_seconds: int = 900, description: str = ""):
+        self.name = name
+        self.func = func
+        self.cron = CronSchedule(schedule)
+        self.jitter_seconds = jitter_seconds
+        self.lease_seconds = lease_seconds
+        self.description = description
+
+    def next_run_after(self, moment: datetime) -> datetime:
+        return self.cron.next_after(moment) + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+
+
+class JobScheduler:
+    """Cron-style job scheduler safe to run in every worker process.
+
+    Job state lives in ``scheduled_jobs``. A worker may only run a job after
+    atomically taking its lease, so each scheduled occurrence runs once across
+    all processes no matter how many schedulers are polling. Jobs can run
+    embedded in the web workers or in a dedicated ``backend.scheduler_worker``
+    process (SCHEDULER_MODE=worker).
+    """
+
+    MODE_EMBEDDED = "embedded"
+    MODE_WORKER = "worker"
+    MODE_OFF = "off"
+
+    def __init__(self):
+        self.app = None
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.mode = os.getenv('SCHEDULER_MODE', self.MODE_EMBEDDED).lower()
+        self.poll_interval = float(os.getenv('SCHEDULER_POLL_INTERVAL', 5))
+        self.running = False
+        self.started_at = None
+        self._thread = None
+        self._registered_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        if os.getenv('ENABLE_BATCH_PROCESSING', 'true').lower() != 'true':
+            self.mode = self.MODE_OFF
+
+    def register(self, name: str, func: Callable[[], Optional[int]], schedule: str,
+                 jitter_seconds: int = 0, lease_seconds: int = 900, description: str = ""):
+        """Register a job; func returns the number of items it processed (or None)"""
+        self.jobs[name] = ScheduledJob(name, func, schedule, jitter_seconds, lease_seconds, description)
+
+    def _job_repo(self) -> ScheduledJobRepository:
+        return ScheduledJobRepository(DatabaseService.get_database().scheduled_jobs)
+
+    def _run_repo(self) -> JobRunRepository:
+        return JobRunRepository(DatabaseService.get_database().scheduler_runs)
+
+    def _ensure_registered(self):
+        """Write job definitions once per process so schedules survive restarts"""
+        if self._registered_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._registered_pid == os.getpid():
+                return
+
+            repo = self._job_repo()
+            now = datetime.utcnow()
+            for job in self.jobs.values():
+                repo.register(job.name, job.cron.expression, job.next_run_after(now))
+            self._registered_pid = os.getpid()
+
+    @staticmethod
+    def _owner_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    # Running
+
+    def start(self):
+        """Start the polling loop in a daemon thread (embedded mode)"""
+        if self.mode != self.MODE_EMBEDDED or self.running:
+            return
+
+        self.running = True
+        self.started_at = datetime.utcnow()
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+        logging.info(f"Job scheduler started in pid {os.getpid()} with {len(self.jobs)} jobs")
+
+    def run_forever(self):
+        """Run the polling loop in the current thread (dedicated worker process)"""
+        if self.mode == self.MODE_OFF:
+            logging.info("Batch processing is disabled; job scheduler worker not started")
+            return
+
+        self.running = True
+        self.started_at = datetime.utcnow()
+        logging.info(f"Job scheduler worker started in pid {os.getpid()} with {len(self.jobs)} jobs")
+        self._loop()
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=10)
+
+    def _loop(self):
+        # Stagger workers that start at the same moment
+        time.sleep(random.uniform(0, self.poll_interval))
+
+        while self.running:
+            try:
+                self._ensure_registered()
+                self.run_pending()
+            except Exception as e:
+                logging.error(f"Job scheduler poll failed: {e}")
+            time.sleep(self.poll_interval + random.uniform(0, self.poll_interval / 2))
+
+    def run_pending(self) -> int:
+        """Run every due job this process manages to claim; returns the number run"""
+        repo = self._job_repo()
+        owner = self._owner_id()
+        ran = 0
+
+        for job in list(self.jobs.values()):
+            if not self.running:
+                break
+
+            state = repo.claim_due(job.name, owner, job.lease_seconds)
+            if state is None:
+                continue
+
+            self._execute(job, owner, state.get("trigger") or "schedule")
+            ran += 1
+
+        return ran
+
+    def _execute(self, job: ScheduledJob, owner: str, trigger: str):
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        items_processed = None
+        error = None
+
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_lease, args=(job, owner, finished), name=f"job-lease-{job.name}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            with self.app.app_context():
+                g.db = DatabaseService.get_database()
+                items_processed = job.func()
+        except Exception as e:
+            error = str(e)
+            logging.error(f"Scheduled job '{job.name}' failed: {e}")
+        finally:
+            finished.set()
+            heartbeat.join(timeout=5)
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        run = {
+            "job": job.name,
+            "trigger": trigger,
+            "status": "failed" if error else "succeeded",
+            "started_at": started_at,
+            "finished_at": datetime.utcnow(),
+            "duration_ms": duration_ms,
+            "items_processed": items_processed,
+            "error": error,
+            "worker": owner
+        }
+
+        try:
+            self._run_repo().create(dict(run))
+            self._job_repo().complete(job.name, owner, job.next_run_after(datetime.utcnow()), run, bool(error))
+        except Exception as e:
+            logging.error(f"Could not record run of job '{job.name}': {e}")
+
+        logging.info(f"Scheduled job '{job.name}' {run['status']} in {duration_ms}ms ({items_processed} items)")
+
+    def _renew_lease(self, job: ScheduledJob, owner: str, finished: threading.Event):
+        """Keep extending a running job's lease so no other process claims it mid-run"""
+        interval = max(job.lease_seconds / 3, 1)
+        while not finished.wait(interval):
+            try:
+                if not self._job_repo().renew_lease(job.name, owner, job.lease_seconds):
+                    logging.warning(f"Scheduled job '{job.name}' lost its lease while running")
+                    return
+            except Exception as e:
+                logging.error(f"Could not renew lease of job '{job.name}': {e}")
+
+    # Control and inspection
+
+    def trigger(self, name: str, requested_by: Optional[str] = None) -> bool:
+        """Ask the schedulers to run a job as soon as possible"""
+        if name not in self.jobs:
+            raise ValueError(f"Unknown job: {name}")
+
+        self._ensure_registered()
+        return self._job_repo().request_run(name, requested_by).matched_count == 1
+
+    def set_paused(self, paused: bool, name: Optional[str] = None) -> int:
+        """Pause or resume jobs across every process"""
+        if name is not None and name not in self.jobs:
+            raise ValueError(f"Unknown job: {name}")
+
+        self._ensure_registered()
+        return self._job_repo().set_paused(paused, name).matched_count
+
+    def get_status(self) -> Dict[str, Any]:
+        """Job schedules, leases and last outcomes, plus this process's loop state"""
+        self._ensure_registered()
+        now = datetime.utcnow()
+
+        jobs = []
+        for state in self._job_repo().find_all():
+            job = self.jobs.get(state["_id"])
+            if job is None:
+                continue
+
+            locked_until = state.get("locked_until")
+            next_run_at = state.get("next_run_at")
+            jobs.append({
+                "name": job.name,
+                "description": job.description,
+                "schedule": job.cron.expression,
+                "paused": state.get("paused", False),
+                "running": bool(locked_until and locked_until > now),
+                "owner": state.get("owner"),
+                "next_run_at": next_run_at,
+                "overdue_seconds": max(0, round((now - next_run_at).total_seconds())) if next_run_at else None,
+                "run_count": state.get("run_count", 0),
+                "failure_count": state.get("failure_count", 0),
+                "last_run": state.get("last_run")
+            })
+
+        return {
+            "mode": self.mode,
+            "loop_running": self.running,
+            "started_at": self.started_at,
+            "worker": self._owner_id(),
+            "jobs": jobs
+        }
+
+    def get_run_history(self, name: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        runs = self._run_repo().find_recent(name, limit)
+        for run in runs:
+            run["_id"] = str(run["_id"])
+        return runs
+
+# Global job scheduler instance
+job_scheduler = JobScheduler()
+
+atexit.register(job_scheduler.stop)
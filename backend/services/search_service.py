@@ -6,6 +6,7 @@ import logging
 import re
 from backend.repositories.shared_skill_repository import SharedSkillRepository
 from backend.repositories.custom_task_repository import CustomTaskRepository
+from backend.services.user_info_loader import UserInfoLoader
 
 class SearchService:
     """Service for searching and discovering shared skills"""
@@ -219,14 +220,17 @@ class SearchService:
                     .limit(limit))
         
         # Enrich with user and skill info
-        for task in tasks:
-            task["user_info"] = SearchService._get_user_info(str(task["user_id"]))
-            
-            # Get skill info
-            skill_info = g.db.shared_skills.find_one(
-                {"_id": task["skill_id"]},
+        UserInfoLoader.current().attach(tasks)
+        skills_by_id = {
+            skill["_id"]: skill
+            for skill in g.db.shared_skills.find(
+                {"_id": {"$in": list({task["skill_id"] for task in tasks})}},
                 {"title": 1, "category": 1}
             )
+        } if tasks else {}
+        
+        for task in tasks:
+            skill_info = skills_by_id.get(task["skill_id"])
             if skill_info:
                 task["skill_info"] = {
                     "title": skill_info["title"],
@@ -327,17 +331,17 @@ class SearchService:
     def _enrich_search_results(skills: List[Dict], query: str = None) -> List[Dict]:
         """Enrich search results with additional information"""
         
+        # Add user info
+        UserInfoLoader.current().attach(skills, id_field="shared_by")
+        
+        # Add custom task counts for the skills that have any, in one aggregation
+        custom_task_repo = CustomTaskRepository(g.db.custom_tasks)
+        task_counts = custom_task_repo.count_tasks_for_skills(
+            [skill["_id"] for skill in skills if skill.get("has_custom_tasks")]
+        )
+        
         for skill in skills:
-            # Add user info
-            skill["user_info"] = SearchService._get_user_info(str(skill["shared_by"]))
-            
-            # Add custom task count if applicable
-            if skill.get("has_custom_tasks"):
-                custom_task_repo = CustomTaskRepository(g.db.custom_tasks)
-                task_count = custom_task_repo.count_tasks_for_skill(str(skill["_id"]))
-                skill["custom_task_count"] = task_count
-            else:
-                skill["custom_task_count"] = 0
+            skill["custom_task_count"] = task_counts.get(str(skill["_id"]), 0)
             
             # Add relevance score for text searches
             if query and "score" in skill:
@@ -354,18 +358,4 @@ class SearchService:
     @staticmethod
     def _get_user_info(user_id: str) -> Dict:
         """Get basic user information"""
-        from backend.auth.models import User
-        
-        user = User.find_by_id(user_id)
-        if user:
-            return {
-                "user_id": user_id,
-                "username": user.get("username", "Unknown"),
-                "avatar_url": f"https://ui-avatars.com/api/?name={user.get('username', 'U')}&background=8B5CF6&color=fff&size=40"
-            }
-        else:
-            return {
-                "user_id": user_id,
-                "username": "Unknown User",
-                "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
-            }
\ No newline at end of file
+        return UserInfoLoader.current().load(user_id)
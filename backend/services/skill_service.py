@@ -3,7 +3,6 @@ from datetime import datetime, timedelta
 from backend.models.base import SkillPlan
 from backend.repositories.skill_repository import SkillRepository
 from backend.repositories.skill_completion_repository import SkillCompletionRepository
-from backend.services.ai_service import AIService
 import logging
 from flask import g
 from bson import ObjectId
@@ -15,13 +14,6 @@ class SkillService:
      
         skill_repo = SkillRepository(g.db.skills)
 
-        try:
-            import asyncio
-            daily_tasks_list = asyncio.run(AIService.generate_structured_plan(topic=title, plan_type="skill"))
-        except (ValueError, ConnectionError) as e:
-            logging.error(f"AI Service failed to generate plan for skill '{title}': {e}")
-            raise
-
         now = datetime.utcnow()
         start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
         if start_date_str:
@@ -30,15 +22,8 @@ class SkillService:
             except ValueError:
                 raise ValueError("Invalid date format. Use YYYY-MM-DD.")
 
-
-        image_url = None
-        try:
-            logging.info(f"Fetching skill-specific image for: {title}")
-            image_url = asyncio.run(UnsplashService.fetch_image(title, use_specific_query=True))
-            logging.info(f"Successfully fetched image: {image_url}")
-        except Exception as e:
-            logging.error(f"Unsplash fetch failed for skill '{title}': {e}")
-            image_url = UnsplashService._get_fallback_image(title)
+        # The curriculum and the Unsplash image are filled in by the plan generation pipeline
+        image_url = UnsplashService._get_fallback_image(title)
 
         skill_plan_data = {
             "user_id": user_id,
@@ -46,8 +31,9 @@ class SkillService:
             "skill_name": title,
             "difficulty": "beginner",
             "curriculum": {
-                "daily_tasks": daily_tasks_list,
-                "total_days": 30
+                "daily_tasks": [],
+                "total_days": 30,
+                "status": "pending"
             },
             "progress": {
                 "current_day": 1,
@@ -72,6 +58,11 @@ class SkillService:
         if created_plan_dict and '_id' in created_plan_dict:
             created_plan_dict['_id'] = str(created_plan_dict['_id'])
             
+            from backend.services.plan_generation_service import plan_generation_service
+            job = plan_generation_service.submit_skill_plan(created_plan_dict['_id'], user_id, title)
+            created_plan_dict['curriculum']['job_id'] = str(job['_id'])
+            skill_repo.update_skill(created_plan_dict['_id'], user_id, {"curriculum.job_id": str(job['_id'])})
+            
         return created_plan_dict
     
     @staticmethod
@@ -228,7 +219,7 @@ class SkillService:
         logging.info(f"Refreshing image for skill '{skill_name}' (ID: {skill_id})")
         
         try:
-            import asyncio
+            from backend.services.http_client_service import http_client_service
             from backend.services.unsplash_service import UnsplashService
             
             strategies = [
@@ -242,7 +233,7 @@ class SkillService:
             for use_specific, strategy_name in strategies:
                 try:
                     logging.info(f"Trying {strategy_name} for skill '{skill_name}'")
-                    candidate_url = asyncio.run(UnsplashService.fetch_image(skill_name, use_specific))
+                    candidate_url = http_client_service.run(UnsplashService.fetch_image(skill_name, use_specific), timeout=60)
                     
                     if candidate_url and candidate_url != current_image:
                         new_image_url = candidate_url
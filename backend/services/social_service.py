@@ -8,6 +8,10 @@ from backend.repositories.skill_repository import SkillRepository
 from backend.repositories.custom_task_repository import CustomTaskRepository
 from backend.repositories.interaction_repository import InteractionRepository
 from backend.repositories.comment_repository import CommentRepository
+from backend.services.activity_feed_service import ActivityFeedService
+from backend.services.leaderboard_service import LeaderboardService
+from backend.services.moderation_service import ModerationService
+from backend.services.user_info_loader import UserInfoLoader
 
 class SocialService:
     """Service for managing social features - skill sharing, discovery, and community interactions"""
@@ -44,6 +48,8 @@ class SocialService:
             task_count = custom_task_repo.count_tasks_for_skill(skill_id)
             has_custom_tasks = task_count > 0
         
+        ModerationService.check_posting_rate(user_id, ModerationService.SKILL)
+        
         # Create shared skill data
         shared_skill_data = {
             "original_skill_id": ObjectId(skill_id),
@@ -61,9 +67,13 @@ class SocialService:
         
         # Create the shared skill
         shared_skill = shared_skill_repo.create(shared_skill_data)
+        LeaderboardService.record_skill_shared(user_id, 1)
         
         logging.info(f"User {user_id} shared skill '{original_skill['title']}' as {shared_skill['_id']}")
         
+        if visibility == "public":
+            ActivityFeedService.record_activity(user_id, ActivityFeedService.SKILL_SHARED, skill=shared_skill)
+        
         return {
             "shared_skill_id": str(shared_skill["_id"]),
             "title": shared_skill["title"],
@@ -113,6 +123,11 @@ class SocialService:
         custom_task_repo = CustomTaskRepository(g.db.custom_tasks)
         custom_tasks = custom_task_repo.find_by_skill(skill_id)
         
+        # Add user info to the tasks and the skill owner with one batched lookup
+        loader = UserInfoLoader.current()
+        loader.load_many([skill["shared_by"], *(task["user_id"] for task in custom_tasks)])
+        loader.attach(custom_tasks)
+        
         # Organize custom tasks by day
         tasks_by_day = {}
         for task in custom_tasks:
@@ -120,8 +135,6 @@ class SocialService:
             if day not in tasks_by_day:
                 tasks_by_day[day] = []
             
-            # Add user info to task
-            task["user_info"] = SocialService._get_user_info(str(task["user_id"]))
             tasks_by_day[day].append(task)
         
         # Get interaction stats
@@ -219,6 +232,8 @@ class SocialService:
         # Update download count
         shared_skill_repo.increment_downloads(shared_skill_id)
         
+        ActivityFeedService.record_activity(user_id, ActivityFeedService.SKILL_DOWNLOADED, skill=shared_skill)
+        
         logging.info(f"User {user_id} downloaded shared skill {shared_skill_id}")
         
         return {
@@ -290,27 +305,9 @@ class SocialService:
     @staticmethod
     def _enrich_skills_with_user_info(skills: List[Dict]) -> List[Dict]:
         """Add user information to skills"""
-        from backend.auth.models import User
-        
-        for skill in skills:
-            user_id = str(skill["shared_by"])
-            skill["user_info"] = SocialService._get_user_info(user_id)
-        
-        return skills
+        return UserInfoLoader.current().attach(skills, id_field="shared_by")
 
     @staticmethod
     def _get_user_info(user_id: str) -> Dict:
         """Get basic user information"""
-        from backend.auth.models import User
-        
-        user = User.find_by_id(user_id)
-        if user:
-            return {
-                "username": user.get("username", "Unknown"),
-                "avatar_url": f"https://ui-avatars.com/api/?name={user.get('username', 'U')}&background=8B5CF6&color=fff&size=40"
-            }
-        else:
-            return {
-                "username": "Unknown User",
-                "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
-            }
\ No newline at end of file
+        return UserInfoLoader.current().load(user_id)
@@ -6,6 +6,60 @@ from backend.repositories.checkin_repository import CheckinRepository
 from backend.repositories.skill_completion_repository import SkillCompletionRepository
 
 
+class UserActivityWindow:
+    """Day-bucketed view of a user's recent checkins and skill completions.
+
+    Built from two bulk queries so every dashboard metric is computed in memory
+    instead of issuing one query per habit per day.
+    """
+
+    def __init__(self, checkins: List[Dict], completions: List[Dict], user_id: str, since: datetime):
+        self.since = since
+        self.recent_checkins_by_habit: Dict[str, int] = {}
+        self.checkins_by_day: Dict = {}
+        self.completions_by_day: Dict = {}
+
+        for checkin in checkins:
+            habit_id = checkin.get('habit_id')
+            checkin_date = checkin.get('date')
+            if not isinstance(checkin_date, datetime):
+                continue
+
+            self.recent_checkins_by_habit[habit_id] = self.recent_checkins_by_habit.get(habit_id, 0) + 1
+
+            if checkin.get('completed') is True and checkin.get('user_id') == user_id:
+                day_checkins = self.checkins_by_day.setdefault(checkin_date.date(), {})
+                day_checkins.setdefault(habit_id, checkin)
+
+        for completion in completions:
+            completed_at = completion.get('completed_at')
+            if isinstance(completed_at, datetime):
+                self.completions_by_day.setdefault(completed_at.date(), []).append(completion)
+
+    @classmethod
+    def load(cls, habits: List[Dict], user_id: str, checkin_repo: CheckinRepository, completion_repo: SkillCompletionRepository, days: int = 30) -> 'UserActivityWindow':
+        """Fetch the whole window with one checkin query and one completion query"""
+        since = datetime.utcnow() - timedelta(days=days)
+        habit_ids = [str(habit.get('_id')) for habit in habits]
+
+        checkins = checkin_repo.find_for_habits_since(habit_ids, since)
+        completions = completion_repo.find_user_completions_since(user_id, since)
+
+        return cls(checkins, completions, user_id, since)
+
+    def recent_checkin_count(self, habit_id: str) -> int:
+        return self.recent_checkins_by_habit.get(habit_id, 0)
+
+    def checkin_for(self, habit_id: str, day) -> Optional[Dict]:
+        return self.checkins_by_day.get(day, {}).get(habit_id)
+
+    def checkins_on(self, day) -> Dict[str, Dict]:
+        return self.checkins_by_day.get(day, {})
+
+    def completions_on(self, day) -> List[Dict]:
+        return self.completions_by_day.get(day, [])
+
+
 class StatsService:
     @staticmethod
     def get_user_stats(user_id: str, skill_repo: SkillRepository, habit_repo: HabitRepository, checkin_repo: CheckinRepository, completion_repo: SkillCompletionRepository) -> Dict:
@@ -16,13 +70,15 @@ class StatsService:
         skills = skill_repo.find_by_user(user_id)
         habits = habit_repo.find_by_user(user_id)
         
-        skills_stats = StatsService._calculate_skills_stats(skills, completion_repo, user_id)
+        activity = UserActivityWindow.load(habits, user_id, checkin_repo, completion_repo, days=30)
         
-        habits_stats = StatsService._calculate_habits_stats(habits, checkin_repo, user_id)
+        skills_stats = StatsService._calculate_skills_stats(skills, activity)
+        
+        habits_stats = StatsService._calculate_habits_stats(habits, activity)
         
         overall_stats = StatsService._calculate_overall_stats(skills, habits)
         
-        activity_timeline = StatsService._calculate_activity_timeline(skills, habits, checkin_repo, completion_repo, user_id)
+        activity_timeline = StatsService._calculate_activity_timeline(skills, habits, activity)
         
         return {
             "overview": overall_stats,
@@ -33,7 +89,7 @@ class StatsService:
         }
     
     @staticmethod
-    def _calculate_skills_stats(skills: List[Dict], completion_repo: SkillCompletionRepository, user_id: str) -> Dict:
+    def _calculate_skills_stats(skills: List[Dict], activity: UserActivityWindow) -> Dict:
         """Calculate detailed skills statistics"""
         if not skills:
             return {
@@ -76,7 +132,7 @@ class StatsService:
         
         average_completion = sum(completion_percentages) / len(completion_percentages) if completion_percentages else 0
         
-        completion_trend = StatsService._calculate_skills_completion_trend(skills, completion_repo, user_id)
+        completion_trend = StatsService._calculate_skills_completion_trend(activity)
         
         return {
             "total_skills": total_skills,
@@ -89,7 +145,7 @@ class StatsService:
         }
     
     @staticmethod
-    def _calculate_habits_stats(habits: List[Dict], checkin_repo: CheckinRepository, user_id: str) -> Dict:
+    def _calculate_habits_stats(habits: List[Dict], activity: UserActivityWindow) -> Dict:
         """Calculate detailed habits statistics"""
         if not habits:
             return {
@@ -122,8 +178,6 @@ class StatsService:
             all_current_streaks.append(current_streak)
             all_longest_streaks.append(longest_streak)
             
-            recent_checkins = checkin_repo.get_recent_for_habit(habit_id, 30)
-            
             habits_breakdown.append({
                 "id": habit_id,
                 "title": habit.get('title', 'Unknown'),
@@ -135,12 +189,12 @@ class StatsService:
                 "status": habit.get('status', 'active'),
                 "created_at": habit.get('created_at'),
                 "icon_url": habit.get('icon_url'),
-                "recent_activity": len(recent_checkins)
+                "recent_activity": activity.recent_checkin_count(habit_id)
             })
         
-        weekly_checkins = StatsService._calculate_weekly_checkins(habits, checkin_repo, user_id)
+        weekly_checkins = StatsService._calculate_weekly_checkins(activity)
         
-        consistency_score = StatsService._calculate_consistency_score(habits, checkin_repo, user_id)
+        consistency_score = StatsService._calculate_consistency_score(habits, activity)
         
         return {
             "total_habits": total_habits,
@@ -184,7 +238,7 @@ class StatsService:
         }
     
     @staticmethod
-    def _calculate_skills_completion_trend(skills: List[Dict], completion_repo: SkillCompletionRepository, user_id: str) -> List[Dict]:
+    def _calculate_skills_completion_trend(activity: UserActivityWindow) -> List[Dict]:
         """Calculate skill completion trend over the last 7 days using real completion data"""
         trend_data = []
         base_date = datetime.utcnow() - timedelta(days=6)
@@ -192,8 +246,7 @@ class StatsService:
         for i in range(7):
             date = base_date + timedelta(days=i)
             
-            skill_completions = completion_repo.find_completions_by_date(user_id, date)
-            completed_days = len(skill_completions)
+            completed_days = len(activity.completions_on(date.date()))
             
             trend_data.append({
                 "date": date.strftime("%Y-%m-%d"),
@@ -204,20 +257,14 @@ class StatsService:
         return trend_data
     
     @staticmethod
-    def _calculate_weekly_checkins(habits: List[Dict], checkin_repo: CheckinRepository, user_id: str) -> List[Dict]:
+    def _calculate_weekly_checkins(activity: UserActivityWindow) -> List[Dict]:
         """Calculate habit checkins for the last 7 days"""
         weekly_data = []
         base_date = datetime.utcnow() - timedelta(days=6)
         
         for i in range(7):
             date = base_date + timedelta(days=i)
-            day_checkins = 0
-            
-            for habit in habits:
-                habit_id = str(habit.get('_id'))
-                checkin = checkin_repo.find_by_habit_and_date(habit_id, user_id, date.date())
-                if checkin:
-                    day_checkins += 1
+            day_checkins = len(activity.checkins_on(date.date()))
             
             weekly_data.append({
                 "date": date.strftime("%Y-%m-%d"),
@@ -228,7 +275,7 @@ class StatsService:
         return weekly_data
     
     @staticmethod
-    def _calculate_consistency_score(habits: List[Dict], checkin_repo: CheckinRepository, user_id: str) -> float:
+    def _calculate_consistency_score(habits: List[Dict], activity: UserActivityWindow) -> float:
         """Calculate overall consistency score as percentage"""
         if not habits:
             return 0.0
@@ -249,8 +296,7 @@ class StatsService:
             
             total_expected += expected_checkins
             
-            recent_checkins = checkin_repo.get_recent_for_habit(habit_id, 30)
-            total_completed += len(recent_checkins)
+            total_completed += activity.recent_checkin_count(habit_id)
         
         if total_expected == 0:
             return 0.0
@@ -258,7 +304,7 @@ class StatsService:
         return (total_completed / total_expected) * 100
     
     @staticmethod
-    def _calculate_activity_timeline(skills: List[Dict], habits: List[Dict], checkin_repo: CheckinRepository, completion_repo: SkillCompletionRepository, user_id: str) -> List[Dict]:
+    def _calculate_activity_timeline(skills: List[Dict], habits: List[Dict], activity: UserActivityWindow) -> List[Dict]:
         """Calculate activity timeline for the last 30 days using real completion data"""
         timeline_data = []
         base_date = datetime.utcnow() - timedelta(days=29)
@@ -266,15 +312,10 @@ class StatsService:
         for i in range(30):
             date = base_date + timedelta(days=i)
             
-            skill_completions = completion_repo.find_completions_by_date(user_id, date)
+            skill_completions = activity.completions_on(date.date())
             skill_activity = len(skill_completions)
             
-            habit_checkins = 0
-            for habit in habits:
-                habit_id = str(habit.get('_id'))
-                checkin = checkin_repo.find_by_habit_and_date(habit_id, user_id, date.date())
-                if checkin:
-                    habit_checkins += 1
+            habit_checkins = len(activity.checkins_on(date.date()))
             
             total_activity = skill_activity + habit_checkins
             
@@ -292,7 +333,7 @@ class StatsService:
             
             for habit in habits:
                 habit_id = str(habit.get('_id'))
-                checkin = checkin_repo.find_by_habit_and_date(habit_id, user_id, date.date())
+                checkin = activity.checkin_for(habit_id, date.date())
                 if checkin:
                     completion_details.append({
                         "type": "habit",
@@ -2,7 +2,7 @@ import os
 import logging
 import random
 
-import aiohttp
+from backend.services.http_client_service import http_client_service
 
 UNSPLASH_API = "https://api.unsplash.com/photos/random"
 ACCESS_KEY = os.getenv("UNSPLASH_ACCESS_KEY")
@@ -256,23 +256,22 @@ class UnsplashService:
             "content_filter": "high"  
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(UNSPLASH_API, headers=HEADERS, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    raise ValueError(f"Unsplash API returned status {resp.status}")
-                
-                data = await resp.json()
-                
-                image_url = (
-                    data.get("urls", {}).get("regular") or 
-                    data.get("urls", {}).get("small") or
-                    data.get("urls", {}).get("thumb")
-                )
-                
-                if not image_url:
-                    raise ValueError("No image URL found in response")
-                
-                return image_url
+        resp = await http_client_service.get(UNSPLASH_API, headers=HEADERS, params=params)
+        if resp.status_code != 200:
+            raise ValueError(f"Unsplash API returned status {resp.status_code}")
+        
+        data = resp.json()
+        
+        image_url = (
+            data.get("urls", {}).get("regular") or 
+            data.get("urls", {}).get("small") or
+            data.get("urls", {}).get("thumb")
+        )
+        
+        if not image_url:
+            raise ValueError("No image URL found in response")
+        
+        return image_url
     
     @staticmethod
     def _generate_search_query(query: str, use_specific: bool = True) -> str:
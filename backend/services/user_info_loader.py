@@ -0,0 +1,110 @@
+from typing import Dict, List, Iterable, Optional
+from flask import g
+from bson import ObjectId
+from backend.services.cache_service import CacheService
+
+class UserInfoLoader:
+    """Request-scoped batch loader for the basic user info attached to API rows.
+
+    Callers hand over every row of a response at once; the loader collects the
+    user IDs, serves what it can from the request memo and the profile cache,
+    and resolves the rest with a single ``$in`` query.
+    """
+
+    CACHE_PREFIX = f"{CacheService.USER_PREFIX}info:"
+    CACHE_TTL = CacheService.MEDIUM_TTL
+
+    def __init__(self, users_collection):
+        self.collection = users_collection
+        self._resolved: Dict[str, Dict] = {}
+
+    @classmethod
+    def current(cls) -> "UserInfoLoader":
+        """Get the loader for the current request, creating it on first use"""
+        loader = g.get('user_info_loader')
+        if loader is None:
+            loader = cls(g.db.users)
+            g.user_info_loader = loader
+        return loader
+
+    @classmethod
+    def invalidate(cls, user_id: str):
+        """Drop cached info after a user changes their username"""
+        CacheService.delete(f"{cls.CACHE_PREFIX}{user_id}")
+        loader = g.get('user_info_loader')
+        if loader is not None:
+            loader._resolved.pop(str(user_id), None)
+
+    def load_many(self, user_ids: Iterable) -> Dict[str, Dict]:
+        """Resolve user info for every ID with at most one cache round trip and one query"""
+        wanted = {str(user_id) for user_id in user_ids if user_id}
+        pending = [user_id for user_id in wanted if user_id not in self._resolved]
+
+        if pending:
+            cached = CacheService.mget([f"{self.CACHE_PREFIX}{user_id}" for user_id in pending])
+            for key, info in cached.items():
+                self._resolved[key[len(self.CACHE_PREFIX):]] = info
+
+            pending = [user_id for user_id in pending if user_id not in self._resolved]
+            if pending:
+                self._fetch(pending)
+
+        return {user_id: self._resolved[user_id] for user_id in wanted}
+
+    def load(self, user_id) -> Dict:
+        return self.load_many([user_id])[str(user_id)]
+
+    def attach(self, rows: List[Dict], id_field: str = "user_id", target_field: str = "user_info",
+               children_field: Optional[str] = None) -> List[Dict]:
+        """Set target_field on every row (and nested children) from one batched load"""
+        flat_rows = []
+        stack = list(rows)
+        while stack:
+            row = stack.pop()
+            flat_rows.append(row)
+            if children_field:
+                stack.extend(row.get(children_field) or [])
+
+        infos = self.load_many(row.get(id_field) for row in flat_rows)
+        for row in flat_rows:
+            user_id = row.get(id_field)
+            row[target_field] = infos[str(user_id)] if user_id else self._unknown(None)
+
+        return rows
+
+    def _fetch(self, user_ids: List[str]):
+        object_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+        users = self.collection.find({"_id": {"$in": object_ids}}, {"username": 1}) if object_ids else []
+
+        fresh = {}
+        for user in users:
+            user_id = str(user["_id"])
+            fresh[user_id] = self._format(user_id, user.get("username", "Unknown"))
+
+        if fresh:
+            CacheService.mset(
+                {f"{self.CACHE_PREFIX}{user_id}": info for user_id, info in fresh.items()},
+                self.CACHE_TTL,
+                {f"{self.CACHE_PREFIX}{user_id}": [CacheService.user_tag(user_id)] for user_id in fresh}
+            )
+
+        self._resolved.update(fresh)
+        for user_id in user_ids:
+            # Missing users are memoized for this request only
+            self._resolved.setdefault(user_id, self._unknown(user_id))
+
+    @staticmethod
+    def _format(user_id: str, username: str) -> Dict:
+        return {
+            "user_id": user_id,
+            "username": username,
+            "avatar_url": f"https://ui-avatars.com/api/?name={username or 'U'}&background=8B5CF6&color=fff&size=40"
+        }
+
+    @staticmethod
+    def _unknown(user_id: Optional[str]) -> Dict:
+        return {
+            "user_id": user_id,
+            "username": "Unknown User",
+            "avatar_url": "https://ui-avatars.com/api/?name=U&background=8B5CF6&color=fff&size=40"
+        }
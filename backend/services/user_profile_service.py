@@ -5,6 +5,8 @@ from bson import ObjectId
 import logging
 import secrets
 from backend.auth.models import User
+from backend.services.leaderboard_service import LeaderboardService
+from backend.services.user_info_loader import UserInfoLoader
 
 class UserProfileService:
     """Service for managing user profiles and related features"""
@@ -112,6 +114,9 @@ class UserProfileService:
             )
             
             if result.modified_count > 0:
+                if 'username' in update_fields:
+                    UserInfoLoader.invalidate(user_id)
+                
                 # Get updated profile
                 updated_profile = UserProfileService.get_user_profile(user_id, include_private=True)
                 
@@ -203,129 +208,7 @@ class UserProfileService:
     @staticmethod
     def get_user_leaderboard(leaderboard_type: str = "overall", limit: int = 50) -> Dict:
         """Get user leaderboard based on various metrics"""
-        
-        try:
-            user_collection = g.db.users
-            
-            if leaderboard_type == "followers":
-                # Get users with most followers
-                pipeline = [
-                    {"$match": {"is_deactivated": {"$ne": True}}},
-                    {"$lookup": {
-                        "from": "user_relationships",
-                        "let": {"user_id": "$_id"},
-                        "pipeline": [
-                            {"$match": {
-                                "$expr": {"$eq": ["$following_id", "$$user_id"]},
-                                "relationship_type": "follow",
-                                "is_active": True
-                            }},
-                            {"$count": "followers"}
-                        ],
-                        "as": "follower_data"
-                    }},
-                    {"$addFields": {
-                        "followers_count": {
-                            "$ifNull": [{"$arrayElemAt": ["$follower_data.followers", 0]}, 0]
-                        }
-                    }},
-                    {"$sort": {"followers_count": -1, "username": 1}},
-                    {"$limit": limit},
-                    {"$project": {
-                        "username": 1,
-                        "bio": 1,
-                        "profile_picture": 1,
-                        "is_verified": 1,
-                        "followers_count": 1
-                    }}
-                ]
-            
-            elif leaderboard_type == "skills_shared":
-                # Get users who shared most skills
-                pipeline = [
-                    {"$match": {"is_deactivated": {"$ne": True}}},
-                    {"$lookup": {
-                        "from": "shared_skills",
-                        "localField": "_id",
-                        "foreignField": "shared_by",
-                        "as": "shared_skills"
-                    }},
-                    {"$addFields": {
-                        "skills_count": {"$size": "$shared_skills"}
-                    }},
-                    {"$sort": {"skills_count": -1, "username": 1}},
-                    {"$limit": limit},
-                    {"$project": {
-                        "username": 1,
-                        "bio": 1,
-                        "profile_picture": 1,
-                        "is_verified": 1,
-                        "skills_count": 1
-                    }}
-                ]
-            
-            else:  # overall
-                # Combined score based on multiple metrics
-                pipeline = [
-                    {"$match": {"is_deactivated": {"$ne": True}}},
-                    {"$lookup": {
-                        "from": "shared_skills",
-                        "localField": "_id",
-                        "foreignField": "shared_by",
-                        "as": "shared_skills"
-                    }},
-                    {"$lookup": {
-                        "from": "user_relationships",
-                        "let": {"user_id": "$_id"},
-                        "pipeline": [
-                            {"$match": {
-                                "$expr": {"$eq": ["$following_id", "$$user_id"]},
-                                "relationship_type": "follow",
-                                "is_active": True
-                            }}
-                        ],
-                        "as": "followers"
-                    }},
-                    {"$addFields": {
-                        "overall_score": {
-                            "$add": [
-                                {"$size": "$shared_skills"},
-                                {"$multiply": [{"$size": "$followers"}, 0.5]}
-                            ]
-                        }
-                    }},
-                    {"$sort": {"overall_score": -1, "username": 1}},
-                    {"$limit": limit},
-                    {"$project": {
-                        "username": 1,
-                        "bio": 1,
-                        "profile_picture": 1,
-                        "is_verified": 1,
-                        "overall_score": 1
-                    }}
-                ]
-            
-            results = list(user_collection.aggregate(pipeline))
-            
-            # Format results
-            leaderboard = []
-            for idx, user in enumerate(results):
-                leaderboard.append({
-                    "rank": idx + 1,
-                    "user_id": str(user["_id"]),
-                    "username": user["username"],
-                    "bio": user.get("bio", ""),
-                    "profile_picture": user.get("profile_picture"),
-                    "is_verified": user.get("is_verified", False),
-                    "score": user.get("followers_count") or user.get("skills_count") or user.get("overall_score", 0),
-                    "avatar_url": f"https://ui-avatars.com/api/?name={user['username'][0]}&background=8B5CF6&color=fff&size=60"
-                })
-            
-            return {"users": leaderboard}
-            
-        except Exception as e:
-            logging.error(f"Error getting user leaderboard: {e}")
-            return {"users": []}
+        return LeaderboardService.get_leaderboard(leaderboard_type, limit)
 
     @staticmethod
     def get_user_detailed_stats(user_id: str) -> Dict:
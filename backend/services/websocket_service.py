@@ -1,19 +1,31 @@
 from typing import Dict, List, Any, Optional
+import os
+import socket
 import logging
 from datetime import datetime
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 from flask import request
 from backend.auth.utils import decode_token
+from backend.services.presence_service import PresenceService
 import json
 
 class WebSocketService:
-    """Service for managing real-time WebSocket communications"""
+    """Service for managing real-time WebSocket communications
+
+    In clustered mode the SocketIO server is attached to a message queue, so
+    emits reach clients connected to any worker, and presence (online users,
+    skill room members) is shared through ``PresenceService``. The local
+    dicts then only describe this process's connections.
+    """
     
-    def __init__(self, socketio: SocketIO):
+    def __init__(self, socketio: SocketIO, clustered: bool = False):
         self.socketio = socketio
+        self.clustered = clustered
         self.connected_users = {}  # {user_id: {session_id: socket_info}}
         self.skill_rooms = {}  # {skill_id: [user_ids]}
+        self.session_rooms = {}  # {session_id: {skill_ids}}
         self.logger = logging.getLogger(__name__)
+        self._heartbeat_pid = None
         
         self._setup_event_handlers()
 
@@ -36,14 +48,13 @@ class WebSocketService:
                     disconnect()
                     return False
                 
-                # Decode JWT token
-                try:
-                    user_data = decode_token(token)
-                    user_id = str(user_data['user_id'])
-                except Exception as e:
-                    self.logger.warning(f"Invalid token in WebSocket connection: {e}")
+                # Decode JWT token (returns the user_id, or None if invalid/expired)
+                user_id = decode_token(token)
+                if not user_id:
+                    self.logger.warning(f"Invalid token in WebSocket connection from {request.sid}")
                     disconnect()
                     return False
+                user_id = str(user_id)
                 
                 # Store user connection
                 if user_id not in self.connected_users:
@@ -58,6 +69,10 @@ class WebSocketService:
                 # Join user to their personal room
                 join_room(f"user_{user_id}")
                 
+                if self.clustered:
+                    self._ensure_heartbeat()
+                    PresenceService.session_started(self._node_id(), user_id, request.sid)
+                
                 self.logger.info(f"User {user_id} connected via WebSocket (session: {request.sid})")
                 
                 # Emit connection success
@@ -88,6 +103,7 @@ class WebSocketService:
                             del self.connected_users[uid]
                         break
                 
+                session_skills = self.session_rooms.pop(request.sid, set())
                 if user_id:
                     # Leave all rooms
                     leave_room(f"user_{user_id}")
@@ -96,6 +112,9 @@ class WebSocketService:
                             users.remove(user_id)
                             leave_room(f"skill_{skill_id}")
                     
+                    if self.clustered:
+                        PresenceService.session_ended(user_id, request.sid, list(session_skills))
+                    
                     self.logger.info(f"User {user_id} disconnected from WebSocket (session: {request.sid})")
                 
             except Exception as e:
@@ -124,6 +143,10 @@ class WebSocketService:
                     self.skill_rooms[skill_id] = []
                 if user_id not in self.skill_rooms[skill_id]:
                     self.skill_rooms[skill_id].append(user_id)
+                self.session_rooms.setdefault(request.sid, set()).add(skill_id)
+                
+                if self.clustered:
+                    PresenceService.room_joined(self._node_id(), user_id, request.sid, skill_id)
                 
                 emit('skill_joined', {
                     'skill_id': skill_id,
@@ -158,6 +181,10 @@ class WebSocketService:
                     self.skill_rooms[skill_id].remove(user_id)
                     if not self.skill_rooms[skill_id]:
                         del self.skill_rooms[skill_id]
+                self.session_rooms.get(request.sid, set()).discard(skill_id)
+                
+                if self.clustered:
+                    PresenceService.room_left(user_id, request.sid, skill_id)
                 
                 emit('skill_left', {
                     'skill_id': skill_id,
@@ -177,6 +204,45 @@ class WebSocketService:
                 return user_id
         return None
 
+    # Shared presence (clustered mode)
+
+    @staticmethod
+    def _node_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _local_sessions(self) -> Dict[str, str]:
+        """{session_id: user_id} for this process's connections"""
+        return {
+            session_id: user_id
+            for user_id, sessions in list(self.connected_users.items())
+            for session_id in list(sessions)
+        }
+
+    def _ensure_heartbeat(self):
+        """Start the presence heartbeat once per process (tasks do not survive fork)"""
+        if self._heartbeat_pid == os.getpid():
+            return
+        self._heartbeat_pid = os.getpid()
+        self.socketio.start_background_task(self._heartbeat_loop)
+
+    def _heartbeat_loop(self):
+        """Refresh this process's presence entries before they expire"""
+        while self._heartbeat_pid == os.getpid():
+            self.socketio.sleep(PresenceService.HEARTBEAT_INTERVAL)
+            try:
+                PresenceService.refresh(self._node_id(), self._local_sessions(), dict(self.session_rooms))
+            except Exception as e:
+                self.logger.error(f"Error refreshing WebSocket presence: {e}")
+
+    def close(self):
+        """Drop this process's presence entries on shutdown instead of waiting for them to expire"""
+        if not self.clustered or self._heartbeat_pid != os.getpid():
+            return
+        
+        self._heartbeat_pid = None
+        for session_id, user_id in self._local_sessions().items():
+            PresenceService.session_ended(user_id, session_id, list(self.session_rooms.get(session_id, ())))
+
     def notify_skill_interaction(self, skill_id: str, interaction_type: str, user_id: str, data: Dict = None):
         """Notify users in skill room about interactions"""
         try:
@@ -298,27 +364,46 @@ class WebSocketService:
             self.logger.error(f"Error notifying like received: {e}")
 
     def get_connected_users_count(self) -> int:
-        """Get count of currently connected users"""
+        """Get count of currently connected users (across all workers when clustered)"""
+        if self.clustered:
+            count = PresenceService.online_users_count()
+            if count is not None:
+                return count
         return len(self.connected_users)
 
     def get_skill_room_users(self, skill_id: str) -> List[str]:
-        """Get users currently in a skill room"""
+        """Get users currently in a skill room (across all workers when clustered)"""
+        if self.clustered:
+            users = PresenceService.room_users(skill_id)
+            if users is not None:
+                return users
         return self.skill_rooms.get(skill_id, [])
 
     def is_user_online(self, user_id: str) -> bool:
-        """Check if user is currently online"""
-        return user_id in self.connected_users and len(self.connected_users[user_id]) > 0
+        """Check if user is currently online (on any worker when clustered)"""
+        if user_id in self.connected_users and len(self.connected_users[user_id]) > 0:
+            return True
+        if self.clustered:
+            return bool(PresenceService.is_online(user_id))
+        return False
 
     def get_connection_stats(self) -> Dict:
         """Get WebSocket connection statistics"""
         try:
             total_connections = sum(len(sessions) for sessions in self.connected_users.values())
-            
-            return {
+            local = {
                 'connected_users': len(self.connected_users),
                 'total_connections': total_connections,
                 'skill_rooms': len(self.skill_rooms),
-                'total_room_memberships': sum(len(users) for users in self.skill_rooms.values()),
+                'total_room_memberships': sum(len(users) for users in self.skill_rooms.values())
+            }
+            
+            cluster = PresenceService.get_stats() if self.clustered else None
+            return {
+                **(cluster or local),
+                'mode': 'clustered' if self.clustered else 'single',
+                'presence': 'redis' if cluster is not None else 'local',
+                'worker': {'node_id': self._node_id(), **local},
                 'timestamp': datetime.utcnow().isoformat()
             }
             
@@ -0,0 +1,236 @@
+"""Cross-worker WebSocket delivery check.
+
+Starts several local app workers sharing one Redis message queue, spreads
+authenticated clients across them, publishes personal notifications and
+skill room updates from outside every worker, and reports how many arrived,
+the delivery latency, and whether every worker sees the same presence.
+
+    python -m backend.websocket_load_test --workers 3 --clients 300 --messages 5
+
+Needs Redis (``--message-queue``, default ``WEBSOCKET_MESSAGE_QUEUE`` or
+``REDIS_URL``), MongoDB for app start-up, and the Socket.IO client extras
+(``pip install "python-socketio[client]"``). ``python -m
+backend.websocket_load_test serve --port 9101`` runs a single worker.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import threading
+from datetime import datetime, timedelta
+
+
+def serve(port: int):
+    """Run one app worker on the given port (used by the harness for each worker)"""
+    import eventlet
+    eventlet.monkey_patch()
+
+    os.environ.setdefault('SCHEDULER_MODE', 'worker')
+    from backend.app import app, socketio
+    socketio.run(app, host='127.0.0.1', port=port, debug=False, use_reloader=False, log_output=False)
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+class LoadTest:
+    """Drives clients against a set of workers and tallies what they receive"""
+
+    def __init__(self, args):
+        self.args = args
+        self.ports = [args.base_port + index for index in range(args.workers)]
+        self.processes = []
+        self.clients = []
+        self.lock = threading.Lock()
+        self.received = {"notification": 0, "skill_update": 0}
+        self.latencies_ms = []
+        self.per_worker = {port: 0 for port in self.ports}
+
+    def start_workers(self):
+        env = {
+            **os.environ,
+            'WEBSOCKET_MESSAGE_QUEUE': self.args.message_queue,
+            'SCHEDULER_MODE': 'worker',
+            'PRESENCE_HEARTBEAT_INTERVAL': str(self.args.heartbeat)
+        }
+        for port in self.ports:
+            self.processes.append(subprocess.Popen(
+                [sys.executable, '-m', 'backend.websocket_load_test', 'serve', '--port', str(port)],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+
+        import httpx
+        deadline = time.time() + self.args.startup_timeout
+        for port in self.ports:
+            while True:
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.time() > deadline:
+                    raise RuntimeError(f"Worker on port {port} did not start")
+                time.sleep(0.5)
+
+    def stop_workers(self):
+        for client in self.clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(timeout=10)
+
+    def _token(self, user_id: str) -> str:
+        import jwt
+        payload = {'user_id': user_id, 'iat': datetime.utcnow(), 'exp': datetime.utcnow() + timedelta(hours=1)}
+        secret = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
+        return jwt.encode(payload, secret, algorithm='HS256')
+
+    def _on_message(self, event: str, port: int, message):
+        sent_at = (message.get('data') or {}).get('sent_at')
+        with self.lock:
+            self.received[event] += 1
+            self.per_worker[port] += 1
+            if sent_at:
+                self.latencies_ms.append((time.time() - sent_at) * 1000)
+
+    def connect_clients(self):
+        import socketio
+
+        for index in range(self.args.clients):
+            port = self.ports[index % len(self.ports)]
+            client = socketio.Client(reconnection=False)
+            for event in self.received:
+                client.on(event, lambda message, event=event, port=port: self._on_message(event, port, message))
+
+            client.connect(f"http://127.0.0.1:{port}", auth={'token': self._token(f"loadtest-{index}")},
+                           transports=['websocket'], wait_timeout=10)
+            client.emit('join_skill', {'skill_id': f"loadtest-skill-{index % self.args.rooms}"})
+            self.clients.append(client)
+
+    def presence_by_worker(self):
+        import httpx
+        return {
+            port: httpx.get(f"http://127.0.0.1:{port}/health/websocket", timeout=5).json()['websocket']
+            for port in self.ports
+        }
+
+    def wait_for_presence(self):
+        """Room joins are processed asynchronously; publish once every worker sees all of them"""
+        deadline = time.time() + self.args.delivery_timeout
+        while True:
+            presence = self.presence_by_worker()
+            if all(stats.get('total_room_memberships') == self.args.clients for stats in presence.values()):
+                return presence
+            if time.time() > deadline:
+                return presence
+            time.sleep(0.2)
+
+    def publish(self):
+        """Emit from a write-only server: nothing reaches a client except through the queue"""
+        from flask_socketio import SocketIO
+        publisher = SocketIO(message_queue=self.args.message_queue)
+
+        for round_number in range(self.args.messages):
+            for index in range(self.args.clients):
+                publisher.emit('notification', {
+                    'type': 'personal_notification',
+                    'notification_type': 'load_test',
+                    'data': {'round': round_number, 'sent_at': time.time()}
+                }, to=f"user_loadtest-{index}")
+            for room in range(self.args.rooms):
+                publisher.emit('skill_update', {
+                    'type': 'skill_interaction',
+                    'skill_id': f"loadtest-skill-{room}",
+                    'interaction_type': 'load_test',
+                    'data': {'round': round_number, 'sent_at': time.time()}
+                }, to=f"skill_loadtest-skill-{room}")
+
+    def expected(self):
+        return {
+            "notification": self.args.clients * self.args.messages,
+            # Every client is in exactly one skill room
+            "skill_update": self.args.clients * self.args.messages
+        }
+
+    def wait_for_delivery(self):
+        total = sum(self.expected().values())
+        deadline = time.time() + self.args.delivery_timeout
+        while time.time() < deadline:
+            with self.lock:
+                if sum(self.received.values()) >= total:
+                    return
+            time.sleep(0.1)
+
+    def run(self) -> bool:
+        print(f"Starting {self.args.workers} workers on ports {self.ports[0]}-{self.ports[-1]}")
+        self.start_workers()
+        try:
+            started = time.time()
+            self.connect_clients()
+            print(f"Connected {len(self.clients)} clients in {time.time() - started:.1f}s")
+
+            presence = self.wait_for_presence()
+            self.publish()
+            self.wait_for_delivery()
+            return self.report(presence)
+        finally:
+            self.stop_workers()
+
+    def report(self, presence) -> bool:
+        expected = self.expected()
+        delivered_all = True
+        for event, count in self.received.items():
+            delivered_all &= count == expected[event]
+            print(f"{event}: delivered {count}/{expected[event]}")
+
+        print("Deliveries per worker: " + ", ".join(f"{port}={count}" for port, count in self.per_worker.items()))
+        if self.latencies_ms:
+            print(f"Latency ms: p50={_percentile(self.latencies_ms, 0.5):.1f} "
+                  f"p95={_percentile(self.latencies_ms, 0.95):.1f} "
+                  f"p99={_percentile(self.latencies_ms, 0.99):.1f} "
+                  f"mean={statistics.mean(self.latencies_ms):.1f}")
+
+        presence_consistent = True
+        for port, stats in presence.items():
+            presence_consistent &= stats.get('presence') == 'redis' and stats.get('connected_users') == self.args.clients
+            print(f"Worker {port}: presence={stats.get('presence')} online={stats.get('connected_users')} "
+                  f"connections={stats.get('total_connections')} local={stats['worker']['total_connections']}")
+
+        passed = delivered_all and presence_consistent
+        print("PASS" if passed else "FAIL")
+        return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', nargs='?', choices=['run', 'serve'], default='run')
+    parser.add_argument('--port', type=int, default=9101, help="port for serve mode")
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--clients', type=int, default=90)
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--messages', type=int, default=5, help="notifications per client and updates per room")
+    parser.add_argument('--base-port', type=int, default=9101)
+    parser.add_argument('--heartbeat', type=int, default=5, help="presence heartbeat interval for the workers")
+    parser.add_argument('--message-queue',
+                        default=os.getenv('WEBSOCKET_MESSAGE_QUEUE') or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--delivery-timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        serve(args.port)
+        return
+
+    sys.exit(0 if LoadTest(args).run() else 1)
+
+
+if __name__ == '__main__':
+    main()